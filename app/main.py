@@ -1,18 +1,44 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
+import json
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from core.orchestrator import Orchestrator
+from core.deadline import Deadline
+from core.dispatch import OrchestrationDispatcher, DispatcherSaturated
+from core.engines.deepagent.checkpoint import ExecutionNotFound
+from core.events import event_sink
+from core.jobs import JobManager
+from core.llm_cache import get_llm_cache
+from core.llm_gateway import get_llm_gateway
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Apagado ordenado: terminar trabajos en curso, confirmar la memoria pendiente
+    # y cerrar el pool HTTP del LLM
+    dispatcher.shutdown(wait=True)
+    if orchestrator.memory is not None:
+        orchestrator.memory.close()
+    get_llm_gateway().close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Inicializar Orchestrator
 orchestrator = Orchestrator()
 
+# Pool de workers acotado: la orquestación es síncrona y no debe bloquear el event loop
+dispatcher = OrchestrationDispatcher()
+
+# Trabajos asíncronos (POST /jobs) sobre el mismo pool
+job_manager = JobManager(dispatcher, orchestrator.process_objective)
+
 # CORS CONFIGURATION
 app.add_middleware(
     CORSMiddleware,
@@ -55,54 +81,223 @@ def health():
         "openai_configured": bool(os.getenv("OPENAI_API_KEY"))
     }
 
+@app.get("/metrics")
+def metrics():
+    """Métricas operativas del backend (pool de orquestación)."""
+    return {
+        "dispatch": dispatcher.stats(),
+        "jobs": job_manager.stats(),
+        "reports": orchestrator.reports.stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "rate_governor": get_llm_gateway().governor.stats(),
+        **orchestrator.get_metrics()
+    }
+
+@app.get("/llm/breaker")
+def llm_breaker():
+    """Estado del circuit breaker y de la política de resiliencia del LLM."""
+    return get_llm_gateway().resilience.stats()
+
+def build_response(report):
+    """Construye la respuesta de la API a partir de un OrchestrationReport."""
+    # Extraer la respuesta final del reporte
+    final_answer = "No answer generated"
+    
+    # Intentar sacar la respuesta de los resultados de ejecución
+    if report.execution_results:
+        last_result = report.execution_results[-1]
+        if isinstance(last_result, dict):
+            # Si es DeepAgent, el output suele estar anidado
+            output = last_result.get("output", {})
+            if isinstance(output, dict):
+                final_answer = output.get("result", str(output))
+            else:
+                final_answer = str(output)
+        else:
+            final_answer = str(last_result)
+            
+    # 🔒 FIX CRÍTICO: nunca devolver objeto vacío
+    if not final_answer or final_answer == "{}" or final_answer == {}:
+        final_answer = (
+            "Tarea ejecutada correctamente en modo estándar. "
+            "No se requirió razonamiento avanzado."
+        )
+
+    # Estructura solicitada por el usuario
+    return {
+        # Interrumpida (deadline o desconexión) con resultados parciales
+        "status": "partial" if report.summary.get("cancelled") else "completed",
+        "plan_id": report.plan_id,
+        "final_answer": final_answer,
+        "engine": report.engine,
+        "full_report": report.to_dict() # Incluimos el reporte completo por si acaso
+    }
+
+def request_deadline(request: Request) -> Deadline:
+    """Deadline de la petición: cabecera X-Request-Timeout (segundos) o CODI_REQUEST_TIMEOUT."""
+    return Deadline.from_header(request.headers.get("X-Request-Timeout"))
+
+async def run_cancellable(request: Request, deadline: Deadline, fn, *args):
+    """
+    Ejecuta fn(*args, deadline=deadline) en el pool de workers. Si el cliente se
+    desconecta, cancela el deadline para que no se inicie más trabajo (LLM ni tools).
+    """
+    done = asyncio.wrap_future(dispatcher.submit(fn, *args, deadline=deadline))
+    while True:
+        finished, _ = await asyncio.wait({done}, timeout=0.5)
+        if finished:
+            return done.result()
+        if not deadline.expired and await request.is_disconnected():
+            logger.info("Cliente desconectado: cancelando el trabajo pendiente de la petición")
+            deadline.cancel("client_disconnected")
+
 @app.post("/process")
-async def process_objective(objective: str):
+async def process_objective(objective: str, request: Request):
     try:
         logger.info(f"Processing objective: {objective}")
-        report = orchestrator.process_objective(objective)
-        
-        # Extraer la respuesta final del reporte
-        final_answer = "No answer generated"
-        
-        # Intentar sacar la respuesta de los resultados de ejecución
-        if report.execution_results:
-            last_result = report.execution_results[-1]
-            if isinstance(last_result, dict):
-                # Si es DeepAgent, el output suele estar anidado
-                output = last_result.get("output", {})
-                if isinstance(output, dict):
-                    final_answer = output.get("result", str(output))
-                else:
-                    final_answer = str(output)
-            else:
-                final_answer = str(last_result)
-                
-        # 🔒 FIX CRÍTICO: nunca devolver objeto vacío
-        if not final_answer or final_answer == "{}" or final_answer == {}:
-            final_answer = (
-                "Tarea ejecutada correctamente en modo estándar. "
-                "No se requirió razonamiento avanzado."
-            )
-
-        # Estructura solicitada por el usuario
-        return {
-            "status": "completed",
-            "plan_id": report.plan_id,
-            "final_answer": final_answer,
-            "engine": report.engine,
-            "full_report": report.to_dict() # Incluimos el reporte completo por si acaso
-        }
+        # Ejecutar en el pool de workers para no bloquear el event loop
+        report = await run_cancellable(request, request_deadline(request), orchestrator.process_objective, objective)
+        return build_response(report)
+    except DispatcherSaturated as e:
+        logger.warning(f"Dispatcher saturado, rechazando objetivo: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error processing objective: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/chat")
-async def chat_endpoint(objective: str):
+async def chat_endpoint(objective: str, request: Request):
     """
     Endpoint de compatibilidad para frontend que llama a /chat.
     Redirige internamente a /process.
     """
-    return await process_objective(objective)
+    return await process_objective(objective, request)
+
+def _sse(event: str, data) -> str:
+    """Serializa un evento en formato Server-Sent Events."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+def stream_objective(objective: str, deadline: Deadline) -> StreamingResponse:
+    """
+    Ejecuta el objetivo en el pool de workers y retransmite como SSE los eventos
+    de progreso (engine, plan, intent_start, intent_result...) y la respuesta final.
+    Si el cliente cierra el stream, se cancela el trabajo pendiente.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def sink(event, data):
+        # Se llama desde el worker: pasar el evento al event loop
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def run():
+        with event_sink(sink):
+            return orchestrator.process_objective(objective, deadline=deadline)
+
+    # Admisión antes de abrir el stream para poder responder 429
+    try:
+        future = dispatcher.submit(run)
+    except DispatcherSaturated as e:
+        logger.warning(f"Dispatcher saturado, rechazando objetivo: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+    async def events():
+        done = asyncio.wrap_future(future)
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                finished, _ = await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in finished:
+                    yield _sse(*getter.result())
+                    continue
+                getter.cancel()
+                break
+        finally:
+            # Stream cerrado por el cliente antes de terminar
+            if not done.done():
+                logger.info("Cliente desconectado del stream: cancelando el trabajo pendiente")
+                deadline.cancel("client_disconnected")
+
+        # Vaciar eventos pendientes emitidos antes de terminar
+        while not queue.empty():
+            yield _sse(*queue.get_nowait())
+
+        try:
+            yield _sse("final", build_response(done.result()))
+        except Exception as e:
+            logger.error(f"Error processing objective (stream): {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/process/stream")
+async def process_objective_stream(objective: str, request: Request):
+    """Variante streaming (SSE) de /process."""
+    logger.info(f"Processing objective (stream): {objective}")
+    return stream_objective(objective, request_deadline(request))
+
+@app.post("/chat/stream")
+async def chat_endpoint_stream(objective: str, request: Request):
+    """Variante streaming (SSE) de /chat."""
+    return await process_objective_stream(objective, request)
+
+@app.post("/jobs", status_code=202)
+async def create_job(objective: str):
+    """Encola un objetivo y retorna el job_id inmediatamente."""
+    try:
+        job = job_manager.submit(objective)
+    except DispatcherSaturated as e:
+        logger.warning(f"Dispatcher saturado, rechazando trabajo: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Estado del trabajo y, si terminó, su resultado."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo no encontrado: {job_id}")
+    data = job.to_dict()
+    # Un trabajo cancelado en ejecución conserva su reporte parcial
+    if job.status in ("completed", "cancelled") and job.plan_id:
+        try:
+            data["result"] = build_response(orchestrator.get_report(job.plan_id))
+        except ValueError:
+            data["result"] = None
+    return data
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancela un trabajo en cola o en ejecución."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo no encontrado: {job_id}")
+    return job.to_dict()
+
+@app.post("/executions/{execution_id}/resume")
+async def resume_execution(execution_id: str, request: Request):
+    """
+    Reanuda una ejecución DeepAgent desde su checkpoint (plan_id del reporte original):
+    sin nueva llamada al planner y sin repetir los intents ya completados.
+    """
+    try:
+        report = await run_cancellable(request, request_deadline(request), orchestrator.resume_execution, execution_id)
+        return build_response(report)
+    except ExecutionNotFound:
+        raise HTTPException(status_code=404, detail=f"Ejecución no encontrada: {execution_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except DispatcherSaturated as e:
+        logger.warning(f"Dispatcher saturado, rechazando reanudación: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error resuming execution: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.options("/{full_path:path}")
 async def options_handler(full_path: str):
@@ -0,0 +1,108 @@
+"""
+Benchmark: overhead de LangGraphEngine frente a PipelineEngine.
+
+Mide, con un LLM simulado (sin red) y herramientas no-op:
+  - tiempo de importación de cada motor en un intérprete limpio
+  - overhead por petición de run(goal, context) (plan + execute)
+
+Uso:
+    python benchmarks/engine_overhead.py [--iterations 2000] [--import-runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Sin cachés ni streaming: cada run() recorre plan -> parseo -> execute completos
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("PLAN_CACHE_ENABLED", "false")
+os.environ.setdefault("DEEPAGENT_STREAM_PLAN", "false")
+os.environ.setdefault("DEEPAGENT_QUESTION_FASTPATH", "false")
+
+ENGINES = {
+    "langgraph": ("core.engines.deepagent.langgraph_engine", "LangGraphEngine"),
+    "pipeline": ("core.engines.deepagent.pipeline_engine", "PipelineEngine"),
+}
+
+PLAN = (
+    '[{"intent": "read_file", "params": {"file_path": "a.txt"}}, '
+    '{"intent": "analyze", "params": {"content": "texto"}}]'
+)
+
+
+class MockChatModel:
+    """LLM simulado con la interfaz invoke(messages) -> respuesta con .content."""
+    model_name = "mock"
+    temperature = 0.0
+
+    class _Response:
+        content = PLAN
+
+    def invoke(self, messages):
+        return self._Response()
+
+
+class NoopTools:
+    def execute(self, intent):
+        return "ok"
+
+
+def measure_import(module: str, runs: int) -> float:
+    """Mediana (s) del tiempo de importación del módulo en un intérprete nuevo."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def measure_requests(engine, iterations: int) -> list:
+    """Latencias (s) de run() para el motor dado."""
+    for _ in range(min(100, iterations)):
+        engine.run("lee a.txt y analízalo", {})
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        engine.run("lee a.txt y analízalo", {})
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--import-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+    import importlib
+
+    print(f"{'motor':<10} {'import (ms)':>12} {'p50 (µs)':>10} {'p95 (µs)':>10} {'media (µs)':>11}")
+    for name, (module, class_name) in ENGINES.items():
+        import_seconds = measure_import(module, args.import_runs)
+        engine_class = getattr(importlib.import_module(module), class_name)
+        engine = engine_class(MockChatModel(), NoopTools(), max_parallel_intents=1)
+        samples = measure_requests(engine, args.iterations)
+        print(
+            f"{name:<10} {import_seconds * 1000:>12.1f} {percentile(samples, 50) * 1e6:>10.0f} "
+            f"{percentile(samples, 95) * 1e6:>10.0f} {statistics.mean(samples) * 1e6:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+CODI Core - Bulkhead Module
+Aislamiento por herramienta: cada tool registrada se ejecuta en su propio pool
+de workers con límite de concurrencia, cola de admisión acotada, timeout y
+circuit breaker de fallos. Una ráfaga de llamadas lentas a QuestionTool (red)
+satura solo su pool y no retrasa las lecturas locales de FileTool.
+"""
+
+import concurrent.futures
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from .deadline import DeadlineExceeded, current_deadline
+from .llm_resilience import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class BulkheadFull(Exception):
+    """Se lanza cuando el pool y la cola de una herramienta están llenos."""
+
+
+class ToolTimeout(TimeoutError):
+    """Se lanza cuando una herramienta supera su timeout."""
+
+
+@dataclass
+class BulkheadLimits:
+    """Límites de una herramienta."""
+    workers: int = 4
+    queue: int = 16
+    timeout: float = 30.0
+
+
+class Bulkhead:
+    """Pool aislado de una herramienta, seguro entre hilos."""
+
+    def __init__(self, name: str, limits: BulkheadLimits, breaker: CircuitBreaker):
+        self.name = name
+        self.limits = limits
+        self.breaker = breaker
+        self._pool = ThreadPoolExecutor(max_workers=limits.workers, thread_name_prefix=f"codi-tool-{name}")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.counters = {"calls": 0, "completed": 0, "failures": 0, "timeouts": 0, "rejected": 0}
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def call(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Ejecuta fn(*args, **kwargs) en el pool de la herramienta y espera su
+        resultado como máximo el timeout de la herramienta (o lo que quede del
+        deadline de la petición).
+
+        Raises:
+            BulkheadFull: Si la herramienta no admite más llamadas
+            CircuitOpenError: Si la herramienta está degradada por fallos consecutivos
+            ToolTimeout: Si la llamada supera el timeout
+            DeadlineExceeded: Si la petición se cancela durante la espera
+        """
+        with self._lock:
+            if self._queued + self._running >= self.limits.workers + self.limits.queue:
+                self.counters["rejected"] += 1
+                raise BulkheadFull(
+                    f"Herramienta {self.name} saturada: {self._running} en ejecución, {self._queued} en cola"
+                )
+            self._queued += 1
+        if not self.breaker.allow():
+            with self._lock:
+                self._queued -= 1
+                self.counters["rejected"] += 1
+            raise CircuitOpenError(f"Herramienta {self.name} degradada (circuito abierto)")
+
+        self._count("calls")
+        state = {"timed_out": False}
+        future = self._pool.submit(contextvars.copy_context().run, self._run, fn, *args, **kwargs)
+        future.add_done_callback(lambda f: self._on_done(f, state))
+        try:
+            return self._wait(future)
+        except ToolTimeout:
+            state["timed_out"] = True
+            self._count("timeouts")
+            self.breaker.record_failure()
+            raise
+
+    def _on_done(self, future: concurrent.futures.Future, state: Dict[str, bool]):
+        """Resultado de la llamada para contadores y circuit breaker."""
+        if state["timed_out"]:
+            return
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or isinstance(error, DeadlineExceeded):
+            # Cancelada con la petición: no dice nada de la salud de la herramienta
+            self.breaker.release()
+        elif error is not None:
+            self._count("failures")
+            self.breaker.record_failure()
+        else:
+            self._count("completed")
+            self.breaker.record_success()
+
+    def _run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            # La petición pudo cancelarse mientras la llamada esperaba en cola
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.check()
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _wait(self, future: concurrent.futures.Future) -> Any:
+        """Espera con timeout; una llamada sin empezar se retira de la cola al abandonarla."""
+        deadline = current_deadline()
+        timeout = self.limits.timeout
+        if deadline is not None and deadline.remaining() is not None:
+            timeout = min(timeout, deadline.remaining())
+        waited = 0.0
+        while not future.done():
+            step = min(0.2, max(0.0, timeout - waited))
+            concurrent.futures.wait([future], timeout=step)
+            waited += step
+            if future.done():
+                break
+            if deadline is not None and deadline.expired:
+                self._abandon(future)
+                deadline.check()
+            if waited >= timeout:
+                self._abandon(future)
+                raise ToolTimeout(f"Herramienta {self.name} superó su timeout ({timeout:.1f}s)")
+        return future.result()
+
+    def _abandon(self, future: concurrent.futures.Future):
+        # Si aún no arrancó no llega a ejecutarse; si está en curso termina en su worker
+        if future.cancel():
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.limits.workers,
+                "max_queue": self.limits.queue,
+                "timeout_seconds": self.limits.timeout,
+                "running": self._running,
+                "queue_depth": self._queued,
+                # Ocupación de workers y de la capacidad total de admisión
+                "saturation": self._running / self.limits.workers,
+                "admission_saturation": (self._running + self._queued) / (self.limits.workers + self.limits.queue),
+                **self.counters,
+                "breaker": self.breaker.stats()
+            }
+
+
+class ToolBulkheads:
+    """Bulkheads de todas las herramientas (creados bajo demanda)."""
+
+    def __init__(self, limits: Dict[str, BulkheadLimits] = None, default: BulkheadLimits = None,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.limits = limits or {}
+        self.default = default or BulkheadLimits()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._bulkheads: Dict[str, Bulkhead] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ToolBulkheads":
+        """
+        Configuración:
+            CODI_TOOL_BULKHEADS="QuestionTool=8:32:60,FileTool=4:32:10" (tool=workers:cola:timeout)
+            CODI_TOOL_DEFAULT_WORKERS / CODI_TOOL_DEFAULT_QUEUE / CODI_TOOL_DEFAULT_TIMEOUT para el resto
+            CODI_TOOL_BREAKER_THRESHOLD fallos consecutivos que abren el circuito de una herramienta
+            CODI_TOOL_BREAKER_RESET segundos hasta la llamada de prueba
+        """
+        default = BulkheadLimits(
+            workers=int(os.getenv("CODI_TOOL_DEFAULT_WORKERS", 4)),
+            queue=int(os.getenv("CODI_TOOL_DEFAULT_QUEUE", 16)),
+            timeout=float(os.getenv("CODI_TOOL_DEFAULT_TIMEOUT", 30))
+        )
+        limits: Dict[str, BulkheadLimits] = {}
+        for item in filter(None, (part.strip() for part in os.getenv("CODI_TOOL_BULKHEADS", "").split(","))):
+            try:
+                tool, values = item.split("=", 1)
+                workers, queue, timeout = (values.split(":") + ["", ""])[:3]
+                limits[tool.strip()] = BulkheadLimits(
+                    workers=int(workers or default.workers),
+                    queue=int(queue or default.queue),
+                    timeout=float(timeout or default.timeout)
+                )
+            except ValueError:
+                logger.error(f"Bulkhead inválido en CODI_TOOL_BULKHEADS: {item}")
+        return cls(
+            limits, default,
+            failure_threshold=int(os.getenv("CODI_TOOL_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("CODI_TOOL_BREAKER_RESET", 30))
+        )
+
+    def get(self, tool: str) -> Bulkhead:
+        with self._lock:
+            if tool not in self._bulkheads:
+                self._bulkheads[tool] = Bulkhead(
+                    tool,
+                    self.limits.get(tool, self.default),
+                    CircuitBreaker(f"tool:{tool}", self.failure_threshold, self.reset_timeout)
+                )
+            return self._bulkheads[tool]
+
+    def call(self, tool: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Ejecuta fn a través del bulkhead de la herramienta (ver Bulkhead.call)."""
+        return self.get(tool).call(fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            bulkheads = dict(self._bulkheads)
+        return {tool: bulkhead.stats() for tool, bulkhead in bulkheads.items()}
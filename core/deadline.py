@@ -0,0 +1,149 @@
+"""
+CODI Core - Deadline Module
+Deadline y cancelación cooperativa por petición. El Deadline se propaga con
+contextvars (como los eventos y las métricas) y cada etapa lo consulta antes
+de empezar trabajo nuevo: llamadas LLM (limitan su timeout al tiempo restante
+y se abortan al cancelar), intents de DeepAgent y tareas del Executor.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Se lanza al intentar trabajo nuevo con el deadline vencido o la petición cancelada."""
+
+
+class Deadline:
+    """Instante límite de una petición (monotónico) más una señal de cancelación."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self._cancelled = threading.Event()
+        self.reason: Optional[str] = None
+
+    @classmethod
+    def from_header(cls, value: Optional[str]) -> "Deadline":
+        """
+        Deadline desde la cabecera X-Request-Timeout (segundos) o, si falta o no es
+        válida, desde CODI_REQUEST_TIMEOUT. El máximo es CODI_REQUEST_TIMEOUT_MAX.
+        """
+        default = float(os.getenv("CODI_REQUEST_TIMEOUT", 120))
+        try:
+            timeout = float(value) if value else default
+        except ValueError:
+            timeout = default
+        if timeout <= 0:
+            timeout = default
+        return cls(min(timeout, float(os.getenv("CODI_REQUEST_TIMEOUT_MAX", 600))))
+
+    def cancel(self, reason: str = "cancelled"):
+        """Cancela la petición: el trabajo pendiente no llega a empezar."""
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        """Segundos restantes (None sin límite de tiempo)."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """True si la petición fue cancelada o se agotó su tiempo."""
+        if self._cancelled.is_set():
+            return True
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.cancel("deadline_exceeded")
+            return True
+        return False
+
+    def check(self):
+        """
+        Raises:
+            DeadlineExceeded: Si la petición fue cancelada o venció su deadline
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Petición interrumpida: {self.reason}")
+
+
+class SharedDeadline(Deadline):
+    """
+    Deadline de una ejecución compartida por varias peticiones (single-flight).
+
+    Sigue vigente mientras quede alguna petición esperando con su propio deadline
+    vigente: solo vence cuando todas han vencido o se han cancelado. El tiempo
+    restante es el de la petición con más margen (None si alguna no tiene límite).
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self._lock = threading.Lock()
+        self._participants: List[Optional[Deadline]] = []
+
+    def join(self, deadline: Optional[Deadline]):
+        """Añade el deadline de una petición que espera la ejecución (None = sin límite)."""
+        with self._lock:
+            self._participants.append(deadline)
+
+    def _live(self) -> List[Optional[Deadline]]:
+        with self._lock:
+            participants = list(self._participants)
+        return [deadline for deadline in participants if deadline is None or not deadline.expired]
+
+    def remaining(self) -> Optional[float]:
+        if self._cancelled.is_set():
+            return 0.0
+        live = self._live()
+        if not live:
+            return 0.0
+        remaining = [deadline.remaining() if deadline is not None else None for deadline in live]
+        if any(value is None for value in remaining):
+            return None
+        return max(remaining)
+
+    @property
+    def expired(self) -> bool:
+        if self._cancelled.is_set():
+            return True
+        if self._live():
+            return False
+        with self._lock:
+            reasons = [deadline.reason for deadline in self._participants if deadline is not None]
+        self.cancel(reasons[-1] if reasons else "cancelled")
+        return True
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("codi_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline de la petición en curso (None si no tiene)."""
+    return _current_deadline.get()
+
+
+def check_deadline():
+    """Comprueba el deadline de la petición en curso (no-op si no hay)."""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def deadline_expired() -> bool:
+    deadline = _current_deadline.get()
+    return deadline is not None and deadline.expired
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Instala el deadline de la petición durante el bloque."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
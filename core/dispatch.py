@@ -0,0 +1,117 @@
+"""
+CODI Core - Dispatch Module
+Despacha la orquestación (síncrona) a un pool de workers acotado, para que las
+llamadas lentas al LLM no bloqueen el event loop de FastAPI.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class DispatcherSaturated(Exception):
+    """Se lanza cuando el pool y la cola de admisión están llenos."""
+
+
+class OrchestrationDispatcher:
+    """
+    Pool de workers con cola de admisión acotada.
+
+    Admite como máximo `max_workers` tareas en ejecución más `max_queue` en espera.
+    Por encima de ese límite rechaza inmediatamente con DispatcherSaturated
+    (la API lo traduce a HTTP 429).
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None):
+        self.max_workers = max_workers or int(os.getenv("CODI_MAX_WORKERS", 8))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("CODI_MAX_QUEUE", 32))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="codi-worker")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+        logger.info(f"OrchestrationDispatcher inicializado: workers={self.max_workers}, cola={self.max_queue}")
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Encola fn(*args, **kwargs) en el pool.
+
+        Returns:
+            Future: Futuro concurrente con el resultado
+
+        Raises:
+            DispatcherSaturated: Si no hay capacidad de admisión
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise DispatcherSaturated(
+                    f"Capacidad agotada: {self._running} en ejecución, {self._queued} en cola"
+                )
+            self._queued += 1
+            self._admitted += 1
+
+        enqueued_at = time.monotonic()
+        # Propagar contextvars del llamador al worker
+        ctx = contextvars.copy_context()
+        started = threading.Event()
+
+        def _run():
+            wait = time.monotonic() - enqueued_at
+            with self._lock:
+                started.set()
+                self._queued -= 1
+                self._running += 1
+                self._wait_total += wait
+                self._wait_last = wait
+                self._wait_max = max(self._wait_max, wait)
+            try:
+                return ctx.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        future = self._pool.submit(_run)
+
+        def _on_done(f: Future):
+            # Una tarea cancelada antes de arrancar nunca pasa por _run
+            if f.cancelled():
+                with self._lock:
+                    if not started.is_set():
+                        self._queued -= 1
+
+        future.add_done_callback(_on_done)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna profundidad de cola, ocupación y tiempos de espera."""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._queued,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "avg_wait_seconds": self._wait_total / started if started else 0.0,
+                "max_wait_seconds": self._wait_max,
+                "last_wait_seconds": self._wait_last
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Detiene el pool de workers."""
+        self._pool.shutdown(wait=wait)
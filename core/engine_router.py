@@ -0,0 +1,229 @@
+"""
+CODI Core - Engine Router Module
+Enrutado adaptativo entre el motor estándar (Planner + Executor) y DeepAgent.
+
+Registra por clase de objetivo y motor la latencia, el coste (tokens LLM) y el
+éxito de las ejecuciones recientes. El motor preferido por el Decision Gate se
+mantiene mientras cumple el SLO de latencia; si lo incumple se usa la
+alternativa que lo cumple. Si la latencia observada del proveedor LLM supera
+su SLO, la carga se desvía al motor estándar.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .engines.deepagent.question_fastpath import PATH_PATTERN, is_plain_question
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("standard", "deepagent")
+
+# Clases que el motor estándar no sabe resolver (necesitan respuesta del LLM)
+LLM_ONLY_CLASSES = {"question"}
+
+
+def objective_class(objective: str) -> str:
+    """
+    Clase de un objetivo para agrupar métricas: 'question' o
+    '<files|text>-<single|multi>' según mencione archivos y tenga varios pasos.
+    """
+    objective = objective or ""
+    if is_plain_question(objective):
+        return "question"
+    files = "files" if PATH_PATTERN.search(objective) or "zip" in objective.lower() else "text"
+    multi = "multi" if re.search(r"\s(?:y|luego|después|and|then)\s|,|;", objective.lower()) else "single"
+    return f"{files}-{multi}"
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+class EngineWindow:
+    """
+    Ventana deslizante de ejecuciones (latencia, éxito, coste) de un motor en una
+    clase. Las muestras caducan tras max_age segundos: un motor descartado por
+    incumplir el SLO vuelve a probarse cuando sus datos dejan de ser recientes.
+    """
+
+    def __init__(self, size: int, max_age: float):
+        self.max_age = max_age
+        self._samples: deque = deque(maxlen=size)
+
+    def add(self, latency: float, success: bool, cost_tokens: float):
+        self._samples.append((latency, success, cost_tokens, time.monotonic()))
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.max_age
+        while self._samples and self._samples[0][3] < cutoff:
+            self._samples.popleft()
+
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._samples)
+
+    def latency(self, p: float) -> Optional[float]:
+        return _percentile([sample[0] for sample in self._samples], p)
+
+    def success_rate(self) -> float:
+        return sum(1 for sample in self._samples if sample[1]) / len(self._samples) if self._samples else 0.0
+
+    def avg_cost(self) -> float:
+        return sum(sample[2] for sample in self._samples) / len(self._samples) if self._samples else 0.0
+
+
+class EngineRouter:
+    """Decide el motor por clase de objetivo a partir de las métricas observadas."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        latency_slo: float = 20.0,
+        slo_percentile: float = 90.0,
+        provider_slo: float = 10.0,
+        min_samples: int = 5,
+        min_success: float = 0.8,
+        window: int = 100,
+        max_age: float = 600.0,
+        provider_latency: Callable[[float], Optional[float]] = None
+    ):
+        self.enabled = enabled
+        self.latency_slo = latency_slo
+        self.slo_percentile = slo_percentile
+        self.provider_slo = provider_slo
+        self.min_samples = min_samples
+        self.min_success = min_success
+        self.window = window
+        self.max_age = max_age
+        # p -> percentil p de la latencia de las llamadas al proveedor (None sin datos)
+        self.provider_latency = provider_latency
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, str], EngineWindow] = {}
+        self.decisions: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, provider_latency: Callable[[float], Optional[float]] = None) -> "EngineRouter":
+        """
+        Configuración:
+            CODI_ROUTER_ENABLED (true/false)
+            CODI_ROUTER_LATENCY_SLO segundos por objetivo, medidos en el percentil CODI_ROUTER_SLO_PERCENTILE
+            CODI_ROUTER_PROVIDER_SLO segundos por llamada LLM (p95) a partir de los cuales se desvía carga
+            CODI_ROUTER_MIN_SAMPLES, CODI_ROUTER_MIN_SUCCESS, CODI_ROUTER_WINDOW
+            CODI_ROUTER_MAX_AGE segundos que una muestra cuenta para las decisiones
+        """
+        return cls(
+            enabled=os.getenv("CODI_ROUTER_ENABLED", "true").lower() == "true",
+            latency_slo=float(os.getenv("CODI_ROUTER_LATENCY_SLO", 20)),
+            slo_percentile=float(os.getenv("CODI_ROUTER_SLO_PERCENTILE", 90)),
+            provider_slo=float(os.getenv("CODI_ROUTER_PROVIDER_SLO", 10)),
+            min_samples=int(os.getenv("CODI_ROUTER_MIN_SAMPLES", 5)),
+            min_success=float(os.getenv("CODI_ROUTER_MIN_SUCCESS", 0.8)),
+            window=int(os.getenv("CODI_ROUTER_WINDOW", 100)),
+            max_age=float(os.getenv("CODI_ROUTER_MAX_AGE", 600)),
+            provider_latency=provider_latency
+        )
+
+    def _window(self, klass: str, engine: str) -> EngineWindow:
+        """Requiere self._lock."""
+        key = (klass, engine)
+        if key not in self._windows:
+            self._windows[key] = EngineWindow(self.window, self.max_age)
+        return self._windows[key]
+
+    def record(self, klass: str, engine: str, latency: float, success: bool, cost_tokens: float = 0):
+        """Registra el resultado de una ejecución."""
+        if engine not in ENGINES:
+            return
+        with self._lock:
+            self._window(klass, engine).add(latency, success, cost_tokens)
+
+    def provider_overloaded(self) -> bool:
+        """True si la latencia p95 observada del proveedor LLM supera su SLO."""
+        if self.provider_latency is None:
+            return False
+        p95 = self.provider_latency(95)
+        return p95 is not None and p95 > self.provider_slo
+
+    def _meets_slo(self, window: EngineWindow) -> Optional[bool]:
+        """True/False si el motor cumple SLO y tasa de éxito; None sin muestras suficientes."""
+        if len(window) < self.min_samples:
+            return None
+        return window.latency(self.slo_percentile) <= self.latency_slo and window.success_rate() >= self.min_success
+
+    def route(self, klass: str, preferred: str, candidates: List[str]) -> Tuple[str, str]:
+        """
+        Elige el motor para un objetivo de la clase dada.
+
+        Args:
+            klass: Clase del objetivo (objective_class)
+            preferred: Motor elegido por el Decision Gate
+            candidates: Motores permitidos para esta petición
+
+        Returns:
+            Tuple[str, str]: (motor, motivo de la decisión)
+        """
+        engine, reason = self._choose(klass, preferred, candidates)
+        with self._lock:
+            self.decisions[reason] = self.decisions.get(reason, 0) + 1
+        if engine != preferred:
+            logger.info(f"[EngineRouter] {klass}: {preferred} -> {engine} ({reason})")
+        return engine, reason
+
+    def _choose(self, klass: str, preferred: str, candidates: List[str]) -> Tuple[str, str]:
+        if not self.enabled:
+            return preferred if preferred in candidates else candidates[0], "static"
+        if klass in LLM_ONLY_CLASSES and "deepagent" in candidates:
+            return "deepagent", "llm_only"
+        if len(candidates) < 2 or preferred not in candidates:
+            return preferred if preferred in candidates else candidates[0], "static"
+
+        if preferred == "deepagent" and self.provider_overloaded():
+            return "standard", "provider_overloaded"
+
+        with self._lock:
+            verdicts = {engine: self._meets_slo(self._window(klass, engine)) for engine in candidates}
+            costs = {engine: self._window(klass, engine).avg_cost() for engine in candidates}
+        if verdicts[preferred] is not False:
+            return preferred, "preferred"
+
+        # El preferido incumple: alternativa que cumple (o sin datos aún), la más barata primero
+        alternatives = sorted(
+            (engine for engine in candidates if engine != preferred and verdicts[engine] is not False),
+            key=lambda engine: (verdicts[engine] is not True, costs[engine])
+        )
+        if alternatives:
+            return alternatives[0], "slo_breach"
+        return preferred, "no_alternative"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            classes: Dict[str, Dict[str, Any]] = {}
+            for (klass, engine), window in self._windows.items():
+                if not len(window):
+                    continue
+                classes.setdefault(klass, {})[engine] = {
+                    "samples": len(window),
+                    "latency_p50_seconds": window.latency(50),
+                    f"latency_p{int(self.slo_percentile)}_seconds": window.latency(self.slo_percentile),
+                    "success_rate": window.success_rate(),
+                    "avg_cost_tokens": window.avg_cost(),
+                    "meets_slo": self._meets_slo(window)
+                }
+            decisions = dict(self.decisions)
+        return {
+            "enabled": self.enabled,
+            "latency_slo_seconds": self.latency_slo,
+            "provider_slo_seconds": self.provider_slo,
+            "provider_latency_p95_seconds": self.provider_latency(95) if self.provider_latency else None,
+            "provider_overloaded": self.provider_overloaded(),
+            "decisions": decisions,
+            "classes": classes
+        }
@@ -0,0 +1,149 @@
+"""
+Journal de ejecuciones de DeepAgent (checkpoints en SQLite local).
+
+Por cada execution_id guarda el objetivo, el plan (lista de intents) y el
+resultado de cada intent a medida que termina. Permite reanudar una ejecución
+fallida sin volver a llamar al planner ni repetir los intents ya completados.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionNotFound(Exception):
+    """La ejecución no existe en el journal (nunca se guardó o ya caducó)."""
+
+
+class ExecutionJournal:
+    """Checkpoints de ejecución en SQLite, seguros entre hilos."""
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS executions ("
+                "execution_id TEXT PRIMARY KEY, goal TEXT NOT NULL, context TEXT NOT NULL, "
+                "intents TEXT, status TEXT NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS intent_results ("
+                "execution_id TEXT NOT NULL, idx INTEGER NOT NULL, intent TEXT NOT NULL, "
+                "status TEXT NOT NULL, step TEXT, error TEXT, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (execution_id, idx))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_executions_updated ON executions(updated_at)")
+            self._prune()
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["ExecutionJournal"]:
+        """
+        Configuración:
+            DEEPAGENT_JOURNAL_PATH (vacío desactiva los checkpoints)
+            DEEPAGENT_JOURNAL_TTL segundos que se conservan las ejecuciones
+        """
+        path = os.getenv("DEEPAGENT_JOURNAL_PATH", os.path.join(tempfile.gettempdir(), "codi_journal.sqlite"))
+        if not path:
+            return None
+        try:
+            return cls(path, ttl_seconds=float(os.getenv("DEEPAGENT_JOURNAL_TTL", 7 * 86400)))
+        except Exception as e:
+            logger.error(f"No se pudo abrir el journal de ejecuciones ({path}): {e}")
+            return None
+
+    def _prune(self):
+        """Borra ejecuciones caducadas. Requiere self._lock."""
+        cutoff = time.time() - self.ttl_seconds
+        self._conn.execute(
+            "DELETE FROM intent_results WHERE execution_id IN "
+            "(SELECT execution_id FROM executions WHERE updated_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM executions WHERE updated_at < ?", (cutoff,))
+
+    def _write(self, sql: str, params: tuple):
+        try:
+            with self._lock:
+                self._conn.execute(sql, params)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            # El journal es best-effort: nunca rompe la ejecución
+            logger.warning(f"Error escribiendo journal de ejecuciones: {e}")
+
+    def start(self, execution_id: str, goal: str, context: Dict[str, Any]):
+        """Registra (o reabre) una ejecución."""
+        now = time.time()
+        self._write(
+            "INSERT INTO executions (execution_id, goal, context, intents, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, NULL, 'running', ?, ?) "
+            "ON CONFLICT(execution_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at",
+            (execution_id, goal, json.dumps(context or {}, default=str), now, now)
+        )
+
+    def save_plan(self, execution_id: str, intents: List[Any]):
+        self._write(
+            "UPDATE executions SET intents = ?, updated_at = ? WHERE execution_id = ?",
+            (json.dumps(intents, ensure_ascii=False, default=str), time.time(), execution_id)
+        )
+
+    def save_result(self, execution_id: str, index: int, intent: Any, step: Optional[str], error: Optional[str]):
+        self._write(
+            "INSERT OR REPLACE INTO intent_results (execution_id, idx, intent, status, step, error, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (execution_id, index, json.dumps(intent, ensure_ascii=False, default=str),
+             "error" if error is not None else "success", step, error, time.time())
+        )
+
+    def finish(self, execution_id: str, status: str):
+        self._write(
+            "UPDATE executions SET status = ?, updated_at = ? WHERE execution_id = ?",
+            (status, time.time(), execution_id)
+        )
+
+    def load(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado guardado de una ejecución: objetivo, contexto, plan (o None si no
+        llegó a planificarse) y pasos de los intents completados con éxito.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT goal, context, intents, status FROM executions WHERE execution_id = ?",
+                (execution_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            completed = self._conn.execute(
+                "SELECT idx, intent, step FROM intent_results WHERE execution_id = ? AND status = 'success'",
+                (execution_id,)
+            ).fetchall()
+        intents = json.loads(row[2]) if row[2] is not None else None
+        return {
+            "execution_id": execution_id,
+            "goal": row[0],
+            "context": json.loads(row[1]),
+            "intents": intents,
+            "status": row[3],
+            # Solo cuentan los resultados cuyo intent coincide con el del plan guardado
+            "completed": {
+                index: step for index, intent, step in completed
+                if intents is not None and index < len(intents)
+                and json.loads(intent) == json.loads(json.dumps(intents[index], default=str))
+            }
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM executions GROUP BY status").fetchall()
+        return {"path": self.path, "executions": dict(rows)}
@@ -1,11 +1,14 @@
 from typing import Dict, List, Any, Optional
+from core.deadline import DeadlineExceeded, current_deadline
 from core.engines.deepagent.audit import audit_execution
+from core.engines.deepagent.checkpoint import ExecutionNotFound
 
 class DeepAgentEngine:
     def __init__(self, engine):
         """
-        Inicializa DeepAgentEngine con un motor subyacente (Mock o LangGraph).
-        El motor debe tener un método run(goal, context).
+        Inicializa DeepAgentEngine con un motor subyacente (Mock, LangGraph o Pipeline).
+        El motor debe tener un método run(goal, context, execution_id=None) y,
+        opcionalmente, resume(execution_id) para reanudar ejecuciones.
         """
         self.engine = engine
 
@@ -17,16 +20,53 @@ class DeepAgentEngine:
         try:
             # Delegar ejecución al motor inyectado
             # El motor ya debe estar configurado con sus herramientas y LLM
-            result = self.engine.run(goal, context)
+            result = self.engine.run(goal, context, execution_id=execution_id)
         except Exception as e:
             # Captura de errores de último recurso para asegurar auditoría
-            result = {
-                "steps": [],
-                "warnings": [],
-                "errors": [str(e)],
-                "result": None
-            }
+            result = self._error_result(e)
 
+        return self._audit(execution_id, goal, result)
+
+    def resume(self, execution_id: str) -> Dict[str, Any]:
+        """
+        Reanuda una ejecución previa desde su checkpoint (sin re-planificar ni
+        repetir los intents completados).
+
+        Raises:
+            ExecutionNotFound: Si la ejecución no existe en el journal
+            ValueError: Si el motor no soporta reanudación
+        """
+        if not hasattr(self.engine, "resume"):
+            raise ValueError("El motor DeepAgent actual no soporta reanudación")
+        journal = getattr(self.engine, "journal", None)
+        saved = journal.load(execution_id) if journal is not None else None
+        if saved is None:
+            raise ExecutionNotFound(f"Ejecución no encontrada: {execution_id}")
+
+        try:
+            result = self.engine.resume(execution_id)
+        except Exception as e:
+            result = self._error_result(e)
+
+        result = self._audit(execution_id, saved["goal"], result)
+        # El objetivo original (el reporte de la primera ejecución puede haber caducado)
+        return {**result, "goal": saved["goal"]}
+
+    @staticmethod
+    def _error_result(error: Exception) -> Dict[str, Any]:
+        result = {
+            "steps": [],
+            "warnings": [],
+            "errors": [str(error)],
+            "result": None
+        }
+        if isinstance(error, DeadlineExceeded):
+            # Interrumpida antes de terminar (p. ej. durante la llamada al planner)
+            deadline = current_deadline()
+            result["cancelled"] = deadline.reason if deadline is not None else "cancelled"
+        return result
+
+    def _audit(self, execution_id: str, goal: str, result: Dict[str, Any]) -> Dict[str, Any]:
         # Auditoría obligatoria
         audit_execution(
             execution_id=execution_id,
@@ -37,3 +77,9 @@ class DeepAgentEngine:
         )
         
         return result
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas del motor subyacente, si las expone."""
+        if hasattr(self.engine, "get_metrics"):
+            return self.engine.get_metrics()
+        return {}
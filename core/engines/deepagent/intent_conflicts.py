@@ -0,0 +1,56 @@
+"""
+Detección de conflictos entre intents de un plan de DeepAgent.
+
+Deriva de los parámetros de ruta de cada intent qué rutas lee y cuáles escribe.
+Dos intents están en conflicto si uno escribe una ruta que el otro lee o escribe;
+los intents en conflicto se ejecutan en orden del plan y el resto en paralelo
+(ver IntentScheduler).
+"""
+
+import os
+from typing import Any, Set, Tuple
+
+# Parámetros que contienen rutas del sistema de archivos
+PATH_PARAMS = ("file_path", "filename", "path", "zip_path", "target_dir")
+
+# Intents que solo leen sus rutas
+READ_INTENTS = {"read_file", "analyze_text"}
+
+# Intents sin efectos sobre el sistema de archivos
+PURE_INTENTS = {"answer_question", "analyze"}
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.normpath(str(path)))
+
+
+def intent_access(intent: Any) -> Tuple[Set[str], Set[str]]:
+    """
+    Rutas que un intent lee y escribe.
+    Los intents desconocidos con parámetros de ruta se consideran escrituras (conservador).
+
+    Returns:
+        Tuple[Set[str], Set[str]]: (lecturas, escrituras)
+    """
+    if not isinstance(intent, dict):
+        return set(), set()
+    name = intent.get("intent") or intent.get("name")
+    params = intent.get("params") or {}
+    paths = {_normalize(params[key]) for key in PATH_PARAMS if params.get(key)}
+
+    if name in PURE_INTENTS and not paths:
+        return set(), set()
+    if name in READ_INTENTS:
+        return paths, set()
+    if name == "inspect_zip":
+        # FileTool extrae en "<zip sin extensión>_extracted"
+        return paths, {_normalize(os.path.splitext(path)[0] + "_extracted") for path in paths}
+    return set(), paths
+
+
+def conflicts(first: Tuple[Set[str], Set[str]], second: Tuple[Set[str], Set[str]]) -> bool:
+    """True si dos accesos (lecturas, escrituras) no pueden ejecutarse a la vez."""
+    reads_a, writes_a = first
+    reads_b, writes_b = second
+    return bool(writes_a & (reads_b | writes_b) or writes_b & reads_a)
+
@@ -0,0 +1,86 @@
+"""
+Planificador incremental de intents de DeepAgent.
+
+Los intents se añaden uno a uno (por ejemplo, según el planner los va generando
+en streaming) y cada uno se lanza en el pool de herramientas en cuanto han
+terminado los intents anteriores con los que está en conflicto de rutas, sin
+superar el límite de intents simultáneos del plan.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from core.engines.deepagent.intent_conflicts import conflicts, intent_access
+
+Outcome = Tuple[Optional[str], Optional[str]]
+
+
+class IntentScheduler:
+    """Ejecución concurrente de los intents de un plan, con resultados en orden del plan."""
+
+    def __init__(self, pool: Executor, run_intent: Callable[[int, Any], Outcome], max_parallel: int):
+        self.pool = pool
+        self.run_intent = run_intent
+        self.max_parallel = max(1, max_parallel)
+        self.intents: List[Any] = []
+        self._accesses: List[Tuple[Set[str], Set[str]]] = []
+        self._pending_deps: Dict[int, Set[int]] = {}
+        self._waiting: List[int] = []
+        self._running = 0
+        self._outcomes: Dict[int, Outcome] = {}
+        self._lock = threading.Condition()
+        # Los intents heredan las contextvars (eventos, métricas) de quien crea el plan
+        self._context = contextvars.copy_context()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.intents)
+
+    def add(self, intent: Any):
+        """Registra el siguiente intent del plan y lo lanza si ya es ejecutable."""
+        access = intent_access(intent)
+        with self._lock:
+            index = len(self.intents)
+            self.intents.append(intent)
+            self._pending_deps[index] = {
+                previous for previous, other in enumerate(self._accesses)
+                if previous not in self._outcomes and conflicts(other, access)
+            }
+            self._accesses.append(access)
+            self._waiting.append(index)
+            self._pump()
+
+    def join(self) -> List[Outcome]:
+        """Espera a que terminen todos los intents añadidos y retorna sus resultados en orden."""
+        with self._lock:
+            while len(self._outcomes) < len(self.intents):
+                self._lock.wait()
+            return [self._outcomes[index] for index in range(len(self.intents))]
+
+    def _pump(self):
+        """Lanza los intents listos hasta el límite del plan. Requiere self._lock."""
+        for index in list(self._waiting):
+            if self._running >= self.max_parallel:
+                break
+            # (un callback síncrono anidado puede haberlo lanzado ya)
+            if index not in self._waiting or self._pending_deps[index]:
+                continue
+            self._waiting.remove(index)
+            self._running += 1
+            future = self.pool.submit(self._context.copy().run, self.run_intent, index, self.intents[index])
+            future.add_done_callback(lambda f, index=index: self._on_done(index, f))
+
+    def _on_done(self, index: int, future):
+        try:
+            outcome = future.result()
+        except Exception as e:
+            outcome = (None, str(e))
+        with self._lock:
+            self._outcomes[index] = outcome
+            self._running -= 1
+            for deps in self._pending_deps.values():
+                deps.discard(index)
+            self._pump()
+            self._lock.notify_all()
@@ -1,11 +1,15 @@
-from typing import Dict, Any, List
+import logging
+from typing import Dict, Any
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, SystemMessage
+from core.engines.deepagent.plan_execute import PlanExecuteEngine
 
-class LangGraphEngine:
-    def __init__(self, llm, tools):
-        self.llm = llm
-        self.tools = tools
+logger = logging.getLogger(__name__)
+
+class LangGraphEngine(PlanExecuteEngine):
+    """Motor DeepAgent sobre un StateGraph de LangGraph (plan -> execute)."""
+
+    def __init__(self, llm, tools, **options):
+        super().__init__(llm, tools, **options)
         self.graph = self._build_graph()
 
     def _build_graph(self):
@@ -23,101 +27,7 @@ class LangGraphEngine:
 
         return graph.compile()
 
-    def _plan(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Fase de planificación: El LLM decide qué acciones tomar.
-        Produce una lista de intents (no ejecuta nada aún).
-        """
-        goal = state["goal"]
-        context = state.get("context", {})
-        
-        # Verificar si es MockLLM (tiene método plan) o ChatOpenAI (necesita invoke)
-        if hasattr(self.llm, "plan"):
-            intents = self.llm.plan(goal, context)
-        else:
-            # Lógica para ChatOpenAI real
-            from langchain_core.messages import SystemMessage, HumanMessage
-            import json
-            
-            system_prompt = """Eres un asistente de IA experto. Tu objetivo es generar un plan de ejecución JSON para cumplir el objetivo del usuario.
-            Debes responder ÚNICAMENTE con un array JSON de objetos, donde cada objeto representa una acción (intent).
-            
-            Formatos de intents soportados:
-            1. {"intent": "read_file", "params": {"file_path": "/path/to/file"}}
-            2. {"intent": "write_file", "params": {"file_path": "/path/to/file", "content": "texto"}}
-            3. {"intent": "analyze", "params": {"content": "texto a analizar"}}
-            
-            Si el objetivo es una pregunta simple, usa un intent especial o responde directamente en el análisis.
-            Para este MVP, si es una pregunta de conocimiento general, genera un intent de tipo 'answer_question'.
-            Ejemplo: [{"intent": "answer_question", "params": {"question": "¿Cuál es la capital de Francia?", "answer": "París"}}]
-            """
-            
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"Objetivo: {goal}\nContexto: {context}")
-            ]
-            
-            response = self.llm.invoke(messages)
-            content = response.content.strip()
-            
-            # Limpiar bloques de código markdown si existen
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            try:
-                intents = json.loads(content)
-                if not isinstance(intents, list):
-                    # Si devuelve un solo objeto, envolver en lista
-                    intents = [intents]
-            except json.JSONDecodeError:
-                # Fallback simple si no devuelve JSON válido
-                intents = [{"intent": "answer_question", "params": {"question": goal, "answer": content}}]
-
-        return {"intents": intents}
-
-    def _execute(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Fase de ejecución: Itera sobre los intents y usa los proxies de herramientas.
-        """
-        results = []
-        warnings = []
-        errors = []
-        
-        for intent in state.get("intents", []):
-            try:
-                # self.tools es un objeto que maneja la ejecución segura (ToolProxy)
-                # Asumimos que tiene un método execute(intent_data)
-                result = self.tools.execute(intent)
-                results.append(f"Executed {intent.get('intent')}: {result}")
-            except Exception as e:
-                errors.append(str(e))
-                # Decidir si detener o continuar. Para MVP, registramos error y continuamos.
-        
-        return {
-            "steps": results,
-            "warnings": warnings,
-            "errors": errors,
-            "result": "Execution completed"
-        }
-
-    def run(self, goal: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Ejecuta el grafo con el objetivo dado.
-        """
+    def _invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
         # Invocar el grafo compilado
-        final_state = self.graph.invoke({
-            "goal": goal,
-            "context": context
-        })
-        
-        # Extraer resultados del estado final
         # Nota: LangGraph devuelve el estado final acumulado
-        return {
-            "steps": final_state.get("steps", []),
-            "warnings": final_state.get("warnings", []),
-            "errors": final_state.get("errors", []),
-            "result": final_state.get("result")
-        }
+        return self.graph.invoke(state)
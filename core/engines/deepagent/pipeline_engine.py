@@ -0,0 +1,19 @@
+"""
+Motor DeepAgent nativo: encadena plan -> execute con llamadas directas.
+
+Mismo contrato run(goal, context) y mismo comportamiento que LangGraphEngine, sin
+importar langgraph/langchain al arrancar ni fusionar estado del StateGraph en cada
+invocación. Se selecciona con DEEPAGENT_ENGINE=pipeline.
+"""
+
+from typing import Any, Dict
+
+from core.engines.deepagent.plan_execute import PlanExecuteEngine
+
+
+class PipelineEngine(PlanExecuteEngine):
+    """Pipeline lineal de dos pasos sin runtime de grafos."""
+
+    def _invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        planned = self._plan(state)
+        return self._execute(planned)
@@ -0,0 +1,342 @@
+"""
+Caché semántica de planes para el planificador de DeepAgent.
+
+Indexa objetivos ya planificados con MinHash sobre shingles (solo CPU, sin red) y
+reutiliza sus intents para objetivos casi idénticos, re-enlazando los "slots"
+(nombres de archivo y literales entre comillas) del objetivo nuevo.
+"""
+
+import copy
+import json
+import logging
+import os
+import random
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Nombres de archivo/rutas y literales entre comillas
+SLOT_PATTERN = re.compile(
+    r'"([^"]+)"|\'([^\']+)\'|«([^»]+)»|((?:[\w\-]+/)*[\w\-]+\.[A-Za-z0-9]{1,5})\b'
+)
+SLOT_PLACEHOLDER = "\x00slot\x00"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Verbos de acción equivalentes y palabras vacías: "lee X" ~ "analiza el archivo X"
+VERB_CLASSES = {
+    "leer": {"lee", "leer", "lea", "leeme", "analiza", "analizar", "analice", "revisa", "revisar",
+             "abre", "abrir", "muestra", "mostrar", "muestrame", "read"},
+    "crear": {"crea", "crear", "cree", "creame", "genera", "generar", "escribe", "escribir",
+              "guarda", "guardar", "write", "create"},
+    "inspeccionar": {"inspecciona", "inspeccionar", "descomprime", "descomprimir", "extrae",
+                     "extraer", "unzip", "lista", "listar"},
+}
+_VERB_CANONICAL = {word: canonical for canonical, words in VERB_CLASSES.items() for word in words}
+STOPWORDS = {
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "al", "a", "en",
+    "por", "favor", "me", "mi", "archivo", "fichero", "documento", "que", "y", "the", "file"
+}
+
+# Intents cuyo contenido depende del texto completo del objetivo: nunca se reutilizan
+NON_REUSABLE_INTENTS = {"answer_question", "analyze"}
+
+
+def extract_slots(objective: str) -> Tuple[str, List[str]]:
+    """
+    Separa un objetivo en plantilla + slots.
+
+    Returns:
+        Tuple[str, List[str]]: (plantilla con marcadores, valores de los slots en orden)
+    """
+    slots = []
+
+    def _replace(match):
+        slots.append(next(group for group in match.groups() if group))
+        return " <slot> "
+
+    template = SLOT_PATTERN.sub(_replace, objective)
+    return template, slots
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", re.sub(r"[^\w<> ]", " ", text)).strip()
+
+
+def shingles(template: str) -> Set[str]:
+    """Unigramas y bigramas de la plantilla normalizada (verbos canónicos, sin palabras vacías)."""
+    words = [
+        _VERB_CANONICAL.get(word, word)
+        for word in _normalize(template).split()
+        if word not in STOPWORDS
+    ]
+    result = set(words)
+    result.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return result
+
+
+def is_grounded(intents: List[Dict[str, Any]], objective: str) -> bool:
+    """
+    Comprueba que todos los parámetros de texto de los intents aparecen en el objetivo.
+    Evita reutilizar literales del objetivo original (p. ej. el contenido de un archivo).
+    """
+    normalized_objective = _normalize(objective.replace(".", " "))
+
+    def _leaves(value):
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from _leaves(item)
+        elif isinstance(value, list):
+            for item in value:
+                yield from _leaves(item)
+
+    for intent in intents:
+        for leaf in _leaves(intent.get("params", {})):
+            normalized_leaf = _normalize(leaf.replace(".", " "))
+            if normalized_leaf and f" {normalized_leaf} " not in f" {normalized_objective} ":
+                return False
+    return True
+
+
+@dataclass
+class _Entry:
+    """Plan cacheado para un objetivo."""
+    entry_id: int
+    objective: str
+    context_key: str
+    slots: List[str]
+    shingles: Set[str]
+    signature: Tuple[int, ...]
+    intents: List[Dict[str, Any]]
+
+
+class SemanticPlanCache:
+    """
+    Índice MinHash + LSH de objetivos planificados.
+
+    - lookup(): busca un objetivo similar (Jaccard >= threshold) con el mismo
+      contexto y el mismo número de slots, y retorna sus intents re-enlazados.
+    - store(): guarda los intents que devolvió el LLM para un objetivo.
+    - verify_rate: fracción de aciertos que se re-planifican con el LLM para medir
+      reutilizaciones incorrectas (false_reuse).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        max_entries: int = 2048,
+        num_perm: int = 64,
+        bands: int = 16,
+        verify_rate: float = 0.0,
+        enabled: bool = True
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.verify_rate = verify_rate
+        self.enabled = enabled
+
+        rng = random.Random(1337)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[int, ...], Set[int]]] = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats_counters = {
+            "lookups": 0, "hits": 0, "misses": 0, "ungrounded": 0, "stores": 0,
+            "verified": 0, "false_reuse": 0
+        }
+
+    @classmethod
+    def from_env(cls) -> "SemanticPlanCache":
+        """Crea la caché con la configuración de variables de entorno."""
+        return cls(
+            threshold=float(os.getenv("PLAN_CACHE_THRESHOLD", 0.8)),
+            max_entries=int(os.getenv("PLAN_CACHE_MAX_ENTRIES", 2048)),
+            verify_rate=float(os.getenv("PLAN_CACHE_VERIFY_RATE", 0.0)),
+            enabled=os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+        )
+
+    # --- API -----------------------------------------------------------
+
+    def lookup(self, objective: str, context: Dict[str, Any] = None) -> Optional[List[Dict[str, Any]]]:
+        """Retorna intents re-enlazados de un objetivo similar, o None."""
+        if not self.enabled:
+            return None
+        template, slots = extract_slots(objective)
+        query_shingles = shingles(template)
+        signature = self._signature(query_shingles)
+        context_key = self._context_key(context)
+
+        with self._lock:
+            self.stats_counters["lookups"] += 1
+            best, best_score = None, 0.0
+            for entry_id in self._candidates(signature):
+                entry = self._entries[entry_id]
+                if entry.context_key != context_key or len(entry.slots) != len(slots):
+                    continue
+                score = self._jaccard(query_shingles, entry.shingles)
+                if score >= self.threshold and score > best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self.stats_counters["misses"] += 1
+                return None
+
+        intents = self._rebind(best.intents, best.slots, slots)
+        with self._lock:
+            if not is_grounded(intents, objective):
+                self.stats_counters["misses"] += 1
+                self.stats_counters["ungrounded"] += 1
+                return None
+            self.stats_counters["hits"] += 1
+            if best.entry_id in self._entries:
+                self._entries.move_to_end(best.entry_id)
+
+        logger.info(f"[PlanCache] Reutilizando plan de '{best.objective}' (similitud {best_score:.2f})")
+        return intents
+
+    def store(self, objective: str, context: Dict[str, Any], intents: List[Dict[str, Any]]):
+        """Indexa los intents planificados para un objetivo (si son reutilizables)."""
+        if not self.enabled or not self.is_reusable(intents) or not is_grounded(intents, objective):
+            return
+        template, slots = extract_slots(objective)
+        entry_shingles = shingles(template)
+        signature = self._signature(entry_shingles)
+
+        with self._lock:
+            entry = _Entry(
+                entry_id=self._next_id,
+                objective=objective,
+                context_key=self._context_key(context),
+                slots=slots,
+                shingles=entry_shingles,
+                signature=signature,
+                intents=copy.deepcopy(intents)
+            )
+            self._next_id += 1
+            self._entries[entry.entry_id] = entry
+            for band, band_key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(band_key, set()).add(entry.entry_id)
+            self.stats_counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def should_verify(self) -> bool:
+        """Decide si un acierto debe verificarse contra el LLM (muestreo)."""
+        return self.verify_rate > 0 and random.random() < self.verify_rate
+
+    def record_verification(self, cached: List[Dict[str, Any]], fresh: List[Dict[str, Any]]):
+        """Compara un plan reutilizado con el generado por el LLM."""
+        same = self._canonical(cached) == self._canonical(fresh)
+        with self._lock:
+            self.stats_counters["verified"] += 1
+            if not same:
+                self.stats_counters["false_reuse"] += 1
+        if not same:
+            logger.warning("[PlanCache] Reutilización incorrecta detectada en verificación")
+
+    def stats(self) -> Dict[str, Any]:
+        """Tasa de aciertos y de reutilización incorrecta."""
+        with self._lock:
+            counters = dict(self.stats_counters)
+            counters["entries"] = len(self._entries)
+        lookups = counters["lookups"]
+        verified = counters["verified"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        counters["false_reuse_rate"] = counters["false_reuse"] / verified if verified else 0.0
+        counters["threshold"] = self.threshold
+        return counters
+
+    @staticmethod
+    def is_reusable(intents: List[Dict[str, Any]]) -> bool:
+        """Un plan es reutilizable si no está vacío y no depende del texto libre del objetivo."""
+        if not intents or not isinstance(intents, list):
+            return False
+        for intent in intents:
+            if not isinstance(intent, dict):
+                return False
+            if (intent.get("intent") or intent.get("name")) in NON_REUSABLE_INTENTS:
+                return False
+        return True
+
+    # --- Internos ------------------------------------------------------
+
+    def _signature(self, items: Set[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(item.encode("utf-8")) for item in items] or [0]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows]
+
+    def _candidates(self, signature: Tuple[int, ...]) -> Set[int]:
+        """Entradas que comparten al menos una banda LSH. Requiere self._lock."""
+        candidates: Set[int] = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates |= self._buckets[band].get(band_key, set())
+        return candidates
+
+    def _evict(self, entry_id: int):
+        """Elimina una entrada del índice. Requiere self._lock."""
+        entry = self._entries.pop(entry_id)
+        for band, band_key in enumerate(self._band_keys(entry.signature)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    @staticmethod
+    def _jaccard(a: Set[str], b: Set[str]) -> float:
+        union = len(a | b)
+        return len(a & b) / union if union else 1.0
+
+    @staticmethod
+    def _context_key(context: Dict[str, Any] = None) -> str:
+        return json.dumps(context or {}, sort_keys=True, default=str)
+
+    @staticmethod
+    def _canonical(intents: List[Dict[str, Any]]) -> str:
+        return json.dumps(intents, sort_keys=True, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _rebind(intents: List[Dict[str, Any]], old_slots: List[str], new_slots: List[str]) -> List[Dict[str, Any]]:
+        """Sustituye los valores de los slots del objetivo cacheado por los del nuevo."""
+        mapping = [(old, new) for old, new in zip(old_slots, new_slots) if old != new]
+
+        def _bind(value):
+            if isinstance(value, str):
+                # Dos pasadas para no encadenar sustituciones (a->b, b->c)
+                for index, (old, _) in enumerate(mapping):
+                    value = value.replace(old, f"{SLOT_PLACEHOLDER}{index}{SLOT_PLACEHOLDER}")
+                for index, (_, new) in enumerate(mapping):
+                    value = value.replace(f"{SLOT_PLACEHOLDER}{index}{SLOT_PLACEHOLDER}", new)
+                return value
+            if isinstance(value, dict):
+                return {key: _bind(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [_bind(item) for item in value]
+            return value
+
+        return _bind(copy.deepcopy(intents))
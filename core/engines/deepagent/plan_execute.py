@@ -0,0 +1,535 @@
+"""
+Motor plan-and-execute de DeepAgent (independiente del runtime de orquestación).
+
+Contiene los dos pasos del agente (planificar con el LLM y ejecutar los intents) y
+la lógica común: cachés de planes, vía rápida de preguntas, ejecución concurrente
+e incremental de intents. Las subclases solo deciden cómo encadenar los pasos:
+LangGraphEngine mediante un StateGraph y PipelineEngine con llamadas directas.
+"""
+
+import json
+import os
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Any, List, Optional
+from core.deadline import current_deadline
+from core.events import emit
+from core.incremental_json import IncrementalArrayParser
+from core.llm_cache import get_llm_cache
+from core.engines.deepagent.checkpoint import ExecutionJournal, ExecutionNotFound
+from core.engines.deepagent.intent_scheduler import IntentScheduler, Outcome
+from core.engines.deepagent.plan_cache import SemanticPlanCache
+from core.engines.deepagent.question_fastpath import is_plain_question
+from core.engines.deepagent.tool_calls import planner_tool_definitions, tool_calls_to_intents
+from core.llm_resilience import CircuitOpenError
+from core.mock_llm import MockLLM
+from core.rate_governor import estimate_tokens
+from core.request_metrics import record
+from tools.question_tool import SYSTEM_PROMPT as QUESTION_SYSTEM_PROMPT, is_error_answer
+
+logger = logging.getLogger(__name__)
+
+class PlanExecuteEngine(ABC):
+    SYSTEM_PROMPT = """Eres un asistente de IA experto. Tu objetivo es generar un plan de ejecución JSON para cumplir el objetivo del usuario.
+            Debes responder ÚNICAMENTE con un array JSON de objetos, donde cada objeto representa una acción (intent).
+            
+            Formatos de intents soportados:
+            1. {"intent": "read_file", "params": {"file_path": "/path/to/file"}}
+            2. {"intent": "write_file", "params": {"file_path": "/path/to/file", "content": "texto"}}
+            3. {"intent": "analyze", "params": {"content": "texto a analizar"}}
+            
+            Si el objetivo es una pregunta simple, usa un intent especial o responde directamente en el análisis.
+            Para este MVP, si es una pregunta de conocimiento general, genera un intent de tipo 'answer_question'.
+            Ejemplo: [{"intent": "answer_question", "params": {"question": "¿Cuál es la capital de Francia?", "answer": "París"}}]
+            """
+
+    # Planner por function calling: el formato lo definen los esquemas de herramientas
+    TOOLS_PROMPT = """Eres un asistente de IA experto. Cumple el objetivo del usuario llamando a las herramientas disponibles, en el orden en que deben ejecutarse.
+            Si el objetivo es una pregunta de conocimiento general, responde directamente sin llamar a herramientas."""
+
+    # Prompt de sistema de QuestionTool (para estimar los tokens ahorrados)
+    QUESTION_PROMPT = QUESTION_SYSTEM_PROMPT
+
+    def __init__(self, llm, tools, cache_plans: bool = True, plan_cache: SemanticPlanCache = None,
+                 question_fastpath: bool = None, reuse_answers: bool = None,
+                 max_parallel_intents: int = None, tool_workers: int = None, stream_plans: bool = None,
+                 journal: ExecutionJournal = None, planner_mode: str = None,
+                 tool_definitions: List[Dict[str, Any]] = None,
+                 memory_context: Callable[[str], str] = None):
+        self.llm = llm
+        self.tools = tools
+        # Reutilizar planes de prompts idénticos desde la caché LLM
+        self.cache_plans = cache_plans
+        # Reutilizar planes de objetivos casi idénticos (índice MinHash local)
+        self.plan_cache = plan_cache or SemanticPlanCache.from_env()
+        # Preguntas puras: una sola llamada LLM (sin plan) y reutilizar la respuesta del planner
+        if question_fastpath is None:
+            question_fastpath = os.getenv("DEEPAGENT_QUESTION_FASTPATH", "true").lower() == "true"
+        if reuse_answers is None:
+            reuse_answers = os.getenv("DEEPAGENT_REUSE_ANSWERS", "true").lower() == "true"
+        self.question_fastpath = question_fastpath
+        self.reuse_answers = reuse_answers
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "question_fastpath": 0, "answers_reused": 0, "plans_resumed": 0, "intents_resumed": 0,
+            "llm_calls_saved": 0, "tokens_saved_estimate": 0
+        }
+        # Intents sin conflicto de rutas se ejecutan en paralelo sobre un pool compartido;
+        # cada plan puede ocupar como máximo max_parallel_intents workers
+        self.max_parallel_intents = max_parallel_intents or int(os.getenv("DEEPAGENT_MAX_PARALLEL_INTENTS", 4))
+        self.tool_workers = tool_workers or int(os.getenv("DEEPAGENT_TOOL_WORKERS", 16))
+        self._tool_pool = ThreadPoolExecutor(max_workers=self.tool_workers, thread_name_prefix="codi-intent")
+        # Planner en streaming: cada intent se ejecuta en cuanto el LLM termina de generarlo
+        if stream_plans is None:
+            stream_plans = os.getenv("DEEPAGENT_STREAM_PLAN", "true").lower() == "true"
+        self.stream_plans = stream_plans
+        # Checkpoints por execution_id (plan y resultado de cada intent) para reanudar
+        self.journal = journal if journal is not None else ExecutionJournal.from_env()
+        # Planner: 'json' (array JSON libre en el texto) o 'tools' (function calling nativo
+        # con los esquemas del ToolManager; sin streaming ni errores de parseo del texto)
+        self.planner_mode = (planner_mode or os.getenv("DEEPAGENT_PLANNER_MODE", "json")).lower()
+        self.planner_tools = planner_tool_definitions(tool_definitions) if self.planner_mode == "tools" else []
+        # objetivo -> bloque de experiencia previa relevante para el prompt del planner
+        self.memory_context = memory_context
+        self._planner_stats = {
+            mode: {"plans": 0, "llm_calls": 0, "parse_failures": 0, "invalid_tool_calls": 0,
+                   "prompt_tokens": 0, "completion_tokens": 0}
+            for mode in ("json", "tools")
+        }
+
+    @property
+    def planner_prompt(self) -> str:
+        """Prompt de sistema del planner según el modo."""
+        return self.TOOLS_PROMPT if self.planner_mode == "tools" else self.SYSTEM_PROMPT
+
+    def _plan(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fase de planificación con checkpoint: al reanudar se usa el plan guardado
+        (sin llamar al LLM); si no, se planifica y se guarda el plan en el journal.
+        """
+        checkpoint = state.get("checkpoint") or {}
+        if checkpoint.get("intents") is not None:
+            intents = checkpoint["intents"]
+            emit("plan", intents=intents, resumed=True, completed=len(checkpoint.get("completed") or {}))
+            return {"intents": intents, "checkpoint": checkpoint}
+
+        planned = self._plan_intents(state)
+        if self.journal is not None and checkpoint.get("execution_id"):
+            self.journal.save_plan(checkpoint["execution_id"], planned["intents"])
+        return {**planned, "checkpoint": checkpoint}
+
+    def _plan_intents(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fase de planificación: El LLM decide qué acciones tomar.
+        Produce una lista de intents (no ejecuta nada aún).
+        """
+        goal = state["goal"]
+        context = state.get("context", {})
+        
+        # Verificar si es MockLLM (tiene método plan) o ChatOpenAI (necesita invoke)
+        if hasattr(self.llm, "plan"):
+            intents = self._normalize_intents(self.llm.plan(goal, context))
+        else:
+            # Caché semántica: objetivos casi idénticos reutilizan el plan sin llamar al LLM
+            cached_intents = self.plan_cache.lookup(goal, context)
+            if cached_intents is not None and not self.plan_cache.should_verify():
+                emit("plan", intents=cached_intents, cached=True)
+                return {"intents": cached_intents}
+
+            # Lógica para LLM real (GatewayChatModel o chat model de LangChain)
+            use_tools = self.planner_mode == "tools"
+            messages = [
+                {"role": "system", "content": self.planner_prompt},
+                {"role": "user", "content": f"Objetivo: {goal}\nContexto: {context}"}
+            ]
+            
+            # La clave de caché no incluye la experiencia previa de la memoria: el bloque
+            # cambia con cada ejecución guardada y anularía los aciertos. Se recupera
+            # (y se añade al prompt) solo cuando hay que llamar al LLM.
+            cache = get_llm_cache()
+            key = cache.make_key(
+                getattr(self.llm, "model_name", type(self.llm).__name__),
+                messages,
+                getattr(self.llm, "temperature", None),
+                None,
+                **({"tools": self.planner_tools} if use_tools else {})
+            )
+            # Con streaming, los intents se lanzan mientras el LLM sigue generando el plan
+            scheduler = self._new_scheduler(state.get("checkpoint")) \
+                if self.stream_plans and not use_tools and hasattr(self.llm, "stream") else None
+            try:
+                if use_tools:
+                    call = lambda: self._plan_with_tools(self._with_experience(messages, goal), goal)
+                elif scheduler is not None:
+                    call = lambda: self._stream_plan(self._with_experience(messages, goal), scheduler)
+                else:
+                    call = lambda: self._invoke_planner(self._with_experience(messages, goal))
+                content = cache.get_or_call(key, call, use_cache=self.cache_plans).strip()
+            except CircuitOpenError as e:
+                # Proveedor degradado: fallo rápido al planner determinista
+                logger.warning(f"[{type(self).__name__}] {e}. Fallback a MockLLM")
+                intents = self._normalize_intents(MockLLM().plan(goal, context))
+                emit("plan", intents=intents, fallback="mock")
+                return {"intents": intents}
+            except Exception:
+                # No abandonar intents ya lanzados antes de propagar el error
+                if scheduler is not None:
+                    scheduler.join()
+                raise
+            
+            # Limpiar bloques de código markdown si existen
+            if content.startswith("```json"):
+                content = content[7:]
+            if content.endswith("```"):
+                content = content[:-3]
+            content = content.strip()
+            
+            try:
+                intents = json.loads(content)
+                if not isinstance(intents, list):
+                    # Si devuelve un solo objeto, envolver en lista
+                    intents = [intents]
+                if cached_intents is not None:
+                    self.plan_cache.record_verification(cached_intents, intents)
+                else:
+                    self.plan_cache.store(goal, context, intents)
+            except json.JSONDecodeError:
+                # Fallback simple si no devuelve JSON válido
+                intents = [{"intent": "answer_question", "params": {"question": goal, "answer": content}}]
+                self._count_plan(self.planner_mode, parse_failures=1)
+            self._count_plan(self.planner_mode, plans=1)
+
+            if scheduler is not None and len(scheduler):
+                # Los intents ya lanzados en streaming no se pueden deshacer: prevalecen
+                # sobre el resultado del parseo completo (que solo puede añadir intents)
+                started = scheduler.intents
+                if intents[:len(started)] != started:
+                    intents = list(started)
+                emit("plan", intents=intents, streamed=len(started))
+                return {"intents": intents, "scheduler": scheduler}
+
+        emit("plan", intents=intents)
+        return {"intents": intents}
+
+    def _with_experience(self, messages: List[Dict[str, Any]], goal: str) -> List[Dict[str, Any]]:
+        """Mensajes del planner con el bloque de experiencia previa tras el prompt de sistema."""
+        experience = self._memory_block(goal)
+        if not experience:
+            return messages
+        return messages[:1] + [{"role": "system", "content": experience}] + messages[1:]
+
+    def _memory_block(self, goal: str) -> str:
+        """Experiencia previa relevante para el objetivo ('' si no hay o falla la memoria)."""
+        if self.memory_context is None:
+            return ""
+        try:
+            return self.memory_context(goal)
+        except Exception as e:
+            logger.warning(f"[{type(self).__name__}] No se pudo recuperar la experiencia previa: {e}")
+            return ""
+
+    def _stream_plan(self, messages: List[Any], scheduler: IntentScheduler) -> str:
+        """
+        Genera el plan en streaming: cada intent del array JSON se entrega al
+        planificador de ejecución en cuanto se cierra. Retorna el texto completo.
+        """
+        parser = IncrementalArrayParser()
+        for delta in self.llm.stream(messages):
+            for intent in parser.feed(delta):
+                if isinstance(intent, dict):
+                    emit("intent_planned", index=len(scheduler), intent=intent)
+                    scheduler.add(intent)
+        self._count_planner_call("json", messages, parser.text)
+        return parser.text
+
+    def _invoke_planner(self, messages: List[Any]) -> str:
+        """Planner JSON sin streaming: retorna el texto de la respuesta."""
+        response = self.llm.invoke(messages)
+        self._count_planner_call("json", messages, response.content, getattr(response, "usage", None))
+        return response.content
+
+    def _plan_with_tools(self, messages: List[Any], goal: str) -> str:
+        """
+        Planner por function calling: las llamadas a herramientas del modelo se
+        traducen a intents. Sin llamadas, el texto es la respuesta a una pregunta.
+        Retorna el plan serializado como array JSON (cacheable como el modo JSON).
+        """
+        response = self.llm.invoke(messages, tools=self.planner_tools)
+        tool_calls = getattr(response, "tool_calls", None) or []
+        intents, failures = tool_calls_to_intents(tool_calls)
+        if not tool_calls and response.content:
+            intents = [{"intent": "answer_question", "params": {"question": goal, "answer": response.content}}]
+        output = response.content + "".join(str(call.get("arguments") or "") for call in tool_calls)
+        self._count_planner_call("tools", messages, output, getattr(response, "usage", None),
+                                 definitions=self.planner_tools)
+        if failures:
+            self._count_plan("tools", parse_failures=1, invalid_tool_calls=failures)
+        return json.dumps(intents, ensure_ascii=False)
+
+    def _count_planner_call(self, mode: str, messages: List[Any], output: str, usage: Dict[str, int] = None,
+                            definitions: List[Dict[str, Any]] = None):
+        """
+        Tokens de una llamada al planner: los reportados por el proveedor o, si no
+        los hay (streaming), una estimación que incluye los esquemas de herramientas.
+        """
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        else:
+            schemas = [{"content": json.dumps(definitions, ensure_ascii=False)}] if definitions else []
+            prompt_tokens = estimate_tokens(list(messages) + schemas, max_tokens=0)
+            completion_tokens = len(output or "") // 4
+        self._count_plan(mode, llm_calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def _count_plan(self, mode: str, **deltas: int):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self._planner_stats[mode][name] += delta
+        if deltas.get("parse_failures"):
+            record(planner_parse_failures=deltas["parse_failures"])
+
+    @staticmethod
+    def _normalize_intents(plan: Any) -> List[Dict[str, Any]]:
+        """
+        Normaliza la salida de planners tipo MockLLM ({"intents": [{"name": ...}]})
+        al formato del motor: lista de {"intent": ..., "params": ...}.
+        """
+        if isinstance(plan, dict):
+            plan = plan.get("intents", [])
+        intents = []
+        for intent in plan or []:
+            if isinstance(intent, dict) and "intent" not in intent and "name" in intent:
+                intent = {"intent": intent["name"], "params": intent.get("params", {})}
+            intents.append(intent)
+        return intents
+
+    def _execute(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fase de ejecución: ejecuta los intents usando los proxies de herramientas.
+        Los intents sin conflicto de lectura/escritura sobre las mismas rutas se
+        ejecutan en paralelo; los pasos se reportan siempre en el orden del plan.
+        Si el planner ya lanzó intents en streaming, se continúa su planificador.
+        """
+        intents = state.get("intents", [])
+        checkpoint = state.get("checkpoint") or {}
+        scheduler: Optional[IntentScheduler] = state.get("scheduler")
+
+        if scheduler is None and (self.max_parallel_intents <= 1 or len(intents) <= 1):
+            outcomes = [self._run_checkpointed(checkpoint, index, intent) for index, intent in enumerate(intents)]
+        else:
+            scheduler = scheduler or self._new_scheduler(checkpoint)
+            for intent in intents[len(scheduler):]:
+                scheduler.add(intent)
+            outcomes = scheduler.join()
+
+        result = {
+            "steps": [step for step, _ in outcomes if step is not None],
+            "warnings": [],
+            "errors": [error for _, error in outcomes if error is not None],
+            "result": "Execution completed"
+        }
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            # Los pasos completados se conservan; los intents no iniciados se reanudan con resume()
+            result["result"] = "Execution cancelled"
+            result["cancelled"] = deadline.reason
+        return result
+
+    def _new_scheduler(self, checkpoint: Dict[str, Any] = None) -> IntentScheduler:
+        """Planificador de intents de un plan sobre el pool compartido de herramientas."""
+        return IntentScheduler(
+            self._tool_pool, partial(self._run_checkpointed, checkpoint or {}), self.max_parallel_intents
+        )
+
+    def _run_checkpointed(self, checkpoint: Dict[str, Any], index: int, intent: Any) -> Outcome:
+        """
+        Ejecuta un intent registrando su resultado en el journal. Al reanudar, los
+        intents que ya terminaron con éxito no se repiten: se reutiliza su paso.
+        """
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            # No se registra en el journal: al reanudar se ejecuta
+            emit("intent_result", index=index, intent=intent, status="cancelled", error=deadline.reason)
+            return None, f"Cancelado: {deadline.reason}"
+
+        completed = checkpoint.get("completed") or {}
+        if index in completed:
+            emit("intent_result", index=index, intent=intent, status="success",
+                 result=completed[index], duration_seconds=0.0, resumed=True)
+            with self._stats_lock:
+                self._stats["intents_resumed"] += 1
+            record(intents_resumed=1)
+            return completed[index], None
+
+        outcome = self._run_intent(index, intent)
+        execution_id = checkpoint.get("execution_id")
+        if self.journal is not None and execution_id:
+            self.journal.save_result(execution_id, index, intent, *outcome)
+        return outcome
+
+    def _run_intent(self, index: int, intent: Any) -> Outcome:
+        """Ejecuta un intent. Retorna (paso, error); uno de los dos es None."""
+        emit("intent_start", index=index, intent=intent)
+        started = time.monotonic()
+        try:
+            reused = self._reusable_answer(intent)
+            if reused is not None:
+                # El planner ya respondió: evitar la segunda llamada LLM de QuestionTool
+                result = reused
+            else:
+                # self.tools es un objeto que maneja la ejecución segura (ToolProxy)
+                # Asumimos que tiene un método execute(intent_data)
+                result = self.tools.execute(intent)
+            emit("intent_result", index=index, intent=intent, status="success",
+                 result=result, duration_seconds=time.monotonic() - started,
+                 reused_answer=reused is not None)
+            intent_name = intent.get("intent") if isinstance(intent, dict) else intent
+            return f"Executed {intent_name}: {result}", None
+        except Exception as e:
+            emit("intent_result", index=index, intent=intent, status="error",
+                 error=str(e), duration_seconds=time.monotonic() - started)
+            # Para MVP, registramos el error y continuamos con el resto de intents
+            return None, str(e)
+
+    def _reusable_answer(self, intent: Any) -> Any:
+        """Respuesta ya incluida por el planner en un intent answer_question (o None)."""
+        if not self.reuse_answers or not isinstance(intent, dict) or intent.get("intent") != "answer_question":
+            return None
+        params = intent.get("params") or {}
+        answer = params.get("answer")
+        if not isinstance(answer, str) or not answer.strip():
+            return None
+        # Tokens de la llamada a QuestionTool que se evita
+        saved = estimate_tokens(
+            [{"content": self.QUESTION_PROMPT}, {"content": params.get("question") or ""}],
+            max_tokens=len(answer) // 4 + 1
+        )
+        self._record_savings(saved, answers_reused=1)
+        return answer
+
+    def _record_savings(self, tokens: int, **counters: int):
+        """Acumula el ahorro en las métricas del motor y en las de la petición en curso."""
+        with self._stats_lock:
+            for name, delta in counters.items():
+                self._stats[name] += delta
+            self._stats["llm_calls_saved"] += 1
+            self._stats["tokens_saved_estimate"] += tokens
+        record(llm_calls_saved=1, tokens_saved_estimate=tokens, **counters)
+
+    def _answer_directly(self, goal: str, context: Dict[str, Any], checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+        """Vía rápida: responde una pregunta pura con una sola llamada, sin planificar."""
+        intents = [{"intent": "answer_question", "params": {"question": goal}}]
+        emit("plan", intents=intents, fastpath=True)
+        if self.journal is not None and checkpoint.get("execution_id"):
+            self.journal.save_plan(checkpoint["execution_id"], intents)
+        state = self._execute({"goal": goal, "context": context, "intents": intents, "checkpoint": checkpoint})
+        # Paso "Executed answer_question: <respuesta>"; QuestionTool convierte los fallos
+        # del proveedor en un texto de error que no es una respuesta ni un ahorro
+        answer = str(state["steps"][0]).partition(": ")[2] if state["steps"] else ""
+        if not state["errors"] and answer and not is_error_answer(answer):
+            # Se omite la llamada de planificación (prompt de sistema + objetivo + respuesta)
+            saved = estimate_tokens(
+                [{"content": self.planner_prompt}, {"content": f"Objetivo: {goal}\nContexto: {context}"}],
+                max_tokens=len(answer) // 4 + 1
+            )
+            self._record_savings(saved, question_fastpath=1)
+        return state
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas del motor (planner, caché de planes, vía rápida de preguntas y reanudaciones)."""
+        with self._stats_lock:
+            savings = dict(self._stats)
+            planner = {mode: dict(stats) for mode, stats in self._planner_stats.items()}
+        for stats in planner.values():
+            stats["parse_failure_rate"] = stats["parse_failures"] / stats["plans"] if stats["plans"] else 0.0
+            stats["tokens_per_plan"] = (
+                (stats["prompt_tokens"] + stats["completion_tokens"]) / stats["llm_calls"]
+                if stats["llm_calls"] else 0.0
+            )
+        return {
+            "planner": {"mode": self.planner_mode, **planner},
+            "plan_cache": self.plan_cache.stats(),
+            "question_fastpath": {
+                "enabled": self.question_fastpath,
+                "reuse_answers": self.reuse_answers,
+                **savings
+            },
+            "journal": self.journal.stats() if self.journal is not None else None
+        }
+
+    @abstractmethod
+    def _invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Encadena plan -> execute y retorna el estado final (lo implementa cada motor)."""
+
+    def run(self, goal: str, context: Dict[str, Any], execution_id: str = None) -> Dict[str, Any]:
+        """
+        Ejecuta el agente con el objetivo dado (contrato de DeepAgentEngine).
+        Con execution_id, el plan y los resultados se guardan en el journal.
+        """
+        checkpoint = {"execution_id": execution_id} if execution_id else {}
+        if self.journal is not None and execution_id:
+            self.journal.start(execution_id, goal, context)
+
+        # Preguntas puras: sin plan, una sola llamada LLM (solo con LLM real)
+        if self.question_fastpath and not hasattr(self.llm, "plan") and is_plain_question(goal):
+            final_state = self._answer_directly(goal, context, checkpoint)
+        else:
+            final_state = self._invoke({
+                "goal": goal,
+                "context": context,
+                "checkpoint": checkpoint
+            })
+        return self._result(checkpoint, final_state)
+
+    def resume(self, execution_id: str) -> Dict[str, Any]:
+        """
+        Reanuda una ejecución desde su checkpoint: reutiliza el plan guardado (sin
+        llamada al planner) y solo ejecuta los intents que no terminaron con éxito.
+
+        Raises:
+            ExecutionNotFound: Si la ejecución no está en el journal
+        """
+        saved = self.journal.load(execution_id) if self.journal is not None else None
+        if saved is None:
+            raise ExecutionNotFound(f"Ejecución no encontrada: {execution_id}")
+        if saved["intents"] is None:
+            # Falló antes de tener plan: no hay nada que reutilizar
+            return self.run(saved["goal"], saved["context"], execution_id=execution_id)
+
+        logger.info(
+            f"[{type(self).__name__}] Reanudando {execution_id}: "
+            f"{len(saved['completed'])}/{len(saved['intents'])} intents completados"
+        )
+        self.journal.start(execution_id, saved["goal"], saved["context"])
+        if not hasattr(self.llm, "plan"):
+            # Se omite la llamada de planificación
+            saved_tokens = estimate_tokens(
+                [{"content": self.planner_prompt}, {"content": saved["goal"]}],
+                max_tokens=len(json.dumps(saved["intents"], default=str)) // 4 + 1
+            )
+            self._record_savings(saved_tokens, plans_resumed=1)
+        final_state = self._invoke({
+            "goal": saved["goal"],
+            "context": saved["context"],
+            "checkpoint": saved
+        })
+        return self._result(saved, final_state)
+
+    def _result(self, checkpoint: Dict[str, Any], final_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Extrae el resultado del estado final y cierra el checkpoint."""
+        result = {
+            "steps": final_state.get("steps", []),
+            "warnings": final_state.get("warnings", []),
+            "errors": final_state.get("errors", []),
+            "result": final_state.get("result")
+        }
+        if final_state.get("cancelled"):
+            result["cancelled"] = final_state["cancelled"]
+        execution_id = checkpoint.get("execution_id")
+        if self.journal is not None and execution_id:
+            status = "cancelled" if result.get("cancelled") else "failed" if result["errors"] else "success"
+            self.journal.finish(execution_id, status)
+        return result
@@ -0,0 +1,53 @@
+"""
+Vía rápida para preguntas de conocimiento general en DeepAgent.
+
+Un objetivo que es solo una pregunta (sin archivos, rutas ni verbos de acción)
+no necesita plan: se responde con una única llamada a QuestionTool en lugar de
+planificar (1ª llamada LLM) y luego ejecutar answer_question (2ª llamada LLM).
+"""
+
+import re
+import unicodedata
+
+# Palabras interrogativas / de petición de explicación al inicio del objetivo
+INTERROGATIVES = {
+    "que", "cual", "cuales", "quien", "quienes", "como", "cuando", "donde", "por",
+    "cuanto", "cuanta", "cuantos", "cuantas", "explica", "explicame", "define",
+    "defineme", "describe", "dime", "what", "who", "whom", "which", "how", "why",
+    "when", "where", "explain", "is", "are", "can", "does", "do"
+}
+
+# Señales de que el objetivo requiere herramientas (no es una pregunta pura)
+ACTION_WORDS = {
+    "crea", "crear", "creame", "genera", "generar", "escribe", "escribir", "guarda",
+    "guardar", "lee", "leer", "leeme", "abre", "abrir", "borra", "borrar", "elimina",
+    "analiza", "analizar", "revisa", "descomprime", "descomprimir", "extrae", "extraer",
+    "inspecciona", "archivo", "archivos", "fichero", "carpeta", "directorio", "zip",
+    "create", "write", "read", "save", "delete", "open", "unzip", "extract", "file", "folder"
+}
+
+# Nombres de archivo (nombre.ext) y rutas
+PATH_PATTERN = re.compile(r"(?:^|\s)[\w\-.]*/|\b[\w\-]+\.[A-Za-z0-9]{1,5}\b")
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def is_plain_question(objective: str) -> bool:
+    """
+    Clasifica un objetivo como pregunta pura (respondible sin herramientas).
+    Es conservador: ante cualquier señal de archivo o acción retorna False.
+    """
+    if not objective or not objective.strip():
+        return False
+    if PATH_PATTERN.search(objective):
+        return False
+
+    normalized = _normalize(objective)
+    words = re.findall(r"\w+", normalized)
+    if not words or ACTION_WORDS.intersection(words):
+        return False
+
+    return "?" in objective or words[0] in INTERROGATIVES
@@ -0,0 +1,78 @@
+"""
+Planner de DeepAgent por function calling nativo.
+
+Las definiciones de herramientas registradas en tools.tool_manager se envían al
+modelo como funciones; cada llamada a herramienta que devuelve se traduce al
+intent equivalente del contrato del Executor (create_file, analyze_text,
+inspect_zip). Solo se ofrecen al modelo las herramientas con traducción.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _file_operation(args: Dict[str, Any]) -> Dict[str, Any]:
+    operation = args["operation"]
+    if operation in ("create", "write"):
+        return {"intent": "create_file", "params": {"filename": args["path"], "content": args.get("content", "")}}
+    if operation == "read":
+        return {"intent": "analyze_text", "params": {"path": args["path"]}}
+    if operation == "unzip":
+        return {"intent": "inspect_zip", "params": {"zip_path": args["path"]}}
+    raise ValueError(f"Operación no soportada: {operation}")
+
+
+def _code_operation(args: Dict[str, Any]) -> Dict[str, Any]:
+    if args["operation"] not in ("generate", "modify"):
+        raise ValueError(f"Operación no soportada: {args['operation']}")
+    return {"intent": "create_file", "params": {"filename": args["path"], "content": args["content"]}}
+
+
+# Nombre de la función de la herramienta -> traductor de argumentos a intent
+TOOL_CALL_INTENTS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "file_operation": _file_operation,
+    "code_operation": _code_operation,
+}
+
+
+def planner_tool_definitions(definitions: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Definiciones de herramientas para el planner: las del ToolManager global
+    (o las indicadas) que el Executor sabe ejecutar.
+    """
+    if definitions is None:
+        # Import diferido: el paquete tools registra FileTool, SystemTool y CodeTool
+        # (tools.tool_manager es también un submódulo: usar la instancia de base_tool)
+        import tools  # noqa: F401
+        from tools.base_tool import tool_manager
+        definitions = tool_manager.get_all_definitions()
+    return [
+        definition for definition in definitions
+        if definition.get("function", {}).get("name") in TOOL_CALL_INTENTS
+    ]
+
+
+def tool_calls_to_intents(tool_calls: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Traduce las llamadas a herramientas del modelo a intents, en su orden.
+    Las llamadas inválidas (función desconocida, argumentos no JSON o incompletos)
+    se descartan.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], int]: (intents, llamadas descartadas)
+    """
+    intents = []
+    failures = 0
+    for call in tool_calls:
+        name = call.get("name")
+        try:
+            arguments = call.get("arguments") or "{}"
+            args = json.loads(arguments) if isinstance(arguments, str) else dict(arguments)
+            intents.append(TOOL_CALL_INTENTS[name](args))
+        except (KeyError, ValueError, TypeError) as e:
+            failures += 1
+            logger.warning(f"[tool_calls] Llamada a herramienta inválida {name}: {e}")
+    return intents, failures
@@ -0,0 +1,69 @@
+"""
+CODI Core - Events Module
+Canal de eventos de progreso de la orquestación (motor elegido, plan, intents, resultado).
+Los componentes emiten eventos con emit(); quien quiera recibirlos (p. ej. el endpoint
+SSE) instala un sink con event_sink() en el contexto de ejecución.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EventSink = Callable[[str, Dict[str, Any]], None]
+
+_current_sink: ContextVar[Optional[EventSink]] = ContextVar("codi_event_sink", default=None)
+
+
+def current_sink() -> Optional[EventSink]:
+    """Sink de eventos del contexto actual (None si no hay)."""
+    return _current_sink.get()
+
+
+class EventFanOut:
+    """Sink que reenvía cada evento a varios sinks (p. ej. peticiones coalescidas)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sinks: List[EventSink] = []
+
+    def add(self, sink: Optional[EventSink]):
+        if sink is not None:
+            with self._lock:
+                self._sinks.append(sink)
+
+    def __call__(self, event: str, data: Dict[str, Any]):
+        with self._lock:
+            sinks = list(self._sinks)
+        for sink in sinks:
+            try:
+                sink(event, data)
+            except Exception as e:
+                logger.warning(f"Error en sink de eventos ({event}): {e}")
+
+
+def emit(event: str, **data: Any):
+    """
+    Emite un evento al sink del contexto actual (no-op si no hay ninguno).
+    Un sink defectuoso nunca debe romper la orquestación.
+    """
+    sink = _current_sink.get()
+    if sink is None:
+        return
+    try:
+        sink(event, data)
+    except Exception as e:
+        logger.warning(f"Error en sink de eventos ({event}): {e}")
+
+
+@contextmanager
+def event_sink(sink: EventSink):
+    """Instala un sink de eventos durante el bloque."""
+    token = _current_sink.set(sink)
+    try:
+        yield
+    finally:
+        _current_sink.reset(token)
@@ -1,8 +1,18 @@
+import contextvars
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Optional, List
+from datetime import datetime
+from typing import Any, Dict, Optional, List, Tuple
 from core.action_builder import ActionBuilder
+from core.bulkhead import BulkheadFull, ToolBulkheads, ToolTimeout
+from core.deadline import DeadlineExceeded, current_deadline
+from core.llm_resilience import CircuitOpenError
 from core.planner import Plan, Task
+from core.events import emit
+from core.task_graph import build_task_graph
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +39,15 @@ class ExecutionResult:
         }
 
 class Executor:
-    def __init__(self, tool_manager):
+    def __init__(self, tool_manager, max_workers: int = None, bulkheads: ToolBulkheads = None):
         self.tool_manager = tool_manager
         self.builder = ActionBuilder()
+        # Cada herramienta se ejecuta en su propio pool (concurrencia, cola, timeout y breaker)
+        self.bulkheads = bulkheads or ToolBulkheads.from_env()
+        # Pool compartido para las tareas independientes de cada oleada del plan. Sus hilos
+        # solo esperan a los bulkheads; cuentan en el presupuesto de hilos (.env.example)
+        self.max_workers = max_workers or int(os.getenv("CODI_PLAN_WORKERS", 4))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="codi-task")
 
     def execute(self, intents: list):
         """Ejecuta una lista de intents directamente."""
@@ -41,6 +57,17 @@ class Executor:
         for i, intent in enumerate(intents):
             intent_name = intent.get("name", "unknown")
             logger.info(f"[Executor] Paso {i+1}: {intent_name}")
+
+            # Petición cancelada o deadline vencido: no se empieza trabajo nuevo
+            deadline = current_deadline()
+            if deadline is not None and deadline.expired:
+                results.append({
+                    "action": intent_name,
+                    "status": "cancelled",
+                    "error": f"Cancelado: {deadline.reason}",
+                    "type": "CANCELLED"
+                })
+                continue
             
             try:
                 # 1. Construir Acción (Valida contrato)
@@ -48,7 +75,7 @@ class Executor:
                 
                 # 2. Ejecutar Tool
                 logger.info(f"[Executor] Ejecutando tool: {action.tool} con params: {action.params.keys()}")
-                result = self.tool_manager.execute(action.tool, action.params)
+                result = self.bulkheads.call(action.tool, self.tool_manager.execute, action.tool, action.params)
                 
                 logger.info(f"[Executor] Éxito: {action.type}")
                 results.append({
@@ -57,6 +84,25 @@ class Executor:
                     "result": result
                 })
                 
+            except DeadlineExceeded as de:
+                results.append({
+                    "action": intent_name,
+                    "status": "cancelled",
+                    "error": f"Cancelado: {de}",
+                    "type": "CANCELLED"
+                })
+
+            except (BulkheadFull, CircuitOpenError, ToolTimeout) as te:
+                # Herramienta saturada, degradada o lenta: no afecta al resto de herramientas
+                error_msg = f"Herramienta no disponible: {str(te)}"
+                logger.warning(f"[Executor] {error_msg}")
+                results.append({
+                    "action": intent_name,
+                    "status": "error",
+                    "error": error_msg,
+                    "type": "TOOL_TIMEOUT" if isinstance(te, ToolTimeout) else "TOOL_UNAVAILABLE"
+                })
+
             except ValueError as ve:
                 error_msg = f"Error de Validación: {str(ve)}"
                 logger.error(f"[Executor] {error_msg}")
@@ -81,76 +127,140 @@ class Executor:
 
     def execute_plan(self, plan: Plan) -> List[ExecutionResult]:
         """
-        Ejecuta un plan completo tarea por tarea.
+        Ejecuta un plan completo respetando el grafo de dependencias.
+        Las tareas independientes se ejecutan en oleadas topológicas sobre el pool
+        de tareas (por prioridad dentro de cada oleada). Si una tarea falla solo se
+        omiten sus descendientes; las ramas independientes continúan. Si la petición
+        se cancela, las tareas que aún no empezaron quedan como 'cancelled'.
+        Los resultados se retornan en el orden del plan.
+        """
+        logger.info(f"[Executor] Ejecutando plan con {len(plan.tasks)} tareas")
+        graph = build_task_graph(plan.tasks)
+        results: Dict[int, ExecutionResult] = {}
+        # task_id -> id de la tarea fallida que la bloquea
+        blocked: Dict[int, int] = {}
+
+        def block_descendants(task_id: int):
+            for descendant in graph.descendants(task_id):
+                blocked.setdefault(descendant, task_id)
+
+        for task in plan.tasks:
+            if task.id in graph.invalid:
+                logger.error(f"[Executor] Tarea {task.id} inválida: {graph.invalid[task.id]}")
+                results[task.id] = self._finish(task, "failed", error=graph.invalid[task.id])
+                block_descendants(task.id)
+
+        for wave in graph.waves:
+            runnable = []
+            for task in wave:
+                if task.id in results:
+                    continue
+                if task.id in blocked:
+                    results[task.id] = self._skip(task, blocked[task.id])
+                    continue
+                runnable.append(task)
+
+            for task, result in self._run_wave(plan, runnable):
+                results[task.id] = result
+                if result.status == "failed":
+                    block_descendants(task.id)
+
+        # Descendientes de tareas en ciclo (no colocadas en ninguna oleada)
+        for task in plan.tasks:
+            if task.id not in results:
+                results[task.id] = self._skip(task, blocked.get(task.id))
+
+        return [results[task.id] for task in plan.tasks]
+
+    def _run_wave(self, plan: Plan, tasks: List[Task]) -> List[Tuple[Task, ExecutionResult]]:
+        """Ejecuta una oleada de tareas independientes (en paralelo si hay más de una)."""
+        if len(tasks) <= 1:
+            return [(task, self._run_task(plan, task)) for task in tasks]
+        # Se encolan por prioridad; cada tarea hereda las contextvars del llamador
+        futures = [
+            (task, self._pool.submit(contextvars.copy_context().run, self._run_task, plan, task))
+            for task in tasks
+        ]
+        return [(task, future.result()) for task, future in futures]
+
+    def _run_task(self, plan: Plan, task: Task) -> ExecutionResult:
+        """
+        Ejecuta una tarea del plan.
         Si la tarea tiene un 'intent' definido, lo ejecuta.
         Si no, simula la ejecución (para tareas abstractas del planner básico).
         """
-        results = []
-        logger.info(f"[Executor] Ejecutando plan con {len(plan.tasks)} tareas")
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            logger.warning(f"[Executor] Tarea {task.id} cancelada: {deadline.reason}")
+            return self._finish(task, "cancelled", error=f"Cancelado: {deadline.reason}")
+
+        logger.info(f"[Executor] Ejecutando tarea {task.id}: {task.title}")
+        emit("task_start", task_id=task.id, title=task.title)
+        started = time.monotonic()
         
-        for task in plan.tasks:
-            logger.info(f"[Executor] Ejecutando tarea {task.id}: {task.title}")
+        try:
+            # Verificar si la tarea tiene un intent ejecutable (inyectado por un planner avanzado)
+            # O intentar inferir acción básica del título/descripción para MVP
+            execution_output = None
             
-            try:
-                # Verificar si la tarea tiene un intent ejecutable (inyectado por un planner avanzado)
-                # O intentar inferir acción básica del título/descripción para MVP
-                execution_output = None
+            if hasattr(task, 'intent') and task.intent:
+                # Ejecución real basada en intent
+                intent_results = self.execute([task.intent])
+                if intent_results and intent_results[0]['status'] == 'success':
+                    execution_output = intent_results[0]['result']
+                else:
+                    raise Exception(intent_results[0].get('error', 'Unknown error'))
+            
+            elif "Crear archivo" in task.title or "crear archivo" in task.description.lower():
+                # Inferencia simple para MVP (Prueba 1)
+                # Extraer nombre y contenido es difícil sin NLP, 
+                # pero para el test específico "Crear un archivo llamado prueba.txt con el texto OK"
+                # podemos hacer un hack simple o dejar que pase como simulado si no queremos complicar.
+                # Para pasar el test E2E real, necesitamos que cree el archivo.
                 
-                if hasattr(task, 'intent') and task.intent:
-                    # Ejecución real basada en intent
-                    intent_results = self.execute([task.intent])
+                if "prueba.txt" in task.description or "prueba.txt" in plan.objective:
+                    intent = {
+                        "name": "create_file",
+                        "filename": "prueba.txt",
+                        "content": "OK"
+                    }
+                    intent_results = self.execute([intent])
                     if intent_results and intent_results[0]['status'] == 'success':
                         execution_output = intent_results[0]['result']
                     else:
+                        # Si falla, no rompemos todo el plan, reportamos error en tarea
                         raise Exception(intent_results[0].get('error', 'Unknown error'))
-                
-                elif "Crear archivo" in task.title or "crear archivo" in task.description.lower():
-                    # Inferencia simple para MVP (Prueba 1)
-                    # Extraer nombre y contenido es difícil sin NLP, 
-                    # pero para el test específico "Crear un archivo llamado prueba.txt con el texto OK"
-                    # podemos hacer un hack simple o dejar que pase como simulado si no queremos complicar.
-                    # Para pasar el test E2E real, necesitamos que cree el archivo.
-                    
-                    if "prueba.txt" in task.description or "prueba.txt" in plan.objective:
-                        intent = {
-                            "name": "create_file",
-                            "filename": "prueba.txt",
-                            "content": "OK"
-                        }
-                        intent_results = self.execute([intent])
-                        if intent_results and intent_results[0]['status'] == 'success':
-                            execution_output = intent_results[0]['result']
-                        else:
-                            # Si falla, no rompemos todo el plan, reportamos error en tarea
-                            raise Exception(intent_results[0].get('error', 'Unknown error'))
-                    else:
-                        execution_output = "Simulated: File creation logic would go here"
-                
                 else:
-                    # Ejecución simulada para tareas abstractas
-                    execution_output = f"Executed: {task.title}"
-                
-                # Registrar éxito
-                results.append(ExecutionResult(
-                    task_id=task.id,
-                    task_title=task.title,
-                    status="success",
-                    result=execution_output,
-                    timestamp="" # TODO: Add timestamp
-                ))
-                
-            except Exception as e:
-                logger.error(f"[Executor] Error en tarea {task.id}: {str(e)}")
-                results.append(ExecutionResult(
-                    task_id=task.id,
-                    task_title=task.title,
-                    status="failed",
-                    result=None,
-                    error=str(e),
-                    timestamp=""
-                ))
-                # En un executor estricto, aquí detendríamos la ejecución.
-                # Para MVP, continuamos o paramos según configuración.
-                break 
-                
-        return results
+                    execution_output = "Simulated: File creation logic would go here"
+            
+            else:
+                # Ejecución simulada para tareas abstractas
+                execution_output = f"Executed: {task.title}"
+            
+            return self._finish(task, "success", result=execution_output, started=started)
+            
+        except Exception as e:
+            logger.error(f"[Executor] Error en tarea {task.id}: {str(e)}")
+            return self._finish(task, "failed", error=str(e), started=started)
+
+    def _skip(self, task: Task, failed_task_id: Optional[int]) -> ExecutionResult:
+        """Marca como omitida una tarea cuya dependencia falló."""
+        reason = f"Omitida: depende de la tarea {failed_task_id}, que falló" if failed_task_id is not None \
+            else "Omitida: depende de un ciclo de dependencias"
+        logger.warning(f"[Executor] Tarea {task.id} {reason.lower()}")
+        return self._finish(task, "skipped", error=reason)
+
+    def _finish(self, task: Task, status: str, result: Any = None, error: str = None,
+                started: float = None) -> ExecutionResult:
+        """Construye el ExecutionResult de una tarea y emite su evento."""
+        execution_result = ExecutionResult(
+            task_id=task.id,
+            task_title=task.title,
+            status=status,
+            result=result,
+            error=error,
+            duration_seconds=time.monotonic() - started if started is not None else 0.0,
+            timestamp=datetime.now().isoformat()
+        )
+        emit("task_result", **execution_result.to_dict())
+        return execution_result
@@ -0,0 +1,96 @@
+"""
+CODI Core - Incremental JSON Module
+Parser incremental para respuestas en streaming del LLM con forma de array JSON
+(opcionalmente dentro de un bloque ```json). Entrega cada elemento del array en
+cuanto se cierra, sin esperar al resto de la respuesta.
+"""
+
+import json
+import logging
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalArrayParser:
+    """
+    Alimentado con fragmentos de texto, retorna los elementos de primer nivel del
+    array JSON que se van completando. Si la respuesta no es un array (objeto suelto,
+    texto libre) no entrega nada y el llamador debe usar el texto completo (`text`).
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        # "start" -> buscando '[' | "array" -> dentro del array | "done" -> sin más elementos
+        self._state = "start"
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._fence = False
+        self._element_start = None
+        self.elements: List[Any] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Añade un fragmento y retorna los elementos (objetos/arrays) completados con él."""
+        self.text += chunk
+        completed = []
+        while self._pos < len(self.text) and self._state != "done":
+            char = self.text[self._pos]
+            if self._state == "start":
+                self._scan_start(char)
+            else:
+                element = self._scan_array(char)
+                if element is not None:
+                    completed.append(element)
+            self._pos += 1
+        self.elements.extend(completed)
+        return completed
+
+    def _scan_start(self, char: str):
+        """Antes del array: se ignoran espacios y la valla ```json; cualquier otra cosa termina."""
+        if char == "[":
+            self._state = "array"
+        elif char == "`":
+            # Valla markdown: se ignora junto con su etiqueta de lenguaje (```json)
+            self._fence = True
+        elif char == "\n":
+            self._fence = False
+        elif not self._fence and not char.isspace():
+            self._state = "done"
+
+    def _scan_array(self, char: str) -> Any:
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return None
+
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            if self._depth == 0:
+                self._element_start = self._pos
+            self._depth += 1
+        elif char in "}]":
+            if self._depth == 0:
+                # Cierre del array de primer nivel
+                self._state = "done"
+                return None
+            self._depth -= 1
+            if self._depth == 0:
+                return self._take_element(self._pos + 1)
+        # Los elementos escalares de primer nivel se ignoran (no son intents)
+        return None
+
+    def _take_element(self, end: int) -> Any:
+        raw = self.text[self._element_start:end]
+        self._element_start = None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"[IncrementalArrayParser] Elemento JSON inválido: {raw[:80]}")
+            return None
@@ -0,0 +1,131 @@
+"""
+CODI Core - Intent Rules Module
+Reconocedor determinista de objetivos formulaicos de archivos ("crea un archivo
+X con el texto Y", "analiza X.txt", "inspecciona Y.zip"). Cuando un objetivo
+coincide completo con una regla, sus intents van directamente al Executor sin
+ninguna llamada LLM; el resto sigue el flujo normal del orquestador.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _path(group: str, extension: str = r"[A-Za-z0-9]{1,8}") -> str:
+    """Patrón de una ruta de archivo con extensión, opcionalmente entre comillas."""
+    return rf"""(?P<q>["'`]?)(?P<{group}>[\w\-./\\~]+\.{extension})(?P=q)"""
+
+
+# Cortesías que no cambian el significado del objetivo
+_PREFIX = r"^(?:(?:por\s+favor|porfa)\s*,?\s+)?"
+
+# Reglas compiladas: (nombre, patrón del objetivo completo, constructor de intents)
+RULES = [
+    (
+        "inspect_zip",
+        re.compile(
+            _PREFIX
+            + r"(?:inspecciona|inspeccionar|descomprime|descomprimir|extrae|extraer|abre|abrir|analiza|analizar)"
+            r"\s+(?:el\s+|la\s+)?(?:archivo\s+|fichero\s+|zip\s+|carpeta\s+comprimida\s+)?"
+            + _path("zip_path", extension="zip")
+            + r"$",
+            re.IGNORECASE
+        ),
+        lambda m: {"name": "inspect_zip", "params": {"zip_path": m.group("zip_path")}}
+    ),
+    (
+        "analyze_text",
+        re.compile(
+            _PREFIX
+            + r"(?:analiza|analizar|analízame|analizame|revisa|revisar|lee|leer|léeme|leeme)"
+            r"\s+(?:el\s+)?(?:contenido\s+(?:de|del)\s+)?(?:archivo\s+|fichero\s+|texto\s+)?"
+            + _path("path")
+            + r"$",
+            re.IGNORECASE
+        ),
+        lambda m: {"name": "analyze_text", "params": {"path": m.group("path")}}
+    ),
+    (
+        "create_file",
+        re.compile(
+            _PREFIX
+            + r"(?:crea|crear|créame|creame|genera|generar|escribe|escribir)"
+            r"\s+(?:un\s+|el\s+)?(?:nuevo\s+)?(?:archivo|fichero)\s+(?:llamado\s+|con\s+nombre\s+)?"
+            + _path("filename")
+            + r"(?:\s+(?:con|que\s+contenga)\s+(?:el\s+)?(?:texto|contenido)\s*:?\s*(?P<content>.+?))?$",
+            re.IGNORECASE | re.DOTALL
+        ),
+        lambda m: {
+            "name": "create_file",
+            "params": {"filename": m.group("filename"), "content": _unquote(m.group("content") or "")}
+        }
+    ),
+]
+
+
+def _unquote(text: str) -> str:
+    """Quita las comillas que envuelven el texto completo."""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'`":
+        return text[1:-1]
+    for opening, closing in (("«", "»"), ("“", "”")):
+        if text.startswith(opening) and text.endswith(closing):
+            return text[1:-1]
+    return text
+
+
+class IntentRules:
+    """Reconocedor por reglas con contadores de aciertos (seguro entre hilos)."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.objectives = 0
+        self.hits: Dict[str, int] = {name: 0 for name, _, _ in RULES}
+
+    @classmethod
+    def from_env(cls) -> "IntentRules":
+        """
+        Configuración:
+            CODI_INTENT_RULES (true/false) activa el reconocedor
+        """
+        return cls(enabled=os.getenv("CODI_INTENT_RULES", "true").lower() == "true")
+
+    def match(self, objective: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Intents del objetivo si coincide completo con una regla; None si no.
+        Solo se aceptan coincidencias de todo el objetivo (una única acción).
+        """
+        if not self.enabled:
+            return None
+        text = (objective or "").strip()
+        matched = None
+        for name, pattern, build in RULES:
+            # El punto final no forma parte de la ruta (sí del texto de un create_file)
+            found = pattern.match(text) or pattern.match(text.rstrip(".!"))
+            if found:
+                matched = (name, [build(found)])
+                break
+        with self._lock:
+            self.objectives += 1
+            if matched:
+                self.hits[matched[0]] += 1
+        if matched:
+            logger.info(f"[IntentRules] Objetivo resuelto por la regla {matched[0]} (sin LLM)")
+            return matched[1]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total_hits = sum(self.hits.values())
+            return {
+                "enabled": self.enabled,
+                "objectives": self.objectives,
+                "hits": total_hits,
+                "hit_rate": total_hits / self.objectives if self.objectives else 0.0,
+                "by_rule": dict(self.hits)
+            }
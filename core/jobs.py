@@ -0,0 +1,180 @@
+"""
+CODI Core - Jobs Module
+API asíncrona de trabajos: un objetivo se encola y se consulta después por job_id,
+sin mantener abierta la conexión HTTP durante toda la ejecución.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from .deadline import Deadline, deadline_scope
+from .dispatch import OrchestrationDispatcher
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+
+@dataclass
+class Job:
+    """Trabajo de orquestación asíncrono."""
+    job_id: str
+    objective: str
+    status: str = "queued"  # "queued", "running", "completed", "failed", "cancelled"
+    plan_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str = ""
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    cancel_requested: bool = False
+    future: Optional[Future] = field(default=None, repr=False)
+    deadline: Optional[Deadline] = field(default=None, repr=False)
+    finished_monotonic: float = field(default=0.0, repr=False)
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "objective": self.objective,
+            "status": self.status,
+            "plan_id": self.plan_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "cancel_requested": self.cancel_requested
+        }
+
+
+class JobManager:
+    """
+    Gestiona trabajos sobre el OrchestrationDispatcher.
+
+    Solo guarda metadatos ligeros por trabajo (el reporte vive en el ReportStore del
+    Orchestrator y se referencia por plan_id). Los trabajos terminados se purgan por
+    TTL y por número máximo.
+    """
+
+    def __init__(
+        self,
+        dispatcher: OrchestrationDispatcher,
+        runner: Callable[[str], Any],
+        max_jobs: int = None,
+        ttl_seconds: float = None,
+        timeout_seconds: float = None
+    ):
+        self.dispatcher = dispatcher
+        self.runner = runner
+        self.max_jobs = max_jobs or int(os.getenv("CODI_JOBS_MAX", 1024))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("CODI_JOBS_TTL", 3600))
+        # Tiempo máximo de ejecución por trabajo (0 = sin límite; DELETE lo cancela igualmente)
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None \
+            else float(os.getenv("CODI_JOBS_TIMEOUT", 0))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, objective: str) -> Job:
+        """
+        Encola un objetivo y retorna el trabajo inmediatamente.
+
+        Raises:
+            DispatcherSaturated: Si el pool no admite más trabajo
+        """
+        job = Job(
+            job_id=str(uuid.uuid4()),
+            objective=objective,
+            created_at=datetime.now().isoformat(),
+            deadline=Deadline(self.timeout_seconds or None)
+        )
+        job.future = self.dispatcher.submit(self._run, job)
+        job.future.add_done_callback(lambda f: self._on_done(job, f))
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        logger.info(f"[Jobs] Trabajo {job.job_id} encolado")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Obtiene un trabajo por su ID."""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancela un trabajo. Si aún está en cola no llega a ejecutarse; si ya está en
+        ejecución se cancela su deadline: los intents y tareas pendientes no se
+        inician y el reporte parcial queda accesible por plan_id.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        job.cancel_requested = True
+        if job.deadline is not None:
+            job.deadline.cancel("job_cancelled")
+        future = job.future
+        if future is not None and future.cancel():
+            self._finish(job, "cancelled")
+        logger.info(f"[Jobs] Cancelación solicitada para {job_id} (estado: {job.status})")
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        """Cuenta trabajos por estado."""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def _run(self, job: Job):
+        if job.cancel_requested:
+            return None
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        with deadline_scope(job.deadline):
+            return self.runner(job.objective)
+
+    def _on_done(self, job: Job, future: Future):
+        if future.cancelled() or job.status in FINISHED_STATES:
+            return
+        if job.cancel_requested:
+            if future.exception() is None and future.result() is not None:
+                job.plan_id = getattr(future.result(), "plan_id", None)
+            self._finish(job, "cancelled")
+            return
+        error = future.exception()
+        if error is not None:
+            job.error = str(error)
+            self._finish(job, "failed")
+            return
+        report = future.result()
+        job.plan_id = getattr(report, "plan_id", None)
+        self._finish(job, "completed")
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.completed_at = datetime.now().isoformat()
+        job.finished_monotonic = time.monotonic()
+        job.future = None
+
+    def _prune(self):
+        """Purga trabajos terminados caducados o sobrantes. Requiere self._lock."""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in FINISHED_STATES and now - job.finished_monotonic > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+        if len(self._jobs) > self.max_jobs:
+            finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+            for job_id in finished[:len(self._jobs) - self.max_jobs]:
+                del self._jobs[job_id]
@@ -0,0 +1,269 @@
+"""
+CODI Core - LLM Cache Module
+Caché de respuestas del LLM en dos niveles: LRU en memoria del proceso y
+almacén persistente local (SQLite), ambos con TTL y límite de tamaño.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .request_metrics import record
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryTier:
+    """Nivel LRU en memoria, acotado por número de entradas y bytes."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class SQLiteTier:
+    """Nivel persistente en SQLite, acotado por bytes (se desaloja lo menos usado)."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.evictions = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM llm_cache").fetchone()
+            self._bytes, self._entries = row[0], row[1]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._delete(key)
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO llm_cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + self.ttl_seconds, now)
+            )
+            self._bytes += size
+            self._entries += 1
+            while self._bytes > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT key FROM llm_cache ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                if oldest is None:
+                    break
+                self._delete(oldest[0])
+                self.evictions += 1
+            self._conn.commit()
+
+    def _delete(self, key: str):
+        """Borra una entrada manteniendo los contadores. Requiere self._lock."""
+        row = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self._bytes -= row[0]
+        self._entries -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": self._entries, "bytes": self._bytes, "evictions": self.evictions, "path": self.path}
+
+
+class LLMCache:
+    """
+    Caché multinivel de respuestas del LLM.
+    La clave se deriva de modelo, mensajes, temperatura y formato de respuesta.
+    Un acierto en un nivel inferior se promociona a los superiores.
+    """
+
+    def __init__(self, tiers: List[Any], enabled: bool = True):
+        self.tiers = tiers
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {tier.name: 0 for tier in tiers}
+        self.misses = 0
+        self.bypassed = 0
+        self.bytes_served = 0
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: float = None,
+                 response_format: Any = None, **extra: Any) -> str:
+        """Genera la clave de caché (SHA-256 de la petición canónica)."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format,
+            **extra
+        }
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Busca en los niveles en orden, promocionando los aciertos."""
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                logger.warning(f"Error leyendo caché LLM ({tier.name}): {e}")
+                continue
+            if value is not None:
+                for upper in self.tiers[:index]:
+                    upper.set(key, value)
+                with self._lock:
+                    self.hits[tier.name] += 1
+                    self.bytes_served += len(value.encode("utf-8"))
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str):
+        """Guarda la respuesta en todos los niveles."""
+        for tier in self.tiers:
+            try:
+                tier.set(key, value)
+            except Exception as e:
+                logger.warning(f"Error escribiendo caché LLM ({tier.name}): {e}")
+
+    def get_or_call(self, key: str, fn: Callable[[], str], use_cache: bool = True) -> str:
+        """
+        Retorna la respuesta cacheada o llama a fn() y la guarda.
+        Con use_cache=False (llamadas no deterministas) se llama siempre y no se guarda.
+        """
+        if not self.enabled or not use_cache:
+            with self._lock:
+                self.bypassed += 1
+            return fn()
+        cached = self.get(key)
+        if cached is not None:
+            record(llm_cache_hits=1)
+            return cached
+        value = fn()
+        if isinstance(value, str) and value:
+            self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos y ocupación por nivel."""
+        with self._lock:
+            total_hits = sum(self.hits.values())
+            lookups = total_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": total_hits / lookups if lookups else 0.0,
+                "bytes_served": self.bytes_served,
+                "tiers": {tier.name: tier.stats() for tier in self.tiers}
+            }
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Instancia global de la caché, configurada desde variables de entorno."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+            ttl = float(os.getenv("LLM_CACHE_TTL", 86400))
+            tiers: List[Any] = [MemoryTier(
+                max_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 1024)),
+                max_bytes=int(os.getenv("LLM_CACHE_MEMORY_BYTES", 32 * 1024 * 1024)),
+                ttl_seconds=ttl
+            )]
+            path = os.getenv("LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "codi_llm_cache.sqlite"))
+            if enabled and path:
+                try:
+                    tiers.append(SQLiteTier(
+                        path=path,
+                        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+                        ttl_seconds=ttl
+                    ))
+                except Exception as e:
+                    logger.error(f"No se pudo abrir la caché LLM persistente ({path}): {e}")
+            _llm_cache = LLMCache(tiers, enabled=enabled)
+            logger.info(f"LLMCache inicializada: enabled={enabled}, niveles={[t.name for t in tiers]}")
+        return _llm_cache
@@ -0,0 +1,388 @@
+"""
+CODI Core - LLM Gateway Module
+Punto único de salida hacia el proveedor LLM: un cliente AsyncOpenAI sobre un pool
+HTTP compartido (keep-alive, límites configurables) que corre en su propio event loop.
+Los llamadores síncronos (workers del pool de orquestación) usan complete()/chat(),
+de modo que las llamadas de peticiones concurrentes se solapan en el mismo loop.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from .deadline import Deadline, current_deadline
+from .llm_cache import get_llm_cache
+from .llm_resilience import ResiliencePolicy
+from .rate_governor import RateGovernor, estimate_tokens
+from .request_metrics import RequestMetrics, current_request_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMResponse:
+    """Respuesta normalizada del proveedor LLM."""
+    content: str
+    model: str = ""
+    usage: Dict[str, int] = field(default_factory=dict)
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class LLMGateway:
+    """
+    Cliente LLM asíncrono compartido por LLMIntegration, QuestionTool y el planner.
+    """
+
+    def __init__(
+        self,
+        api_key: str = None,
+        timeout: float = None,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None
+    ):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", 30))
+        self.limits = httpx.Limits(
+            max_connections=max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", 20)),
+            max_keepalive_connections=max_keepalive_connections or int(os.getenv("LLM_MAX_KEEPALIVE", 10)),
+            keepalive_expiry=keepalive_expiry or float(os.getenv("LLM_KEEPALIVE_EXPIRY", 30))
+        )
+        # Reintentos con backoff, deadline, hedging y circuit breaker
+        self.resilience = ResiliencePolicy.from_env()
+        # Presupuesto RPM/TPM por modelo (cola FIFO en lugar de errores 429)
+        self.governor = RateGovernor.from_env()
+        self._client: Optional[AsyncOpenAI] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """True si hay API key configurada."""
+        return bool(self.api_key)
+
+    @property
+    def degraded(self) -> bool:
+        """True mientras el circuit breaker del proveedor está abierto."""
+        return self.resilience.breaker.is_open()
+
+    # --- Event loop y cliente -----------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Arranca (una vez) el event loop dedicado del gateway."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="codi-llm-gateway", daemon=True
+                )
+                self._thread.start()
+                logger.info(f"LLMGateway iniciado (límites: {self.limits})")
+            return self._loop
+
+    def _get_client(self) -> AsyncOpenAI:
+        """Cliente AsyncOpenAI sobre el pool HTTP compartido (creado en el loop del gateway)."""
+        if self._client is None:
+            if not self.api_key:
+                raise ConnectionError("OPENAI_API_KEY no configurada")
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            )
+        return self._client
+
+    # --- API asíncrona -------------------------------------------------
+
+    def _budget(self, model: str, estimated_tokens: int, metrics: Optional[RequestMetrics]) -> Dict[str, Any]:
+        """
+        Admisión de cada intento en el gobernador de tasa para ResiliencePolicy.execute:
+        la espera en cola ocurre antes de cronometrar el intento (no cuenta como
+        latencia ni dispara el hedging) y el hedge solo sale con presupuesto inmediato.
+        """
+        async def _admit():
+            waited = await self.governor.acquire(model, estimated_tokens)
+            if metrics is not None:
+                metrics.add(llm_queue_wait_seconds=waited)
+
+        async def _admit_hedge() -> bool:
+            return await self.governor.try_acquire(model, estimated_tokens)
+
+        return {"admit": _admit, "admit_hedge": _admit_hedge}
+
+    async def acomplete(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float = None,
+        response_format: Dict[str, Any] = None,
+        max_tokens: int = None,
+        timeout: float = None,
+        deadline: float = None,
+        metrics: RequestMetrics = None,
+        **extra: Any
+    ) -> LLMResponse:
+        """
+        Realiza una llamada chat.completions sobre el pool compartido, aplicando la
+        política de resiliencia (deadline = tiempo total máximo incluyendo reintentos)
+        y el gobernador de tasa. La espera en cola y el uso de tokens se suman a `metrics`.
+
+        Raises:
+            CircuitOpenError: Si el proveedor está degradado (circuito abierto)
+        """
+        kwargs: Dict[str, Any] = {"model": model, "messages": messages, **extra}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        client = self._get_client()
+        estimated_tokens = estimate_tokens(messages, max_tokens)
+
+        response = await self.resilience.execute(
+            lambda: client.chat.completions.create(**kwargs), deadline_seconds=deadline,
+            **self._budget(model, estimated_tokens, metrics)
+        )
+        message = response.choices[0].message
+        usage = response.usage
+        if usage is not None:
+            await self.governor.reconcile(model, estimated_tokens, getattr(usage, "total_tokens", 0) or 0)
+        if metrics is not None:
+            metrics.add(
+                llm_calls=1,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+            )
+        return LLMResponse(
+            content=message.content or "",
+            model=getattr(response, "model", model),
+            usage={
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+                "total_tokens": getattr(usage, "total_tokens", 0) or 0
+            } if usage else {},
+            tool_calls=[
+                {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+                for call in (getattr(message, "tool_calls", None) or [])
+            ]
+        )
+
+    async def astream(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float = None,
+        max_tokens: int = None,
+        deadline: float = None,
+        metrics: RequestMetrics = None,
+        **extra: Any
+    ) -> AsyncIterator[str]:
+        """
+        Versión en streaming de acomplete: produce los fragmentos de texto según llegan.
+        Reintentos, breaker y gobernador de tasa cubren el establecimiento del stream;
+        un fallo a mitad de la respuesta se propaga al llamador.
+        """
+        kwargs: Dict[str, Any] = {
+            "model": model, "messages": messages, "stream": True,
+            "stream_options": {"include_usage": True}, **extra
+        }
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+
+        client = self._get_client()
+        estimated_tokens = estimate_tokens(messages, max_tokens)
+
+        stream = await self.resilience.execute(
+            lambda: client.chat.completions.create(**kwargs), deadline_seconds=deadline,
+            **self._budget(model, estimated_tokens, metrics)
+        )
+        usage = None
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Si se abandona a medias (cancelación), cerrar la respuesta HTTP en lugar de esperar al GC
+            await stream.close()
+
+        if usage is not None:
+            await self.governor.reconcile(model, estimated_tokens, getattr(usage, "total_tokens", 0) or 0)
+        if metrics is not None:
+            metrics.add(
+                llm_calls=1,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+            )
+
+    # --- API síncrona (puente hacia el loop del gateway) ---------------
+
+    @staticmethod
+    def _bind_deadline(kwargs: Dict[str, Any]) -> Optional[Deadline]:
+        """
+        Limita el deadline de la llamada al tiempo restante de la petición en curso.
+
+        Raises:
+            DeadlineExceeded: Si la petición ya fue cancelada o venció
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            return None
+        deadline.check()
+        remaining = deadline.remaining()
+        if remaining is not None:
+            kwargs["deadline"] = min(kwargs.get("deadline") or remaining, remaining)
+        return deadline
+
+    @staticmethod
+    def _wait(future: concurrent.futures.Future, deadline: Optional[Deadline]) -> Any:
+        """Espera el resultado; si la petición se cancela, aborta la llamada en el loop."""
+        if deadline is None:
+            return future.result()
+        while not future.done():
+            concurrent.futures.wait([future], timeout=0.2)
+            if not future.done() and deadline.expired:
+                future.cancel()
+                deadline.check()
+        return future.result()
+
+    def complete(self, model: str, messages: List[Dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        """Versión bloqueante de acomplete para llamadores síncronos."""
+        loop = self._ensure_loop()
+        # Las contextvars no cruzan al loop del gateway: pasar métricas y deadline explícitamente
+        kwargs.setdefault("metrics", current_request_metrics())
+        deadline = self._bind_deadline(kwargs)
+        future = asyncio.run_coroutine_threadsafe(self.acomplete(model, messages, **kwargs), loop)
+        return self._wait(future, deadline)
+
+    def stream(self, model: str, messages: List[Dict[str, Any]], **kwargs: Any) -> Iterator[str]:
+        """Versión bloqueante de astream: itera los fragmentos desde un hilo síncrono."""
+        loop = self._ensure_loop()
+        kwargs.setdefault("metrics", current_request_metrics())
+        deadline = self._bind_deadline(kwargs)
+        chunks: "queue.Queue[Any]" = queue.Queue()
+        finished = object()
+
+        async def _pump():
+            try:
+                async for delta in self.astream(model, messages, **kwargs):
+                    chunks.put(delta)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(finished)
+
+        pump = asyncio.run_coroutine_threadsafe(_pump(), loop)
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=0.2)
+                except queue.Empty:
+                    item = None
+                if deadline is not None and deadline.expired:
+                    deadline.check()
+                if item is None:
+                    continue
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Deadline vencido, error o consumidor que deja de iterar (GeneratorExit):
+            # cancelar el stream de subida para liberar la conexión del pool
+            pump.cancel()
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float = None,
+        response_format: Dict[str, Any] = None,
+        use_cache: bool = True,
+        **kwargs: Any
+    ) -> str:
+        """
+        Retorna solo el contenido de la respuesta, pasando por la caché LLM
+        (use_cache=False para llamadas no deterministas).
+        """
+        cache = get_llm_cache()
+        key = cache.make_key(model, messages, temperature, response_format, **kwargs)
+        return cache.get_or_call(
+            key,
+            lambda: self.complete(
+                model, messages, temperature=temperature, response_format=response_format, **kwargs
+            ).content,
+            use_cache=use_cache
+        )
+
+    def close(self):
+        """Cierra el pool HTTP y detiene el loop del gateway."""
+        with self._lock:
+            loop, client = self._loop, self._client
+            self._loop, self._client = None, None
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+class GatewayChatModel:
+    """
+    Adaptador con la interfaz invoke(messages) -> respuesta con .content que usa
+    el planner de LangGraph, respaldado por el LLMGateway compartido.
+    """
+
+    ROLES = {"system": "system", "human": "user", "ai": "assistant", "tool": "tool"}
+
+    def __init__(self, model: str, temperature: float = None, gateway: LLMGateway = None):
+        self.model_name = model
+        self.temperature = temperature
+        self.gateway = gateway or get_llm_gateway()
+
+    def _payload(self, messages: List[Any]) -> List[Dict[str, Any]]:
+        return [
+            {"role": self.ROLES.get(getattr(m, "type", "human"), "user"), "content": m.content}
+            if not isinstance(m, dict) else m
+            for m in messages
+        ]
+
+    def invoke(self, messages: List[Any], tools: List[Dict[str, Any]] = None) -> LLMResponse:
+        """Con `tools`, el modelo puede responder con llamadas a herramientas (response.tool_calls)."""
+        extra = {"tools": tools} if tools else {}
+        return self.gateway.complete(self.model_name, self._payload(messages), temperature=self.temperature, **extra)
+
+    def stream(self, messages: List[Any]) -> Iterator[str]:
+        """Fragmentos de texto de la respuesta según se generan."""
+        return self.gateway.stream(self.model_name, self._payload(messages), temperature=self.temperature)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Instancia global del gateway (un solo pool de conexiones por proceso)."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
@@ -4,10 +4,14 @@ Responsable de la comunicación con el Large Language Model (LLM) para tareas de
 """
 
 import os
+import asyncio
 import logging
 import json
 from typing import Dict, Any, List
-from openai import OpenAI, APIError, Timeout
+from openai import APIError, Timeout
+from core.llm_cache import get_llm_cache
+from core.llm_gateway import get_llm_gateway
+from core.llm_resilience import CircuitOpenError
 # from dotenv import load_dotenv # No se puede instalar en el sandbox
 
 # Las variables de entorno se leen directamente del entorno del sandbox
@@ -27,19 +31,19 @@ class LLMIntegration:
         self.api_key = os.environ.get("OPENAI_API_KEY")
         self.model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini") # Usar un modelo más reciente y eficiente
         self.timeout = int(os.environ.get("LLM_TIMEOUT", 30))
-        self.max_retries = int(os.environ.get("LLM_MAX_RETRIES", 3))
         
         if not self.api_key:
             logger.warning("OPENAI_API_KEY no está configurada. La integración con LLM no funcionará.")
             self.client = None
         else:
-            # Inicializar cliente de OpenAI
-            self.client = OpenAI(api_key=self.api_key, timeout=self.timeout)
+            # Cliente compartido (pool HTTP asíncrono del LLMGateway)
+            self.client = get_llm_gateway()
             logger.info(f"LLMIntegration inicializado con modelo: {self.model}")
 
-    def _call_llm(self, system_prompt: str, user_prompt: str, json_output: bool = False) -> str:
+    def _call_llm(self, system_prompt: str, user_prompt: str, json_output: bool = False, use_cache: bool = True) -> str:
         """
         Método privado para realizar la llamada a la API del LLM con reintentos.
+        Las respuestas se sirven desde la caché LLM salvo use_cache=False.
         """
         if not self.client:
             raise ConnectionError("Cliente LLM no inicializado. OPENAI_API_KEY no configurada.")
@@ -50,30 +54,43 @@ class LLMIntegration:
         ]
         
         response_format = {"type": "json_object"} if json_output else {"type": "text"}
-        
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    response_format=response_format,
-                    temperature=0.1
-                )
-                
-                content = response.choices[0].message.content
-                logger.debug(f"LLM Response (Attempt {attempt + 1}): {content[:100]}...")
-                return content
+        temperature = 0.1
+
+        cache = get_llm_cache()
+        key = cache.make_key(self.model, messages, temperature, response_format)
+        return cache.get_or_call(
+            key,
+            lambda: self._request_with_retries(messages, response_format, temperature),
+            use_cache=use_cache
+        )
+
+    def _request_with_retries(self, messages: List[Dict[str, str]], response_format: Dict[str, str], temperature: float) -> str:
+        """
+        Realiza la petición al LLM. Los reintentos (backoff con jitter, Retry-After,
+        deadline) y el circuit breaker los aplica el LLMGateway sin bloquear el hilo.
+        """
+        try:
+            response = self.client.complete(
+                self.model,
+                messages,
+                response_format=response_format,
+                temperature=temperature,
+                timeout=self.timeout
+            )
+            content = response.content
+            logger.debug(f"LLM Response: {content[:100]}...")
+            return content
 
-            except (APIError, Timeout) as e:
-                logger.warning(f"LLM API Error (Attempt {attempt + 1}/{self.max_retries}): {e}")
-                if attempt + 1 == self.max_retries:
-                    raise RuntimeError(f"Fallo al comunicarse con el LLM después de {self.max_retries} intentos.") from e
-                # Esperar antes de reintentar (simple backoff)
-                import time
-                time.sleep(2 ** attempt)
-            except Exception as e:
-                logger.error(f"Error inesperado al llamar al LLM: {e}")
-                raise
+        except CircuitOpenError as e:
+            logger.warning(f"LLM API Error: {e}")
+            raise RuntimeError("Fallo al comunicarse con el LLM: circuito abierto, no se intentó la llamada.") from e
+        except (APIError, Timeout, asyncio.TimeoutError) as e:
+            logger.warning(f"LLM API Error: {e}")
+            attempts = getattr(e, "attempts", 1)
+            raise RuntimeError(f"Fallo al comunicarse con el LLM después de {attempts} intento(s).") from e
+        except Exception as e:
+            logger.error(f"Error inesperado al llamar al LLM: {e}")
+            raise
 
     def analyze_objective(self, objective: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,355 @@
+"""
+CODI Core - LLM Resilience Module
+Política de resiliencia compartida para las llamadas al LLM: reintentos con backoff
+exponencial con jitter (respetando Retry-After), deadline global por llamada,
+peticiones "hedged" cuando la latencia supera un percentil, y circuit breaker.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(ConnectionError):
+    """El proveedor LLM está degradado y el circuito está abierto (fallo rápido)."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker clásico (closed -> open -> half_open -> closed), seguro entre hilos.
+    Tras `failure_threshold` fallos consecutivos abre el circuito durante `reset_timeout`
+    segundos; después deja pasar una llamada de prueba.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """Estado efectivo (open caduca a half_open). Requiere self._lock."""
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = "half_open"
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Indica si se permite una llamada (en half_open, solo una de prueba)."""
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def is_open(self) -> bool:
+        """True mientras el circuito rechaza llamadas."""
+        return self.state == "open"
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """Libera la llamada de prueba de half_open sin resultado (p. ej. cancelada)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            if state == "half_open" or self._failures >= self.failure_threshold:
+                if state != "open":
+                    self.times_opened += 1
+                    logger.warning(f"[CircuitBreaker:{self.name}] Circuito abierto tras {self._failures} fallos")
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            retry_in = 0.0
+            if state == "open":
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "retry_in_seconds": retry_in,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias para estimar percentiles."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+class RetryPolicy:
+    """Backoff exponencial con jitter completo que respeta las pistas del servidor."""
+
+    RETRYABLE = (
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+        asyncio.TimeoutError
+    )
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 20.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, error: BaseException) -> bool:
+        return isinstance(error, self.RETRYABLE)
+
+    @staticmethod
+    def server_hint(error: BaseException) -> Optional[float]:
+        """Segundos indicados por Retry-After / retry-after-ms, si el servidor los envía."""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000.0
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except (TypeError, ValueError):
+            return None
+        return None
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Espera antes del reintento `attempt` (0-based)."""
+        hint = self.server_hint(error)
+        if hint is not None:
+            return min(hint, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class ResiliencePolicy:
+    """
+    Envuelve una llamada asíncrona al LLM con reintentos, deadline, hedging y breaker.
+    """
+
+    def __init__(
+        self,
+        retry: RetryPolicy,
+        breaker: CircuitBreaker,
+        deadline_seconds: float = 60.0,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20
+    ):
+        self.retry = retry
+        self.breaker = breaker
+        self.deadline_seconds = deadline_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "retries": 0, "hedged": 0, "hedge_wins": 0, "hedge_skipped": 0, "deadline_exceeded": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls) -> "ResiliencePolicy":
+        """Crea la política con la configuración de variables de entorno."""
+        return cls(
+            retry=RetryPolicy(
+                max_attempts=int(os.getenv("LLM_MAX_RETRIES", 3)),
+                base_delay=float(os.getenv("LLM_BACKOFF_BASE", 0.5)),
+                max_delay=float(os.getenv("LLM_BACKOFF_MAX", 20))
+            ),
+            breaker=CircuitBreaker(
+                "llm",
+                failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", 5)),
+                reset_timeout=float(os.getenv("LLM_BREAKER_RESET", 30))
+            ),
+            deadline_seconds=float(os.getenv("LLM_CALL_DEADLINE", 60)),
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", 95)),
+            hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+        )
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    async def execute(
+        self,
+        call: Callable[[], Awaitable[T]],
+        deadline_seconds: float = None,
+        admit: Callable[[], Awaitable[Any]] = None,
+        admit_hedge: Callable[[], Awaitable[bool]] = None
+    ) -> T:
+        """
+        Ejecuta call() aplicando la política.
+
+        Args:
+            admit: Se espera antes de cada intento (p. ej. cola del gobernador de tasa).
+                Consume deadline, pero no cuenta como latencia ni dispara el hedging.
+            admit_hedge: Decide sin esperar si se puede enviar la petición hedge
+                (False = no hay presupuesto y se sigue esperando a la primaria).
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto
+            asyncio.TimeoutError: Si se agota el deadline de la llamada
+
+        El error final lleva en `attempts` el número de intentos realizados.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Proveedor LLM degradado: circuito abierto")
+
+        self._count("calls")
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + (deadline_seconds or self.deadline_seconds)
+        # Permiso del breaker sin resultado registrado: se libera en cualquier otra salida
+        # (error no reintentable, deadline del llamante, cancelación) para no dejar
+        # bloqueada la llamada de prueba de half_open.
+        holding = True
+        try:
+            for attempt in range(self.retry.max_attempts):
+                remaining = deadline_at - loop.time()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError("Deadline de la llamada LLM agotado")
+                    if admit is not None:
+                        await asyncio.wait_for(admit(), timeout=remaining)
+                        remaining = deadline_at - loop.time()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError("Deadline de la llamada LLM agotado")
+                    started = loop.time()
+                    result = await asyncio.wait_for(self._hedged(call, admit_hedge), timeout=remaining)
+                    self.latency.record(loop.time() - started)
+                    self.breaker.record_success()
+                    holding = False
+                    return result
+                except Exception as e:
+                    e.attempts = attempt + 1
+                    remaining = deadline_at - loop.time()
+                    if isinstance(e, asyncio.TimeoutError) and remaining <= 0:
+                        # Lo agotó el deadline de la llamada/petición: no es un fallo del proveedor
+                        self._count("deadline_exceeded")
+                        self._count("failures")
+                        raise
+                    retryable = self.retry.is_retryable(e)
+                    if retryable:
+                        self.breaker.record_failure()
+                        holding = False
+                    if not retryable or attempt + 1 == self.retry.max_attempts:
+                        self._count("failures")
+                        raise
+                    delay = self.retry.delay(attempt, e)
+                    if delay >= remaining or not self.breaker.allow():
+                        self._count("failures")
+                        raise
+                    holding = True
+                    logger.warning(
+                        f"LLM API Error (Attempt {attempt + 1}/{self.retry.max_attempts}): {e}. "
+                        f"Reintentando en {delay:.2f}s"
+                    )
+                    self._count("retries")
+                    await asyncio.sleep(delay)
+        finally:
+            if holding:
+                self.breaker.release()
+
+    async def _hedged(self, call: Callable[[], Awaitable[T]],
+                      admit_hedge: Callable[[], Awaitable[bool]] = None) -> T:
+        """Lanza una segunda petición si la primera supera el percentil de latencia configurado."""
+        threshold = None
+        if self.hedge_percentile > 0 and len(self.latency) >= self.hedge_min_samples:
+            threshold = self.latency.percentile(self.hedge_percentile)
+        if threshold is None:
+            return await call()
+
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            if done:
+                return primary.result()
+
+            if admit_hedge is not None and not await admit_hedge():
+                # Sin presupuesto inmediato: un hedge duplicaría el tráfico justo bajo throttling
+                self._count("hedge_skipped")
+                return await primary
+
+            self._count("hedged")
+            hedge = asyncio.ensure_future(call())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                if not pending:
+                    # Ambas fallaron: propagar el error de la primaria
+                    return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado del breaker, contadores y percentiles de latencia observados."""
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "breaker": self.breaker.stats(),
+            **counters,
+            "latency_p50_seconds": self.latency.percentile(50),
+            "latency_p95_seconds": self.latency.percentile(95),
+            "hedge_percentile": self.hedge_percentile
+        }
@@ -11,9 +11,21 @@ import logging
 import json
 import uuid
 import os
+import re
+import threading
+import unicodedata
 
 from .planner import Planner, Plan
 from .executor import Executor, ExecutionResult
+from .deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+from .engine_router import EngineRouter, objective_class
+from .events import emit
+from .intent_rules import IntentRules
+from .report_store import ReportStore
+from .singleflight import SingleFlight
+from .llm_gateway import GatewayChatModel, get_llm_gateway
+from .request_metrics import current_request_metrics, record, request_metrics_scope
+from memory import get_memory_store
 from tools.tool_manager import ToolManager
 from tools.file_tool import FileTool
 from tools.question_tool import QuestionTool
@@ -21,7 +33,6 @@ from .engines.deepagent.decision_gate import should_use_deepagent
 from .engines.deepagent.deepagent_engine import DeepAgentEngine
 from .engines.deepagent.security import deepagent_allowed
 from .engines.deepagent.tool_proxy import ToolProxyFactory
-from .engines.deepagent.langgraph_engine import LangGraphEngine
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -40,7 +51,7 @@ class OrchestrationReport:
     created_at: str
     completed_at: str
     duration_seconds: float
-    engine: str = "standard"  # "standard" o "deepagent"
+    engine: str = "standard"  # "standard", "deepagent" o "rules"
 
     def to_dict(self):
         return {
@@ -56,6 +67,11 @@ class OrchestrationReport:
             "engine": self.engine
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OrchestrationReport":
+        """Reconstruye un reporte desde su forma serializada (to_dict)."""
+        return cls(**data)
+
 
 class Orchestrator:
     """
@@ -81,8 +97,21 @@ class Orchestrator:
             logger.warning(f"⚠️ No se pudo registrar QuestionTool: {e}")
         
         self.executor = Executor(self.tool_manager)
-        self.reports: Dict[str, OrchestrationReport] = {}
+        # Almacén acotado (tamaño + TTL) con volcado a disco de los reportes desalojados
+        self.reports = ReportStore(factory=OrchestrationReport.from_dict)
         self.current_plan_id: str = None
+        # Memoria persistente de objetivos, planes y resultados (escritura en segundo plano).
+        # Opcional (CODI_MEMORY_ENABLED=true): guarda el summary de cada reporte en disco
+        self.memory = get_memory_store() if os.getenv("CODI_MEMORY_ENABLED", "false").lower() == "true" else None
+        # process_objective se ejecuta concurrentemente desde el pool de workers
+        self._planner_lock = threading.Lock()
+        # Coalescencia de objetivos idénticos en vuelo (reintentos, doble click)
+        self.coalesce_enabled = os.getenv("CODI_COALESCE_ENABLED", "true").lower() == "true"
+        self._singleflight = SingleFlight()
+        # Objetivos formulaicos de archivos: intents por reglas, sin LLM
+        self.intent_rules = IntentRules.from_env()
+        # Enrutado por latencia/éxito observados por clase de objetivo y latencia del proveedor
+        self.engine_router = EngineRouter.from_env(provider_latency=get_llm_gateway().resilience.latency.percentile)
         
         # Inicializar DeepAgent con Feature Flag
         # FORZAR ACTIVACIÓN si existe OPENAI_API_KEY (Fix crítico para Railway)
@@ -90,17 +119,17 @@ class Orchestrator:
         use_langgraph = openai_key_exists or (os.getenv("USE_LANGGRAPH", "false").lower() == "true")
         
         if use_langgraph:
-            logger.info(">>> Inicializando DeepAgent con LangGraphEngine")
-            # Usar ChatOpenAI real con la API Key de Railway
+            engine_kind = os.getenv("DEEPAGENT_ENGINE", "langgraph").lower()
+            logger.info(f">>> Inicializando DeepAgent con motor '{engine_kind}'")
+            # Planner sobre el LLMGateway compartido con la API Key de Railway
             try:
-                from langchain_openai import ChatOpenAI
                 api_key = os.getenv("OPENAI_API_KEY")
                 if not api_key:
                     raise ValueError("OPENAI_API_KEY no configurada en variables de entorno")
-                llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7, openai_api_key=api_key)
-                logger.info("✅ ChatOpenAI inicializado correctamente con gpt-4o-mini")
+                llm = GatewayChatModel(model="gpt-4o-mini", temperature=0.7)
+                logger.info("✅ Planner inicializado sobre LLMGateway con gpt-4o-mini")
             except Exception as e:
-                logger.error(f"❌ Error al inicializar ChatOpenAI: {e}")
+                logger.error(f"❌ Error al inicializar el planner LLM: {e}")
                 logger.warning("🔄 Fallback a MockLLM")
                 from core.mock_llm import MockLLM 
                 llm = MockLLM()
@@ -141,7 +170,7 @@ class Orchestrator:
                     else:
                         raise Exception(results[0].get("error", "Unknown error"))
 
-            engine = LangGraphEngine(llm, ToolAdapter(self.executor))
+            engine = self._create_plan_execute_engine(engine_kind, llm, ToolAdapter(self.executor))
             
         else:
             logger.info(">>> Inicializando DeepAgent con MockAgentEngine")
@@ -149,10 +178,29 @@ class Orchestrator:
             
         self.deepagent_engine = DeepAgentEngine(engine)
 
+    def _create_plan_execute_engine(self, kind: str, llm, tools):
+        """
+        Crea el motor plan-and-execute de DeepAgent según DEEPAGENT_ENGINE:
+        'langgraph' (StateGraph, por defecto) o 'pipeline' (nativo, sin langgraph).
+        Import diferido: el motor nativo no carga langgraph/langchain.
+        """
+        options = {"memory_context": self._memory_context} if self.memory is not None else {}
+        if kind == "pipeline":
+            from .engines.deepagent.pipeline_engine import PipelineEngine
+            return PipelineEngine(llm, tools, **options)
+        if kind != "langgraph":
+            logger.warning(f"DEEPAGENT_ENGINE desconocido '{kind}': usando langgraph")
+        from .engines.deepagent.langgraph_engine import LangGraphEngine
+        return LangGraphEngine(llm, tools, **options)
+
+    def _memory_context(self, goal: str) -> str:
+        """Experiencia previa relevante de la memoria para el prompt del planner."""
+        return self.memory.context_block(goal, int(os.getenv("CODI_MEMORY_CONTEXT_TOKENS", 300)))
+
     def _create_mock_engine(self):
         """Crea el motor mock para simulación."""
         class MockAgentEngine:
-            def run(self, goal, context):
+            def run(self, goal, context, execution_id=None):
                 return {
                     "steps": ["Step 1: Analyzed goal", "Step 2: Executed action"],
                     "warnings": [],
@@ -161,20 +209,131 @@ class Orchestrator:
                 }
         return MockAgentEngine()
 
-    def process_objective(self, objective: str, user_context: Dict[str, Any] = None) -> OrchestrationReport:
+    def process_objective(self, objective: str, user_context: Dict[str, Any] = None,
+                          deadline: Deadline = None) -> OrchestrationReport:
         """
         Procesa un objetivo completo desde análisis hasta reporte.
+        Las peticiones concurrentes con el mismo objetivo normalizado y contexto se
+        coalescen en una sola ejecución y comparten el mismo reporte. La ejecución
+        compartida sigue mientras alguna de ellas siga esperando (ver SingleFlight):
+        cada seguidor espera como máximo hasta su propio deadline y recibe los
+        eventos de progreso desde que se une. La petición que la ejecuta (líder)
+        responde cuando termina la ejecución compartida.
         
         Args:
             objective: Objetivo a procesar
             user_context: Contexto del usuario (permisos, preferencias)
+            deadline: Deadline/cancelación de la petición (por defecto, el del contexto)
             
         Returns:
-            OrchestrationReport: Reporte final estructurado
+            OrchestrationReport: Reporte final estructurado; "partial" si se
+            interrumpió tras completar parte del trabajo
+        """
+        with deadline_scope(deadline or current_deadline()):
+            if not self.coalesce_enabled:
+                return self._run_objective(objective, user_context)
+
+            key = self._coalesce_key(objective, user_context)
+            started = datetime.now()
+            try:
+                report, shared = self._singleflight.do(key, self._run_objective, objective, user_context)
+            except DeadlineExceeded:
+                logger.info("Petición coalescida interrumpida antes de terminar la ejecución compartida")
+                return self._abandoned_report(objective, started)
+            if shared:
+                logger.info(f"Objetivo coalescido con una ejecución en vuelo: {report.plan_id}")
+            return report
+
+    def _abandoned_report(self, objective: str, start_time: datetime) -> OrchestrationReport:
+        """Reporte de una petición coalescida que dejó de esperar (deadline o cancelación)."""
+        completed_time = datetime.now()
+        return OrchestrationReport(
+            objective=objective,
+            status="failed",
+            plan_id="unknown",
+            plan={},
+            execution_results=[],
+            summary={"coalesced": True, **self._cancellation("failed")},
+            created_at=start_time.isoformat(),
+            completed_at=completed_time.isoformat(),
+            duration_seconds=(completed_time - start_time).total_seconds()
+        )
+
+    def _coalesce_key(self, objective: str, user_context: Dict[str, Any] = None) -> str:
+        """Clave de coalescencia: objetivo normalizado (espacios, Unicode) + contexto."""
+        normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", objective or "")).strip()
+        context = json.dumps(user_context or {}, sort_keys=True, default=str)
+        return f"{normalized}\x00{context}"
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas internas del orquestador."""
+        return {
+            "coalescing": self._singleflight.stats(),
+            "intent_rules": self.intent_rules.stats(),
+            "engine_router": self.engine_router.stats(),
+            "tool_bulkheads": self.executor.bulkheads.stats(),
+            "memory": self.memory.stats() if self.memory else {"enabled": False},
+            **self.deepagent_engine.get_metrics()
+        }
+
+    def _run_objective(self, objective: str, user_context: Dict[str, Any] = None) -> OrchestrationReport:
+        """Ejecuta la orquestación de un objetivo (sin coalescencia)."""
+        with request_metrics_scope() as metrics:
+            report = self._orchestrate(objective, user_context)
+            # Métricas por petición (llamadas LLM, tokens, espera en el gobernador de tasa)
+            report.summary["request_metrics"] = {"llm_queue_wait_seconds": 0.0, **metrics.to_dict()}
+            return report
+
+    def resume_execution(self, execution_id: str, deadline: Deadline = None) -> OrchestrationReport:
+        """
+        Reanuda una ejecución DeepAgent fallida desde su checkpoint: no re-planifica
+        y omite los intents que ya terminaron con éxito. El reporte resultante
+        reemplaza al de la ejecución original (mismo plan_id = execution_id).
+
+        Raises:
+            ExecutionNotFound: Si la ejecución no existe en el journal
+            ValueError: Si el motor DeepAgent no soporta reanudación
         """
+        with request_metrics_scope() as metrics, deadline_scope(deadline or current_deadline()):
+            start_time = datetime.now()
+            logger.info(f"=== REANUDANDO EJECUCIÓN {execution_id} ===")
+            result = self.deepagent_engine.resume(execution_id)
+            original = self.reports.get(execution_id)
+            status = self._deepagent_status(result)
+            completed_time = datetime.now()
+            report = OrchestrationReport(
+                objective=original.objective if original else result.get("goal", ""),
+                status=status,
+                plan_id=execution_id,
+                plan={"engine": "DeepAgent", "steps": result.get("steps"), "resumed": True},
+                execution_results=[{"status": status, "output": result}],
+                summary={
+                    "engine": "DeepAgent",
+                    "details": result,
+                    "request_metrics": {"llm_queue_wait_seconds": 0.0, **metrics.to_dict()},
+                    **self._cancellation(status)
+                },
+                created_at=start_time.isoformat(),
+                completed_at=completed_time.isoformat(),
+                duration_seconds=(completed_time - start_time).total_seconds(),
+                engine="deepagent"
+            )
+            self.reports[execution_id] = report
+            self.current_plan_id = execution_id
+            self._remember(report, objective=False)
+            logger.info(f"Reanudación completada: {status}")
+            return report
+
+    def _orchestrate(self, objective: str, user_context: Dict[str, Any] = None) -> OrchestrationReport:
+        """Flujo de orquestación: decisión de motor, ejecución y reporte."""
         start_time = datetime.now()
         logger.info(f"=== INICIANDO ORQUESTACIÓN ===")
         logger.info(f"Objetivo: {objective}")
+
+        # Vía rápida por reglas, antes del Decision Gate: sin planner ni LLM
+        rule_intents = self.intent_rules.match(objective)
+        if rule_intents is not None:
+            return self._execute_rule_intents(objective, rule_intents, start_time)
         
         # Contexto de tarea para Decision Gate
         # Heurística mejorada para MVP
@@ -200,11 +359,28 @@ class Orchestrator:
             should_use = should_use_deepagent(task_context)
             use_deepagent = should_use and is_allowed
         
+        # Proveedor LLM degradado (circuito abierto): fallo rápido al motor estándar
+        gateway = get_llm_gateway()
+        if use_deepagent and gateway.available and gateway.degraded:
+            logger.warning("Circuit breaker LLM abierto: usando motor estándar")
+            use_deepagent = False
+        
         logger.info(f"Decision Gate: Force DeepAgent={openai_key_exists}, Allowed={is_allowed} -> Use DeepAgent={use_deepagent}")
-        engine_used = "deepagent" if use_deepagent else "standard"
+        preferred = "deepagent" if use_deepagent else "standard"
+
+        # Router adaptativo: solo elige entre motores reales (DeepAgent con LLM disponible)
+        klass = objective_class(objective)
+        if is_allowed and gateway.available and not gateway.degraded:
+            candidates = ["standard", "deepagent"]
+        else:
+            candidates = [preferred]
+        engine_used, route_reason = self.engine_router.route(klass, preferred, candidates)
+        use_deepagent = engine_used == "deepagent"
+        emit("engine", engine=engine_used, objective=objective, objective_class=klass, reason=route_reason)
         
         execution_results = []
         plan_data = {}
+        plan_id = None
         status = "failed"
         summary = {}
 
@@ -212,7 +388,7 @@ class Orchestrator:
             if use_deepagent:
                 logger.info(">>> Motor seleccionado: DeepAgent")
                 execution_id = str(uuid.uuid4())
-                self.current_plan_id = execution_id
+                plan_id = execution_id
                 
                 # Ejecutar DeepAgent
                 result = self.deepagent_engine.run(
@@ -222,7 +398,7 @@ class Orchestrator:
                 )
                 
                 # Adaptar resultados de DeepAgent a formato de reporte
-                status = "success" if not result.get("errors") else "failed"
+                status = self._deepagent_status(result)
                 execution_results = [{"status": status, "output": result}]
                 plan_data = {"engine": "DeepAgent", "steps": result.get("steps")}
                 summary = {"engine": "DeepAgent", "details": result}
@@ -232,10 +408,12 @@ class Orchestrator:
                 
                 # Paso 1: Análisis y Planificación
                 logger.info("Paso 1: Analizando objetivo y generando plan...")
-                plan = self.planner.analyze_objective(objective)
-                self.current_plan_id = self._get_last_plan_id()
+                with self._planner_lock:
+                    plan = self.planner.analyze_objective(objective)
+                    plan_id = self._get_last_plan_id()
                 logger.info(f"Plan generado con {plan.total_tasks} tareas")
                 plan_data = plan.to_dict()
+                emit("plan", plan_id=plan_id, tasks=plan_data["tasks"])
 
                 # Paso 2: Ejecución
                 logger.info("Paso 2: Ejecutando plan...")
@@ -251,11 +429,14 @@ class Orchestrator:
             # Paso 4: Generar reporte
             completed_time = datetime.now()
             duration = (completed_time - start_time).total_seconds()
+            summary["routing"] = {"objective_class": klass, "preferred": preferred, "reason": route_reason}
+            summary.update(self._cancellation(status))
+            self._record_route(klass, engine_used, duration, status == "success")
 
             report = OrchestrationReport(
                 objective=objective,
                 status=status,
-                plan_id=self.current_plan_id or "unknown",
+                plan_id=plan_id or "unknown",
                 plan=plan_data,
                 execution_results=execution_results,
                 summary=summary,
@@ -266,8 +447,10 @@ class Orchestrator:
             )
 
             # Almacenar reporte
-            if self.current_plan_id:
-                self.reports[self.current_plan_id] = report
+            if plan_id:
+                self.reports[plan_id] = report
+                self.current_plan_id = plan_id
+            self._remember(report)
 
             logger.info(f"=== ORQUESTACIÓN COMPLETADA ===")
             logger.info(f"Estado final: {status}")
@@ -277,8 +460,97 @@ class Orchestrator:
 
         except Exception as e:
             logger.error(f"Error durante orquestación: {str(e)}")
+            self._record_route(klass, engine_used, (datetime.now() - start_time).total_seconds(), False)
             raise
 
+    def _record_route(self, klass: str, engine: str, duration: float, success: bool):
+        """Latencia, éxito y coste (tokens LLM de la petición) para el router de motores."""
+        metrics = current_request_metrics()
+        cost = metrics.get("prompt_tokens") + metrics.get("completion_tokens") if metrics is not None else 0
+        self.engine_router.record(klass, engine, duration, success, cost)
+
+    def _execute_rule_intents(self, objective: str, intents: List[Dict[str, Any]],
+                              start_time: datetime) -> OrchestrationReport:
+        """Ejecuta los intents reconocidos por reglas directamente con el Executor."""
+        logger.info(">>> Motor seleccionado: Rules (Executor directo, sin LLM)")
+        emit("engine", engine="rules", objective=objective)
+        record(rule_intent_hits=1)
+        plan_id = str(uuid.uuid4())
+        emit("plan", plan_id=plan_id, intents=intents, rules=True)
+
+        execution_results = self.executor.execute(intents)
+        # FileTool informa de sus errores en el resultado sin lanzar excepción
+        successful = sum(
+            1 for r in execution_results
+            if r["status"] == "success"
+            and not (isinstance(r.get("result"), dict) and r["result"].get("status") == "error")
+        )
+        if successful == len(execution_results):
+            status = "success"
+        elif successful:
+            status = "partial"
+        else:
+            status = "failed"
+
+        completed_time = datetime.now()
+        report = OrchestrationReport(
+            objective=objective,
+            status=status,
+            plan_id=plan_id,
+            plan={"engine": "Rules", "intents": intents},
+            execution_results=execution_results,
+            summary={
+                "engine": "Rules",
+                "total_tasks": len(execution_results),
+                "successful_tasks": successful,
+                "failed_tasks": len(execution_results) - successful,
+                "errors": [
+                    r.get("error") or r["result"].get("message") for r in execution_results
+                    if r["status"] != "success" or (isinstance(r.get("result"), dict) and r["result"].get("status") == "error")
+                ],
+                **self._cancellation(status)
+            },
+            created_at=start_time.isoformat(),
+            completed_at=completed_time.isoformat(),
+            duration_seconds=(completed_time - start_time).total_seconds(),
+            engine="rules"
+        )
+        self.reports[plan_id] = report
+        self.current_plan_id = plan_id
+        self._remember(report)
+        logger.info(f"=== ORQUESTACIÓN COMPLETADA (reglas) === Estado final: {status}")
+        return report
+
+    def _remember(self, report: OrchestrationReport, objective: bool = True):
+        """Guarda objetivo, plan y resultado en la memoria (solo encola: sin E/S en la petición)."""
+        if self.memory is None:
+            return
+        if objective:
+            self.memory.add_objective(report.objective, report.created_at)
+            self.memory.add_plan(report.plan_id, report.plan)
+        self.memory.add_result(report.plan_id, {
+            "status": report.status,
+            "engine": report.engine,
+            "summary": report.summary,
+            "duration_seconds": report.duration_seconds,
+            "completed_at": report.completed_at
+        })
+
+    @staticmethod
+    def _deepagent_status(result: Dict[str, Any]) -> str:
+        """Estado de una ejecución DeepAgent; interrumpida con pasos completados -> "partial"."""
+        if result.get("cancelled"):
+            return "partial" if result.get("steps") else "failed"
+        return "success" if not result.get("errors") else "failed"
+
+    @staticmethod
+    def _cancellation(status: str) -> Dict[str, Any]:
+        """Motivo de la interrupción para el summary si la petición no terminó completa."""
+        deadline = current_deadline()
+        if status != "success" and deadline is not None and deadline.expired:
+            return {"cancelled": deadline.reason}
+        return {}
+
     def _get_last_plan_id(self) -> str:
         """Obtiene el ID del último plan creado."""
         plans = self.planner.list_plans()
@@ -320,12 +592,16 @@ class Orchestrator:
         """
         success_count = sum(1 for r in execution_results if r.status == "success")
         failed_count = sum(1 for r in execution_results if r.status == "failed")
+        skipped_count = sum(1 for r in execution_results if r.status == "skipped")
+        cancelled_count = sum(1 for r in execution_results if r.status == "cancelled")
         total_duration = sum(r.duration_seconds for r in execution_results)
 
         return {
             "total_tasks": plan.total_tasks,
             "successful_tasks": success_count,
             "failed_tasks": failed_count,
+            "skipped_tasks": skipped_count,
+            "cancelled_tasks": cancelled_count,
             "success_rate": (success_count / plan.total_tasks * 100) if plan.total_tasks > 0 else 0,
             "total_duration_seconds": total_duration,
             "average_task_duration": total_duration / plan.total_tasks if plan.total_tasks > 0 else 0,
@@ -343,10 +619,11 @@ class Orchestrator:
         return priority_groups
 
     def get_report(self, plan_id: str) -> OrchestrationReport:
-        """Obtiene un reporte previamente generado."""
-        if plan_id not in self.reports:
+        """Obtiene un reporte previamente generado (de memoria o de disco)."""
+        report = self.reports.get(plan_id)
+        if report is None:
             raise ValueError(f"Reporte no encontrado: {plan_id}")
-        return self.reports[plan_id]
+        return report
 
     def list_reports(self) -> List[str]:
         """Lista todos los reportes generados."""
@@ -367,6 +644,6 @@ class Orchestrator:
 
     def get_last_report(self) -> OrchestrationReport:
         """Obtiene el último reporte generado."""
-        if not self.reports:
+        if not self.current_plan_id:
             raise ValueError("No hay reportes disponibles")
-        return self.reports[self.current_plan_id]
+        return self.get_report(self.current_plan_id)
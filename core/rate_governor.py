@@ -0,0 +1,241 @@
+"""
+CODI Core - Rate Governor Module
+Gobernador de tasa saliente hacia el proveedor LLM: token buckets por modelo en
+peticiones por minuto (RPM) y tokens estimados por minuto (TPM). Los llamadores
+esperan en cola FIFO en lugar de fallar. En modo multiproceso el estado de los
+buckets se comparte entre workers de uvicorn a través de un archivo local con flock.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelLimits:
+    """Límites por minuto de un modelo (0 = sin límite)."""
+    rpm: float = 0
+    tpm: float = 0
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: int = None) -> int:
+    """Estimación barata de tokens de una petición (~4 caracteres por token + salida)."""
+    chars = sum(len(str(message.get("content") or "")) for message in messages)
+    return chars // 4 + len(messages) * 4 + (max_tokens or 256)
+
+
+class LocalBuckets:
+    """Buckets en memoria del proceso."""
+
+    def __init__(self):
+        self._state: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, model: str, limits: ModelLimits, tokens: float) -> float:
+        """Consume 1 petición + tokens si hay saldo; si no, retorna los segundos a esperar."""
+        with self._lock:
+            state = self._state.setdefault(model, {"req": limits.rpm, "tok": limits.tpm, "ts": time.time()})
+            return _take(state, limits, tokens)
+
+    def adjust(self, model: str, limits: ModelLimits, delta_tokens: float):
+        """Corrige el saldo de tokens con el uso real (delta > 0 consume, < 0 devuelve)."""
+        with self._lock:
+            state = self._state.get(model)
+            if state is not None and limits.tpm:
+                state["tok"] = min(limits.tpm, state["tok"] - delta_tokens)
+
+
+class FileBuckets:
+    """Buckets compartidos entre procesos en un archivo JSON protegido con flock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _update(self, fn):
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    data = json.loads(raw) if raw else {}
+                except json.JSONDecodeError:
+                    data = {}
+                result = fn(data)
+                f.seek(0)
+                f.truncate()
+                json.dump(data, f)
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def take(self, model: str, limits: ModelLimits, tokens: float) -> float:
+        def _fn(data):
+            state = data.setdefault(model, {"req": limits.rpm, "tok": limits.tpm, "ts": time.time()})
+            return _take(state, limits, tokens)
+        return self._update(_fn)
+
+    def adjust(self, model: str, limits: ModelLimits, delta_tokens: float):
+        def _fn(data):
+            state = data.get(model)
+            if state is not None and limits.tpm:
+                state["tok"] = min(limits.tpm, state["tok"] - delta_tokens)
+        self._update(_fn)
+
+
+def _take(state: Dict[str, float], limits: ModelLimits, tokens: float) -> float:
+    """Recarga y consume un bucket (estado mutable). Retorna 0 o la espera necesaria."""
+    now = time.time()
+    elapsed = max(0.0, now - state["ts"])
+    state["ts"] = now
+    if limits.rpm:
+        state["req"] = min(limits.rpm, state["req"] + elapsed * limits.rpm / 60.0)
+    if limits.tpm:
+        state["tok"] = min(limits.tpm, state["tok"] + elapsed * limits.tpm / 60.0)
+        # Una petición mayor que el bucket entero se deja pasar con el bucket lleno
+        tokens = min(tokens, limits.tpm)
+
+    waits = []
+    if limits.rpm and state["req"] < 1:
+        waits.append((1 - state["req"]) * 60.0 / limits.rpm)
+    if limits.tpm and state["tok"] < tokens:
+        waits.append((tokens - state["tok"]) * 60.0 / limits.tpm)
+    if waits:
+        return max(waits)
+
+    if limits.rpm:
+        state["req"] -= 1
+    if limits.tpm:
+        state["tok"] -= tokens
+    return 0.0
+
+
+class RateGovernor:
+    """
+    Gobernador de tasa por modelo. acquire() se ejecuta en el event loop del
+    LLMGateway; un asyncio.Lock por modelo garantiza el orden FIFO de los llamadores.
+    Con el archivo compartido, flock y la E/S del bucket corren en un hilo para no
+    detener el loop (y con él todas las llamadas en vuelo) mientras otro worker lo tiene.
+    """
+
+    def __init__(self, limits: Dict[str, ModelLimits], default: ModelLimits, shared_file: str = None):
+        self.limits = limits
+        self.default = default
+        self.backend = FileBuckets(shared_file) if shared_file else LocalBuckets()
+        self.shared_file = shared_file
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateGovernor":
+        """
+        Configuración:
+            LLM_RATE_LIMITS="gpt-4o-mini=500:200000,gpt-4o=100:30000" (modelo=RPM:TPM)
+            LLM_DEFAULT_RPM / LLM_DEFAULT_TPM para el resto de modelos (0 = sin límite)
+            LLM_RATE_SHARED_FILE=/tmp/codi_rate.json para compartir el presupuesto entre procesos
+        """
+        limits: Dict[str, ModelLimits] = {}
+        for item in filter(None, (part.strip() for part in os.getenv("LLM_RATE_LIMITS", "").split(","))):
+            try:
+                model, values = item.split("=", 1)
+                rpm, _, tpm = values.partition(":")
+                limits[model.strip()] = ModelLimits(rpm=float(rpm or 0), tpm=float(tpm or 0))
+            except ValueError:
+                logger.error(f"Límite de tasa inválido en LLM_RATE_LIMITS: {item}")
+        default = ModelLimits(
+            rpm=float(os.getenv("LLM_DEFAULT_RPM", 0)),
+            tpm=float(os.getenv("LLM_DEFAULT_TPM", 0))
+        )
+        return cls(limits, default, shared_file=os.getenv("LLM_RATE_SHARED_FILE") or None)
+
+    def limits_for(self, model: str) -> ModelLimits:
+        return self.limits.get(model, self.default)
+
+    async def acquire(self, model: str, tokens: float) -> float:
+        """
+        Espera (en cola FIFO) hasta disponer de presupuesto para una petición.
+
+        Returns:
+            float: Segundos esperados en cola
+        """
+        limits = self.limits_for(model)
+        if not limits.rpm and not limits.tpm:
+            return 0.0
+
+        started = time.monotonic()
+        lock = self._locks.setdefault(model, asyncio.Lock())
+        self._record(model, queued=1)
+        try:
+            async with lock:
+                while True:
+                    wait = await self._take(model, limits, tokens)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(min(wait, 1.0))
+        finally:
+            self._record(model, queued=-1)
+        waited = time.monotonic() - started
+        self._record(model, requests=1, wait_seconds=waited, throttled=1 if waited > 0.001 else 0)
+        return waited
+
+    async def try_acquire(self, model: str, tokens: float) -> bool:
+        """
+        Consume presupuesto solo si está disponible ya y no hay llamadores en cola
+        (no los adelanta). Para peticiones opcionales como el hedging.
+        """
+        limits = self.limits_for(model)
+        if not limits.rpm and not limits.tpm:
+            return True
+        lock = self._locks.setdefault(model, asyncio.Lock())
+        if lock.locked():
+            return False
+        async with lock:
+            if await self._take(model, limits, tokens) > 0:
+                return False
+        self._record(model, requests=1)
+        return True
+
+    async def reconcile(self, model: str, estimated: float, actual: float):
+        """Ajusta el bucket de tokens con el uso real reportado por el proveedor."""
+        limits = self.limits_for(model)
+        if limits.tpm and actual:
+            delta = actual - min(estimated, limits.tpm)
+            if isinstance(self.backend, FileBuckets):
+                await asyncio.to_thread(self.backend.adjust, model, limits, delta)
+            else:
+                self.backend.adjust(model, limits, delta)
+
+    async def _take(self, model: str, limits: ModelLimits, tokens: float) -> float:
+        if isinstance(self.backend, FileBuckets):
+            return await asyncio.to_thread(self.backend.take, model, limits, tokens)
+        return self.backend.take(model, limits, tokens)
+
+    def _record(self, model: str, **deltas: float):
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                model, {"requests": 0, "queued": 0, "throttled": 0, "wait_seconds": 0.0}
+            )
+            for name, delta in deltas.items():
+                stats[name] += delta
+
+    def stats(self) -> Dict[str, Any]:
+        """Espera acumulada y peticiones en cola por modelo."""
+        with self._stats_lock:
+            models = {model: dict(values) for model, values in self._stats.items()}
+        return {
+            "mode": "shared_file" if self.shared_file else "local",
+            "limits": {model: vars(limit) for model, limit in self.limits.items()},
+            "default": vars(self.default),
+            "models": models
+        }
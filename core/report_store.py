@@ -0,0 +1,191 @@
+"""
+CODI Core - Report Store Module
+Almacén acotado (tamaño + TTL) de reportes de orquestación.
+Los reportes desalojados de memoria se vuelcan a disco local y se recargan bajo demanda.
+Cada almacén vuelca en su propio subdirectorio (se borra al liberarse), así que nunca
+sirve reportes de otro proceso ni de una ejecución anterior.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ReportStore:
+    """
+    Almacén LRU de reportes con TTL y volcado a disco.
+
+    - En memoria se mantienen como máximo `max_entries` reportes, cada uno durante
+      `ttl_seconds` como mucho. Al desalojarse se escriben como JSON en un
+      subdirectorio propio de `spill_dir`.
+    - En disco se conservan como máximo `max_spill_files` reportes (los más antiguos
+      se borran). Un índice en memoria de las claves volcadas evita listar el
+      directorio en cada consulta.
+    - Los objetos almacenados deben exponer to_dict(); `factory` reconstruye el objeto
+      a partir del dict al leer desde disco.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Dict[str, Any]], Any],
+        max_entries: int = None,
+        ttl_seconds: float = None,
+        spill_dir: str = None,
+        max_spill_files: int = None
+    ):
+        self.factory = factory
+        self.max_entries = max_entries or int(os.getenv("CODI_REPORTS_MAX", 256))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("CODI_REPORTS_TTL", 3600))
+        base_dir = spill_dir or os.getenv(
+            "CODI_REPORTS_DIR", os.path.join(tempfile.gettempdir(), "codi_reports")
+        )
+        os.makedirs(base_dir, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix=f"reports-{os.getpid()}-", dir=base_dir)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.spill_dir, ignore_errors=True)
+        self.max_spill_files = max_spill_files or int(os.getenv("CODI_REPORTS_SPILL_MAX", 10000))
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # Claves volcadas a disco, de la más antigua a la más reciente
+        self._spilled: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- API tipo dict -------------------------------------------------
+
+    def __setitem__(self, key: str, value: Any):
+        self.put(key, value)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries or key in self._spilled
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) + sum(1 for key in self._spilled if key not in self._entries)
+
+    def __bool__(self) -> bool:
+        with self._lock:
+            return bool(self._entries or self._spilled)
+
+    # --- Operaciones ---------------------------------------------------
+
+    def put(self, key: str, value: Any):
+        """Almacena un reporte en memoria, desalojando los más antiguos si hace falta."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            evicted = self._collect_evictions()
+        for evicted_key, evicted_value in evicted:
+            self._spill(evicted_key, evicted_value)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtiene un reporte de memoria o, si fue desalojado, desde disco."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            evicted = self._collect_evictions()
+        for evicted_key, evicted_value in evicted:
+            self._spill(evicted_key, evicted_value)
+        if entry is not None and not any(k == key for k, _ in evicted):
+            return entry[1]
+        with self._lock:
+            if key not in self._spilled:
+                return None
+        return self._load(key)
+
+    def keys(self) -> List[str]:
+        """Lista las claves en disco y en memoria (las de memoria al final, más recientes)."""
+        with self._lock:
+            in_memory = list(self._entries.keys())
+            on_disk = [key for key in self._spilled if key not in self._entries]
+        return on_disk + in_memory
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna ocupación en memoria y en disco."""
+        with self._lock:
+            return {
+                "in_memory": len(self._entries),
+                "on_disk": len(self._spilled),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "spill_dir": self.spill_dir
+            }
+
+    def close(self):
+        """Borra los reportes volcados a disco (también se hace al liberar el almacén)."""
+        with self._lock:
+            self._spilled.clear()
+        self._cleanup()
+
+    # --- Internos ------------------------------------------------------
+
+    def _collect_evictions(self) -> List[Tuple[str, Any]]:
+        """Retira de memoria las entradas caducadas o sobrantes. Requiere self._lock."""
+        evicted = []
+        now = time.monotonic()
+        while self._entries:
+            key, (stored_at, value) = next(iter(self._entries.items()))
+            if len(self._entries) > self.max_entries or now - stored_at > self.ttl_seconds:
+                self._entries.popitem(last=False)
+                evicted.append((key, value))
+            else:
+                break
+        return evicted
+
+    def _spill_path(self, key: str) -> str:
+        safe_key = re.sub(r"[^\w.-]", "_", key)
+        return os.path.join(self.spill_dir, f"{safe_key}.json")
+
+    def _spill(self, key: str, value: Any):
+        """Escribe un reporte desalojado en disco (escritura atómica)."""
+        path = self._spill_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(value.to_dict(), f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error al volcar reporte {key} a disco: {e}")
+            return
+
+        with self._lock:
+            self._spilled[key] = None
+            self._spilled.move_to_end(key)
+            excess = []
+            while len(self._spilled) > self.max_spill_files:
+                excess.append(self._spilled.popitem(last=False)[0])
+        self._remove_spilled(excess)
+
+    def _load(self, key: str) -> Optional[Any]:
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return self.factory(json.load(f))
+        except Exception as e:
+            logger.error(f"Error al cargar reporte {key} desde disco: {e}")
+            return None
+
+    def _remove_spilled(self, keys: List[str]):
+        """Borra de disco los reportes más antiguos que excedían max_spill_files."""
+        for key in keys:
+            try:
+                os.remove(self._spill_path(key))
+            except OSError as e:
+                logger.error(f"Error al borrar el reporte volcado {key}: {e}")
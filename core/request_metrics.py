@@ -0,0 +1,58 @@
+"""
+CODI Core - Request Metrics Module
+Métricas acumuladas por petición (llamadas LLM, tokens, espera en cola...).
+Se propagan con contextvars y terminan en el summary del OrchestrationReport.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+
+class RequestMetrics:
+    """Contadores de una petición, seguros entre hilos."""
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, **deltas: float):
+        """Suma los valores indicados a los contadores."""
+        with self._lock:
+            for name, delta in deltas.items():
+                self._values[name] = self._values.get(name, 0) + delta
+
+    def get(self, name: str, default: float = 0) -> float:
+        with self._lock:
+            return self._values.get(name, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._values)
+
+
+_current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("codi_request_metrics", default=None)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    """Métricas de la petición en curso (None fuera de una orquestación)."""
+    return _current_metrics.get()
+
+
+def record(**deltas: float):
+    """Suma valores a las métricas de la petición en curso (no-op si no hay)."""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.add(**deltas)
+
+
+@contextmanager
+def request_metrics_scope():
+    """Abre un ámbito de métricas nuevo para una petición."""
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
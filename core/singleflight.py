@@ -0,0 +1,112 @@
+"""
+CODI Core - Single-Flight Module
+Coalesce llamadas concurrentes idénticas: la primera ejecuta, el resto espera y
+recibe el mismo resultado.
+
+La ejecución compartida no usa el deadline de quien la lanza sino un
+SharedDeadline con el de todas las peticiones que la esperan: la cancelación o
+el vencimiento de una sola (p. ej. el líder que se desconecta) no interrumpe a
+las demás; el trabajo pendiente solo se cancela cuando ya no queda ninguna.
+Cada seguidor espera como máximo hasta su propio deadline y recibe, mediante
+EventFanOut, los eventos de progreso emitidos desde que se une.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from .deadline import DeadlineExceeded, SharedDeadline, current_deadline, deadline_scope
+from .events import EventFanOut, current_sink, event_sink
+
+# Cada cuánto comprueba un seguidor su propio deadline mientras espera
+POLL_SECONDS = 0.1
+
+
+class _Call:
+    """Llamada en vuelo compartida por todos sus llamadores."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+        self.deadline = SharedDeadline()
+        self.sinks = EventFanOut()
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave en una sola ejecución.
+    Solo coalesce llamadas en vuelo: no es una caché, una vez terminada la llamada
+    la siguiente con la misma clave vuelve a ejecutarse.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Ejecuta fn(*args, **kwargs) o espera a la ejecución en vuelo con la misma clave.
+        El deadline y el sink de eventos del contexto de cada llamador se suman a
+        los de la ejecución compartida.
+
+        Returns:
+            Tuple[Any, bool]: (resultado, True si fue compartido con otra llamada)
+
+        Raises:
+            DeadlineExceeded: Si un seguidor agota su deadline (o se cancela) antes
+                de que termine la ejecución compartida
+        """
+        deadline = current_deadline()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+            call.deadline.join(deadline)
+            call.sinks.add(current_sink())
+
+        if not leader:
+            return self._wait(call, deadline), True
+
+        try:
+            with deadline_scope(call.deadline), event_sink(call.sinks):
+                call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, call.waiters > 0
+
+    def _wait(self, call: _Call, deadline) -> Any:
+        """Espera de un seguidor, acotada por su propio deadline."""
+        while not call.done.wait(POLL_SECONDS):
+            if deadline is not None and deadline.expired:
+                with self._lock:
+                    self.abandoned += 1
+                raise DeadlineExceeded(f"Petición interrumpida: {deadline.reason}")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna ejecuciones reales, llamadas coalescidas, abandonadas y en vuelo."""
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "abandoned": self.abandoned,
+                "in_flight": len(self._calls)
+            }
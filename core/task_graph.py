@@ -0,0 +1,77 @@
+"""
+CODI Core - Task Graph Module
+Análisis del grafo de dependencias de un plan: validación (dependencias
+inexistentes y ciclos) y cálculo de oleadas topológicas ordenadas por prioridad.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from .planner import Task
+
+
+@dataclass
+class TaskGraph:
+    """Oleadas ejecutables y tareas inválidas de un plan."""
+    waves: List[List[Task]] = field(default_factory=list)
+    # task_id -> motivo por el que la tarea no puede ejecutarse
+    invalid: Dict[int, str] = field(default_factory=dict)
+    # task_id -> ids de las tareas que dependen directamente de ella
+    dependents: Dict[int, List[int]] = field(default_factory=dict)
+
+    def descendants(self, task_id: int) -> Set[int]:
+        """Todas las tareas que dependen (transitivamente) de task_id."""
+        found: Set[int] = set()
+        pending = list(self.dependents.get(task_id, []))
+        while pending:
+            current = pending.pop()
+            if current in found:
+                continue
+            found.add(current)
+            pending.extend(self.dependents.get(current, []))
+        return found
+
+
+def build_task_graph(tasks: List[Task]) -> TaskGraph:
+    """
+    Construye las oleadas topológicas (algoritmo de Kahn) de un conjunto de tareas.
+
+    Las tareas con dependencias inexistentes o que forman parte de un ciclo se
+    marcan como inválidas; sus descendientes quedan fuera de las oleadas (se
+    omiten en ejecución). Dentro de cada oleada se ordena por prioridad
+    ascendente (1 = más prioritaria) y, a igualdad, por orden en el plan.
+    """
+    graph = TaskGraph()
+    by_id = {task.id: task for task in tasks}
+    position = {task.id: index for index, task in enumerate(tasks)}
+
+    for task in tasks:
+        graph.dependents.setdefault(task.id, [])
+        for dep in task.dependencies or []:
+            if dep not in by_id:
+                graph.invalid[task.id] = f"Dependencia inexistente: {dep}"
+            else:
+                graph.dependents.setdefault(dep, []).append(task.id)
+
+    indegree = {task.id: len(set(task.dependencies or []) & by_id.keys()) for task in tasks}
+    ready = [task for task in tasks if indegree[task.id] == 0]
+    placed: Set[int] = set()
+
+    while ready:
+        wave = sorted(ready, key=lambda t: (t.priority, position[t.id]))
+        graph.waves.append(wave)
+        ready = []
+        for task in wave:
+            placed.add(task.id)
+            for child in set(graph.dependents[task.id]):
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(by_id[child])
+
+    # Lo que no se pudo colocar forma parte de un ciclo o depende de uno
+    # (en el segundo caso se omite como descendiente de la tarea inválida)
+    for task in tasks:
+        if task.id not in placed and task.id in graph.descendants(task.id):
+            graph.invalid[task.id] = "Ciclo de dependencias"
+
+    return graph
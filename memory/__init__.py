@@ -1 +1,2 @@
-from .memory_store import MemoryStore
+from .memory_store import MemoryStore, get_memory_store
+from .backends import MemoryBackend, LogBackend, SQLiteBackend
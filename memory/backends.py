@@ -0,0 +1,364 @@
+"""
+CODI Memory - Storage Backends Module
+Backends de almacenamiento de MemoryStore:
+
+- SQLiteBackend: tablas indexadas por plan_id y timestamp. Las búsquedas son
+  O(log n), los "N más recientes" se paginan en la consulta y el uso de memoria
+  no depende del tamaño del historial.
+- LogBackend: historial completo en memoria persistido en el log JSONL por
+  segmentos (el formato JSON anterior).
+
+CODI_MEMORY_BACKEND elige el backend (sqlite | log).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .segment_log import SegmentLog
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("objectives", "plans", "results")
+
+MEMORY_DIR = os.path.dirname(__file__)
+
+
+def _empty_memory() -> Dict[str, List[Dict[str, Any]]]:
+    return {section: [] for section in SECTIONS}
+
+
+def _apply(memory: Dict[str, List[Dict[str, Any]]], record: Dict[str, Any]):
+    """Aplica un registro del log ({"section", "entry"} o {"section", "drop"}) a la memoria."""
+    if "drop" in record:
+        del memory.setdefault(record["section"], [])[:record["drop"]]
+    else:
+        memory.setdefault(record["section"], []).append(record["entry"])
+
+
+class MemoryBackend(ABC):
+    """Interfaz de almacenamiento de MemoryStore."""
+
+    name = "base"
+
+    @abstractmethod
+    def add(self, section: str, entry: Dict[str, Any]):
+        """Añade una entrada a una sección (objectives, plans, results)."""
+
+    @abstractmethod
+    def recent_objectives(self, count: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """Objetivos del más reciente al más antiguo (orden de inserción), saltando los `offset` primeros."""
+
+    @abstractmethod
+    def get_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        """Datos del primer plan guardado con ese ID (None si no existe)."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Número de entradas por sección."""
+
+    @abstractmethod
+    def entries(self, section: str) -> Iterator[Dict[str, Any]]:
+        """Entradas de una sección en orden de inserción (en streaming)."""
+
+    def add_batch(self, records: List[Tuple[str, Dict[str, Any]]]):
+        """Añade un lote de (sección, entrada) como una sola escritura cuando el backend lo permite."""
+        for section, entry in records:
+            self.add(section, entry)
+
+    @abstractmethod
+    def oldest(self, section: str, count: int) -> List[Tuple[Dict[str, Any], Optional[float]]]:
+        """Las `count` entradas más antiguas con su instante de creación (None si no se conoce)."""
+
+    @abstractmethod
+    def drop_oldest(self, section: str, count: int):
+        """Elimina las `count` entradas más antiguas (ya archivadas)."""
+
+    def sync(self):
+        """Lleva a disco lo escrito (fsync) si el backend no lo hace al confirmar."""
+
+    def set_durability(self, mode: str):
+        """Ajusta el backend al modo de durabilidad del escritor (none | batch | write)."""
+
+    def is_empty(self) -> bool:
+        return not any(self.counts().values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def close(self):
+        pass
+
+
+class LogBackend(MemoryBackend):
+    """Historial en memoria persistido en el log de solo-añadido (ver segment_log)."""
+
+    name = "log"
+
+    # Memoria JSON de versiones anteriores (se importa al crear el log)
+    MEMORY_FILE = os.path.join(MEMORY_DIR, "codi_memory.json")
+
+    def __init__(self, directory: str, segment_bytes: int = 4 * 1024 * 1024, compact_segments: int = 4):
+        self.log = SegmentLog(
+            directory,
+            fold=_apply,
+            initial_state=_empty_memory,
+            segment_bytes=segment_bytes,
+            compact_segments=compact_segments
+        )
+        self.memory: Dict[str, List[Dict[str, Any]]] = _empty_memory()
+        self._plans_by_id: Dict[str, Dict[str, Any]] = {}
+        self._load_memory()
+
+    def _load_memory(self):
+        """Carga el snapshot y reproduce los segmentos; importa la memoria JSON antigua si el log es nuevo."""
+        legacy = load_legacy_json(self.MEMORY_FILE) if self.log.is_empty() else None
+        try:
+            self.memory = self.log.replay()
+        except Exception as e:
+            logger.error(f"Error al cargar el log de memoria: {e}")
+            return
+        for section in SECTIONS:
+            self.memory.setdefault(section, [])
+        if legacy and any(legacy.values()):
+            self.memory = legacy
+            self.log.write_snapshot(legacy)
+            logger.info(f"Memoria JSON importada al log de segmentos ({self.log.directory}).")
+        for item in self.memory["plans"]:
+            self._plans_by_id.setdefault(item["plan_id"], item["data"])
+
+    def add(self, section: str, entry: Dict[str, Any]):
+        self.add_batch([(section, entry)])
+
+    def add_batch(self, records: List[Tuple[str, Dict[str, Any]]]):
+        self.log.append_many([{"section": section, "entry": entry} for section, entry in records])
+        for section, entry in records:
+            self.memory[section].append(entry)
+            if section == "plans":
+                self._plans_by_id.setdefault(entry["plan_id"], entry["data"])
+
+    def sync(self):
+        self.log.sync()
+
+    def oldest(self, section: str, count: int) -> List[Tuple[Dict[str, Any], Optional[float]]]:
+        return [(entry, None) for entry in self.memory[section][:count]]
+
+    def drop_oldest(self, section: str, count: int):
+        dropped = self.memory[section][:count]
+        self.log.append({"section": section, "drop": len(dropped)})
+        del self.memory[section][:len(dropped)]
+        if section == "plans":
+            for item in dropped:
+                if self._plans_by_id.get(item["plan_id"]) is item["data"]:
+                    del self._plans_by_id[item["plan_id"]]
+
+    def recent_objectives(self, count: int, offset: int = 0) -> List[Dict[str, Any]]:
+        objectives = self.memory["objectives"]
+        end = max(0, len(objectives) - offset)
+        return objectives[max(0, end - count):end][::-1]
+
+    def get_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        return self._plans_by_id.get(plan_id)
+
+    def counts(self) -> Dict[str, int]:
+        return {section: len(self.memory[section]) for section in SECTIONS}
+
+    def entries(self, section: str) -> Iterator[Dict[str, Any]]:
+        return iter(list(self.memory[section]))
+
+    def compact(self) -> int:
+        return self.log.compact()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "log": self.log.stats()}
+
+    def close(self):
+        self.log.close()
+
+
+class SQLiteBackend(MemoryBackend):
+    """Historial en SQLite local (WAL), seguro entre hilos."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS objectives ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, objective TEXT NOT NULL, timestamp TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, plan_id TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, plan_id TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            for section in SECTIONS:
+                # Bases creadas antes de los niveles de retención: añadir created_at
+                columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({section})")}
+                if "created_at" not in columns:
+                    self._conn.execute(f"ALTER TABLE {section} ADD COLUMN created_at REAL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_objectives_timestamp ON objectives(timestamp)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_plan_id ON plans(plan_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_plan_id ON results(plan_id)")
+            self._conn.commit()
+
+    @staticmethod
+    def _row(section: str, entry: Dict[str, Any]) -> tuple:
+        if section == "objectives":
+            return entry["objective"], entry["timestamp"], time.time()
+        return entry["plan_id"], json.dumps(entry["data"], ensure_ascii=False, default=str), time.time()
+
+    @staticmethod
+    def _insert_sql(section: str) -> str:
+        if section == "objectives":
+            return "INSERT INTO objectives (objective, timestamp, created_at) VALUES (?, ?, ?)"
+        if section in ("plans", "results"):
+            return f"INSERT INTO {section} (plan_id, data, created_at) VALUES (?, ?, ?)"
+        raise ValueError(f"Sección de memoria desconocida: {section}")
+
+    def add(self, section: str, entry: Dict[str, Any]):
+        self.add_many(section, [entry])
+
+    def add_many(self, section: str, entries: List[Dict[str, Any]]):
+        """Inserta varias entradas en una única transacción."""
+        self.add_batch([(section, entry) for entry in entries])
+
+    def add_batch(self, records: List[Tuple[str, Dict[str, Any]]]):
+        """Inserta el lote en una única transacción."""
+        rows = [(self._insert_sql(section), self._row(section, entry)) for section, entry in records]
+        with self._lock:
+            with self._conn:
+                for sql, row in rows:
+                    self._conn.execute(sql, row)
+
+    def oldest(self, section: str, count: int) -> List[Tuple[Dict[str, Any], Optional[float]]]:
+        if section not in SECTIONS:
+            raise ValueError(f"Sección de memoria desconocida: {section}")
+        columns = "objective, timestamp" if section == "objectives" else "plan_id, data"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns}, created_at FROM {section} ORDER BY id LIMIT ?", (count,)
+            ).fetchall()
+        if section == "objectives":
+            return [({"objective": first, "timestamp": second}, created_at) for first, second, created_at in rows]
+        return [({"plan_id": first, "data": json.loads(second)}, created_at) for first, second, created_at in rows]
+
+    def drop_oldest(self, section: str, count: int):
+        if section not in SECTIONS:
+            raise ValueError(f"Sección de memoria desconocida: {section}")
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    f"DELETE FROM {section} WHERE id IN (SELECT id FROM {section} ORDER BY id LIMIT ?)", (count,)
+                )
+
+    def set_durability(self, mode: str):
+        # Con WAL, synchronous=FULL hace fsync en cada commit (uno por lote en modo batch)
+        synchronous = "OFF" if mode == "none" else "FULL"
+        with self._lock:
+            self._conn.execute(f"PRAGMA synchronous={synchronous}")
+
+    def recent_objectives(self, count: int, offset: int = 0) -> List[Dict[str, Any]]:
+        # Orden de inserción (como LogBackend y los segmentos archivados), no el del timestamp
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT objective, timestamp FROM objectives ORDER BY id DESC LIMIT ? OFFSET ?",
+                (count, offset)
+            ).fetchall()
+        return [{"objective": objective, "timestamp": timestamp} for objective, timestamp in rows]
+
+    def get_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM plans WHERE plan_id = ? ORDER BY id LIMIT 1", (plan_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                section: self._conn.execute(f"SELECT COUNT(*) FROM {section}").fetchone()[0]
+                for section in SECTIONS
+            }
+
+    def entries(self, section: str, batch: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Recorre la sección por lotes de id (sin cargarla entera)."""
+        if section not in SECTIONS:
+            raise ValueError(f"Sección de memoria desconocida: {section}")
+        columns = "id, objective, timestamp" if section == "objectives" else "id, plan_id, data"
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM {section} WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch)
+                ).fetchall()
+            if not rows:
+                return
+            for row_id, first, second in rows:
+                if section == "objectives":
+                    yield {"objective": first, "timestamp": second}
+                else:
+                    yield {"plan_id": first, "data": json.loads(second)}
+            last_id = rows[-1][0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "path": self.path}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def load_legacy_json(path: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Memoria del archivo JSON de versiones anteriores (None si no existe o no es legible)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            memory = json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error al decodificar el archivo de memoria: {e}. Se inicializará una memoria vacía.")
+        return None
+    except Exception as e:
+        logger.error(f"Error al cargar el archivo de memoria: {e}")
+        return None
+    return {section: list(memory.get(section, [])) for section in SECTIONS}
+
+
+def backend_from_env() -> MemoryBackend:
+    """
+    Configuración:
+        CODI_MEMORY_BACKEND (sqlite | log)
+        CODI_MEMORY_DB ruta de la base SQLite
+        CODI_MEMORY_DIR directorio del log de segmentos
+        CODI_MEMORY_SEGMENT_BYTES / CODI_MEMORY_COMPACT_SEGMENTS (backend log)
+    """
+    kind = os.getenv("CODI_MEMORY_BACKEND", "sqlite").lower()
+    if kind == "log":
+        return LogBackend(
+            os.getenv("CODI_MEMORY_DIR", os.path.join(MEMORY_DIR, "codi_memory")),
+            segment_bytes=int(os.getenv("CODI_MEMORY_SEGMENT_BYTES", 4 * 1024 * 1024)),
+            compact_segments=int(os.getenv("CODI_MEMORY_COMPACT_SEGMENTS", 4))
+        )
+    if kind != "sqlite":
+        logger.error(f"CODI_MEMORY_BACKEND desconocido: {kind}. Se usa sqlite.")
+    backend = SQLiteBackend(os.getenv("CODI_MEMORY_DB", os.path.join(MEMORY_DIR, "codi_memory.sqlite")))
+    legacy = os.path.join(MEMORY_DIR, "codi_memory.json")
+    if backend.is_empty() and (load_legacy_json(legacy) or {}).get("objectives"):
+        logger.warning(
+            f"La base de memoria está vacía y existe {legacy}: migrarla con `python -m memory.migrate`."
+        )
+    return backend
@@ -1,98 +1,207 @@
 """
 CODI Core - Memory Store Module (FASE 3)
-Implementa una memoria persistente simple (JSON) para almacenar objetivos, planes y resultados.
+Implementa una memoria persistente para almacenar objetivos, planes y resultados.
+El almacenamiento lo resuelve un backend intercambiable (ver backends): SQLite
+indexado por defecto o el log JSONL por segmentos. Las escrituras se confirman
+en segundo plano por lotes (ver writer): la petición no espera al disco. Un
+índice BM25 (ver retrieval) permite recuperar la experiencia previa relevante.
+Los registros antiguos pasan a segmentos comprimidos con retención (ver tiers).
 """
 
-import json
-import os
 import logging
-from typing import Dict, Any, List
+import os
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from .backends import SECTIONS, MemoryBackend, backend_from_env
+from .retrieval import MemoryIndex
+from .tiers import ArchiveStore, TierPolicy
+from .writer import MemoryWriter
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+
 class MemoryStore:
     """
-    Almacén de memoria persistente basado en un archivo JSON.
+    Almacén de memoria persistente sobre un backend de almacenamiento.
     Guarda objetivos, planes y resultados para consulta futura.
     """
     
-    # Ruta del archivo de memoria
-    MEMORY_FILE = os.path.join(os.path.dirname(__file__), "codi_memory.json")
-    
-    def __init__(self):
-        self.memory: Dict[str, List[Dict[str, Any]]] = {
-            "objectives": [],
-            "plans": [],
-            "results": []
-        }
-        self._load_memory()
-        logger.info(f"MemoryStore inicializado. {len(self.memory['objectives'])} objetivos cargados.")
-
-    def _load_memory(self):
-        """Carga la memoria desde el archivo JSON si existe."""
-        if os.path.exists(self.MEMORY_FILE):
-            try:
-                with open(self.MEMORY_FILE, 'r') as f:
-                    self.memory = json.load(f)
-            except json.JSONDecodeError as e:
-                logger.error(f"Error al decodificar el archivo de memoria: {e}. Se inicializará una memoria vacía.")
-            except Exception as e:
-                logger.error(f"Error al cargar el archivo de memoria: {e}")
-        else:
-            logger.info("Archivo de memoria no encontrado. Se creará uno nuevo al guardar.")
-
-    def _save_memory(self):
-        """Guarda la memoria en el archivo JSON."""
+    # Segmentos comprimidos (niveles warm y cold)
+    ARCHIVE_DIR = os.getenv("CODI_MEMORY_ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "codi_memory_archive"))
+
+    def __init__(self, backend: MemoryBackend = None, writer: MemoryWriter = None,
+                 index: Optional[MemoryIndex] = None, use_index: bool = True,
+                 archive: Optional[ArchiveStore] = None, use_tiers: bool = None):
+        self.backend = backend or backend_from_env()
+        if use_tiers is None:
+            use_tiers = os.getenv("CODI_MEMORY_TIERS", "true").lower() == "true"
+        self.archive = (archive or ArchiveStore(self.ARCHIVE_DIR, TierPolicy.from_env())) if use_tiers else None
+        # Recuentos mantenidos: el resumen nunca consulta el backend ni lee segmentos.
+        # _hot son los registros confirmados en el nivel hot; _stored, todos los confirmados
+        # (un lote que el escritor no llega a confirmar no cuenta).
+        self._counts_lock = threading.Lock()
+        # Mueve registros entre niveles sin que una lectura los vea en ambos (o en ninguno)
+        self._tier_lock = threading.RLock()
+        counts = self.backend.counts()
+        archived = self.archive.counts() if self.archive is not None else {section: 0 for section in SECTIONS}
+        self._hot = dict(counts)
+        self._stored = {section: counts[section] + archived[section] for section in SECTIONS}
+        self.writer = writer or MemoryWriter.from_env(self.backend)
+        # El índice cubre el nivel hot: el historial hot previo al arranque lo indexa un
+        # hilo de fondo; cada lote nuevo, el escritor (antes de que _on_commit lo archive)
+        self.index = (index if index is not None else MemoryIndex.from_env()) if use_index else None
+        if self.index is not None:
+            self.writer.listeners.append(self.index.add_many)
+            self.index.build_async(self.backend, counts)
+        self.writer.listeners.append(self._on_commit)
+        logger.info(
+            f"MemoryStore inicializado ({self.backend.name}). "
+            f"{self._stored['objectives']} objetivos cargados."
+        )
+
+    def _append(self, section: str, entry: Dict[str, Any]):
+        """Encola la entrada para el escritor en segundo plano."""
         try:
-            with open(self.MEMORY_FILE, 'w') as f:
-                json.dump(self.memory, f, indent=2)
+            self.writer.submit(section, entry)
         except Exception as e:
-            logger.error(f"Error al guardar el archivo de memoria: {e}")
+            logger.error(f"Error al guardar en la memoria: {e}")
+
+    def _on_commit(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Tras cada lote confirmado (hilo escritor): recuentos y paso de registros a segmentos."""
+        with self._counts_lock:
+            for section, _ in batch:
+                self._hot[section] += 1
+                self._stored[section] += 1
+        if self.archive is not None:
+            self._demote()
+
+    def _demote(self):
+        """
+        Archiva los registros hot más antiguos por encima de hot_max (y los retira
+        del índice) y aplica la retención. Espera a que el índice termine de
+        construirse: hasta entonces no sabe qué documentos son los más antiguos.
+        """
+        if self.index is not None and not self.index.ready:
+            return
+        policy = self.archive.policy
+        for section in SECTIONS:
+            while self._hot[section] >= policy.hot_max + policy.segment_records:
+                with self._tier_lock:
+                    records = self.backend.oldest(section, policy.segment_records)
+                    if not records:
+                        break
+                    self.archive.archive(section, records)
+                    self.backend.drop_oldest(section, len(records))
+                    if self.index is not None:
+                        self.index.drop_oldest(section, len(records))
+                    with self._counts_lock:
+                        self._hot[section] -= len(records)
+        deleted = self.archive.enforce_retention()
+        with self._counts_lock:
+            for section, count in deleted.items():
+                self._stored[section] -= count
+
+    def _read(self):
+        """Las lecturas ven las escrituras ya encoladas (espera al escritor solo si hay pendientes)."""
+        if self.writer.pending:
+            self.writer.flush()
 
     def add_objective(self, objective: str, timestamp: str):
         """Agrega un objetivo ejecutado a la memoria."""
-        self.memory["objectives"].append({
+        self._append("objectives", {
             "objective": objective,
             "timestamp": timestamp
         })
-        self._save_memory()
 
     def add_plan(self, plan_id: str, plan_data: Dict[str, Any]):
         """Agrega un plan generado a la memoria."""
-        self.memory["plans"].append({
+        self._append("plans", {
             "plan_id": plan_id,
             "data": plan_data
         })
-        self._save_memory()
 
     def add_result(self, plan_id: str, result_data: Dict[str, Any]):
         """Agrega un resultado final a la memoria."""
-        self.memory["results"].append({
+        self._append("results", {
             "plan_id": plan_id,
             "data": result_data
         })
-        self._save_memory()
 
-    def get_recent_objectives(self, count: int = 5) -> List[Dict[str, Any]]:
-        """Obtiene los N objetivos más recientes."""
-        return self.memory["objectives"][-count:][::-1] # Últimos N, en orden descendente
+    def get_recent_objectives(self, count: int = 5, offset: int = 0) -> List[Dict[str, Any]]:
+        """Obtiene los N objetivos más recientes (en orden descendente), paginados con offset."""
+        self._read()
+        with self._tier_lock:
+            hot = self._hot["objectives"]
+            objectives = self.backend.recent_objectives(count, offset) if offset < hot else []
+            if len(objectives) < count and self.archive is not None:
+                objectives += self.archive.recent(
+                    "objectives", count - len(objectives), max(0, offset - hot)
+                )
+        return objectives
 
     def get_plan_by_id(self, plan_id: str) -> Dict[str, Any] | None:
         """Obtiene un plan por su ID."""
-        for item in self.memory["plans"]:
-            if item["plan_id"] == plan_id:
-                return item["data"]
-        return None
+        self._read()
+        with self._tier_lock:
+            plan = self.backend.get_plan(plan_id)
+            if plan is None and self.archive is not None:
+                plan = self.archive.get_plan(plan_id)
+        return plan
 
     def get_memory_summary(self) -> Dict[str, int]:
-        """Retorna un resumen del contenido de la memoria."""
+        """Retorna un resumen del contenido de la memoria (recuentos de lo ya confirmado, sin E/S)."""
+        with self._counts_lock:
+            return {
+                "total_objectives": self._stored["objectives"],
+                "total_plans": self._stored["plans"],
+                "total_results": self._stored["results"]
+            }
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Entradas del historial más relevantes para la consulta (vacío sin índice)."""
+        return self.index.search(query, k) if self.index is not None else []
+
+    def context_block(self, query: str, max_tokens: int = 300) -> str:
+        """Bloque de experiencia previa para el planner, acotado en tokens ('' si no hay)."""
+        if self.index is None or max_tokens <= 0:
+            return ""
+        return self.index.context_block(query, max_tokens)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se confirmen las escrituras encoladas."""
+        return self.writer.flush(timeout)
+
+    def stats(self) -> Dict[str, Any]:
         return {
-            "total_objectives": len(self.memory["objectives"]),
-            "total_plans": len(self.memory["plans"]),
-            "total_results": len(self.memory["results"])
+            **self.backend.stats(),
+            "writer": self.writer.stats(),
+            "index": self.index.stats() if self.index is not None else {"enabled": False},
+            "tiers": {
+                "hot": dict(self._hot),
+                "archive": self.archive.stats() if self.archive is not None else {"enabled": False}
+            }
         }
 
+    def close(self):
+        """Confirma lo pendiente (apagado ordenado) y cierra el backend."""
+        self.writer.close()
+        self.backend.close()
+
+
+_memory_store: Optional[MemoryStore] = None
+_memory_store_lock = threading.Lock()
+
+
+def get_memory_store() -> MemoryStore:
+    """Instancia global de la memoria (un solo escritor por proceso)."""
+    global _memory_store
+    with _memory_store_lock:
+        if _memory_store is None:
+            _memory_store = MemoryStore()
+        return _memory_store
+
 # Ejemplo de uso (solo para pruebas internas)
 if __name__ == "__main__":
     store = MemoryStore()
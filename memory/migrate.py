@@ -0,0 +1,84 @@
+"""
+Migración de la memoria de CODI a la base SQLite.
+
+Convierte un codi_memory.json (formato anterior) o un directorio del log de
+segmentos en la base SQLite indexada del backend por defecto. La base destino
+debe estar vacía salvo con --append.
+
+Uso:
+    python -m memory.migrate --source memory/codi_memory.json --target memory/codi_memory.sqlite
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+from .backends import SECTIONS, LogBackend, SQLiteBackend, load_legacy_json
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def migrate(source: str, target: str, append: bool = False) -> dict:
+    """
+    Copia objetivos, planes y resultados de `source` (archivo JSON o directorio
+    del log) a la base SQLite `target`, en lotes transaccionales.
+
+    Returns:
+        dict: Entradas migradas por sección
+    """
+    if os.path.isdir(source):
+        source_backend = LogBackend(source)
+        memory = {section: source_backend.entries(section) for section in SECTIONS}
+    else:
+        source_backend = None
+        memory = load_legacy_json(source)
+        if memory is None:
+            raise ValueError(f"No se pudo leer la memoria de origen: {source}")
+
+    destination = SQLiteBackend(target)
+    try:
+        if not append and not destination.is_empty():
+            raise ValueError(f"La base destino no está vacía: {target} (usar --append)")
+        migrated = {}
+        for section in SECTIONS:
+            migrated[section] = 0
+            batch = []
+            for entry in memory[section]:
+                batch.append(entry)
+                if len(batch) >= BATCH_SIZE:
+                    destination.add_many(section, batch)
+                    migrated[section] += len(batch)
+                    batch = []
+            if batch:
+                destination.add_many(section, batch)
+                migrated[section] += len(batch)
+        return migrated
+    finally:
+        destination.close()
+        if source_backend is not None:
+            source_backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_dir = os.path.dirname(__file__)
+    parser.add_argument("--source", default=os.path.join(default_dir, "codi_memory.json"),
+                        help="codi_memory.json o directorio del log de segmentos")
+    parser.add_argument("--target", default=os.getenv("CODI_MEMORY_DB", os.path.join(default_dir, "codi_memory.sqlite")),
+                        help="Base SQLite destino")
+    parser.add_argument("--append", action="store_true", help="Añadir aunque la base destino tenga datos")
+    args = parser.parse_args()
+
+    try:
+        migrated = migrate(args.source, args.target, append=args.append)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Migrado {args.source} -> {args.target}: " + ", ".join(f"{k}={v}" for k, v in migrated.items()))
+
+
+if __name__ == "__main__":
+    main()
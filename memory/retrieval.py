@@ -0,0 +1,290 @@
+"""
+CODI Memory - Retrieval Module
+Índice invertido local (BM25, solo CPU) sobre el historial de la memoria.
+
+Cada objetivo, plan y resultado guardado es un documento. El índice se construye
+en segundo plano al arrancar y se actualiza de forma incremental con cada lote
+que confirma el escritor. Las consultas recorren solo las listas de los términos
+de la consulta (de la más rara a la más común; los términos casi universales se
+omiten cuando ya hay candidatos y de las listas muy largas solo se puntúan las
+entradas más recientes), por lo que responden en milisegundos aunque el
+historial tenga millones de entradas.
+
+El índice cubre exactamente el nivel hot de la memoria: al arrancar se indexan
+los registros hot y, cuando MemoryStore pasa los más antiguos a segmentos
+comprimidos, drop_oldest() los retira (marcas de borrado que una compactación
+periódica elimina de las listas). Así su tamaño está acotado por el nivel hot y
+el resultado de una búsqueda no depende de cuándo arrancó el proceso.
+
+context_block() produce un bloque compacto de experiencia previa, acotado en
+tokens, para inyectarlo en el prompt del planner.
+"""
+
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w{2,}")
+
+STOPWORDS = frozenset(
+    "de la el en y a los las del un una por con para que se al lo es su como "
+    "the of and to in for on with is an by or from at this that".split()
+)
+
+SECTION_LABELS = {"objectives": "objetivo", "plans": "plan", "results": "resultado"}
+
+
+def tokenize(text: str) -> List[str]:
+    """Términos en minúsculas, sin acentos ni palabras vacías."""
+    normalized = unicodedata.normalize("NFKD", (text or "").lower())
+    normalized = "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    return [token for token in TOKEN_PATTERN.findall(normalized) if token not in STOPWORDS]
+
+
+def _flatten(value: Any, parts: List[str], limit: int):
+    """Textos de un valor JSON (valores de cadena, recursivo) hasta `limit` caracteres."""
+    if sum(len(part) for part in parts) >= limit:
+        return
+    if isinstance(value, str):
+        parts.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _flatten(item, parts, limit)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _flatten(item, parts, limit)
+
+
+def entry_text(section: str, entry: Dict[str, Any], limit: int = 2000) -> str:
+    """Texto indexable de una entrada de la memoria."""
+    if section == "objectives":
+        return entry.get("objective", "")
+    parts: List[str] = []
+    if section == "results" and isinstance(entry.get("data"), dict):
+        parts.append(str(entry["data"].get("status", "")))
+    _flatten(entry.get("data"), parts, limit)
+    return " ".join(parts)[:limit]
+
+
+class MemoryIndex:
+    """Índice BM25 incremental, seguro entre hilos."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_df: float = 0.2, max_postings: int = 20000,
+                 snippet_chars: int = 160, compact_min: int = 1000):
+        self.k1 = k1
+        self.b = b
+        # Términos presentes en más de esta fracción de documentos solo puntúan si no hay otros
+        self.max_df = max_df
+        # Entradas (las más recientes) que se puntúan como máximo por término
+        self.max_postings = max_postings
+        self.snippet_chars = snippet_chars
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_len = array("I")
+        self._docs: List[Optional[Tuple[str, Optional[str], str]]] = []
+        self._alive = bytearray()
+        # Documentos de cada sección, del más antiguo al más reciente (para drop_oldest)
+        self._sections: Dict[str, deque] = {}
+        self._dead = 0
+        self._total_len = 0
+        # Las listas se compactan cuando los borrados superan a los vivos (y a este mínimo)
+        self.compact_min = compact_min
+        self.ready = False
+        self.counters = {"queries": 0, "query_seconds": 0.0, "removed": 0, "compactions": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["MemoryIndex"]:
+        """
+        Configuración:
+            CODI_MEMORY_INDEX (true/false)
+            CODI_MEMORY_INDEX_SNIPPET caracteres de cada entrada en el bloque de contexto
+        """
+        if os.getenv("CODI_MEMORY_INDEX", "true").lower() != "true":
+            return None
+        return cls(snippet_chars=int(os.getenv("CODI_MEMORY_INDEX_SNIPPET", 160)))
+
+    def __len__(self) -> int:
+        return len(self._docs) - self._dead
+
+    def add(self, section: str, entry: Dict[str, Any]):
+        """Indexa una entrada (objectives, plans o results)."""
+        self._add(section, entry, track=True)
+
+    def _add(self, section: str, entry: Dict[str, Any], track: bool) -> int:
+        text = entry_text(section, entry)
+        terms = tokenize(text)
+        snippet = re.sub(r"\s+", " ", text).strip()[:self.snippet_chars]
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        with self._lock:
+            doc_id = len(self._docs)
+            self._docs.append((section, entry.get("plan_id"), snippet))
+            self._alive.append(1)
+            self._doc_len.append(len(terms))
+            self._total_len += len(terms)
+            for term, tf in frequencies.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("H"))
+                postings[0].append(doc_id)
+                postings[1].append(min(tf, 65535))
+            if track:
+                self._sections.setdefault(section, deque()).append(doc_id)
+        return doc_id
+
+    def add_many(self, records: Iterable[Tuple[str, Dict[str, Any]]]):
+        for section, entry in records:
+            self.add(section, entry)
+
+    def drop_oldest(self, section: str, count: int):
+        """Retira del índice las `count` entradas más antiguas de la sección."""
+        with self._lock:
+            doc_ids = self._sections.get(section)
+            if not doc_ids:
+                return
+            for _ in range(min(count, len(doc_ids))):
+                doc_id = doc_ids.popleft()
+                self._alive[doc_id] = 0
+                self._docs[doc_id] = None
+                self._total_len -= self._doc_len[doc_id]
+                self._dead += 1
+                self.counters["removed"] += 1
+            if self._dead >= max(self.compact_min, len(self._docs) - self._dead):
+                self._compact()
+
+    def _compact(self):
+        """Renumera los documentos vivos y elimina los borrados de las listas. Requiere self._lock."""
+        remap = array("I", [0]) * len(self._docs)
+        docs: List[Optional[Tuple[str, Optional[str], str]]] = []
+        doc_len = array("I")
+        for doc_id, alive in enumerate(self._alive):
+            if alive:
+                remap[doc_id] = len(docs)
+                docs.append(self._docs[doc_id])
+                doc_len.append(self._doc_len[doc_id])
+        alive_flags = self._alive
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (doc_ids, tfs) in self._postings.items():
+            new_ids, new_tfs = array("I"), array("H")
+            for doc_id, tf in zip(doc_ids, tfs):
+                if alive_flags[doc_id]:
+                    new_ids.append(remap[doc_id])
+                    new_tfs.append(tf)
+            if new_ids:
+                postings[term] = (new_ids, new_tfs)
+        self._sections = {
+            section: deque(remap[doc_id] for doc_id in doc_ids) for section, doc_ids in self._sections.items()
+        }
+        self._postings = postings
+        self._docs = docs
+        self._doc_len = doc_len
+        self._alive = bytearray(b"\x01") * len(docs)
+        self._dead = 0
+        self.counters["compactions"] += 1
+
+    def build(self, backend, counts: Dict[str, int]):
+        """
+        Indexa las primeras `counts[sección]` entradas del backend (el nivel hot al
+        arrancar). Van por delante de las que el escritor indexa mientras tanto.
+        """
+        started = time.perf_counter()
+        try:
+            for section, total in counts.items():
+                doc_ids: List[int] = []
+                for position, entry in enumerate(backend.entries(section)):
+                    if position >= total:
+                        break
+                    doc_ids.append(self._add(section, entry, track=False))
+                with self._lock:
+                    self._sections.setdefault(section, deque()).extendleft(reversed(doc_ids))
+        except Exception as e:
+            logger.error(f"[MemoryIndex] Error al construir el índice: {e}")
+        finally:
+            self.ready = True
+        logger.info(f"[MemoryIndex] {len(self)} entradas indexadas en {time.perf_counter() - started:.2f}s")
+
+    def build_async(self, backend, counts: Dict[str, int]):
+        threading.Thread(
+            target=self.build, args=(backend, counts), name="codi-memory-index", daemon=True
+        ).start()
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Las k entradas más relevantes para la consulta (BM25)."""
+        started = time.perf_counter()
+        terms = set(tokenize(query))
+        with self._lock:
+            total_docs = len(self._docs) - self._dead
+            if not terms or not total_docs:
+                return []
+            avg_len = self._total_len / total_docs or 1.0
+            candidates = sorted(
+                (len(self._postings[term][0]), term) for term in terms if term in self._postings
+            )
+            scores: Dict[int, float] = {}
+            for df, term in candidates:
+                if scores and df > self.max_df * total_docs:
+                    break
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                doc_ids, tfs = self._postings[term]
+                if df > self.max_postings:
+                    doc_ids, tfs = doc_ids[-self.max_postings:], tfs[-self.max_postings:]
+                k1, b, doc_len, alive = self.k1, self.b, self._doc_len, self._alive
+                for doc_id, tf in zip(doc_ids, tfs):
+                    if not alive[doc_id]:
+                        continue
+                    norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+            hits = [
+                {"section": self._docs[doc_id][0], "plan_id": self._docs[doc_id][1],
+                 "text": self._docs[doc_id][2], "score": round(score, 4)}
+                for doc_id, score in best
+            ]
+            self.counters["queries"] += 1
+            self.counters["query_seconds"] += time.perf_counter() - started
+        return hits
+
+    def context_block(self, query: str, max_tokens: int = 300, k: int = 8) -> str:
+        """
+        Bloque de experiencia previa para el planner, con las entradas más
+        relevantes mientras quepan en max_tokens (estimación: 4 caracteres/token).
+        Cadena vacía si no hay nada relevante.
+        """
+        header = "Experiencia previa relevante (memoria de CODI):"
+        lines: List[str] = []
+        budget = max_tokens * 4 - len(header)
+        for hit in self.search(query, k):
+            label = SECTION_LABELS.get(hit["section"], hit["section"])
+            if hit["plan_id"]:
+                label = f"{label} {hit['plan_id']}"
+            line = f"- [{label}] {hit['text']}"
+            if len(line) + 1 > budget:
+                break
+            lines.append(line)
+            budget -= len(line) + 1
+        return "\n".join([header] + lines) if lines else ""
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queries = self.counters["queries"]
+            return {
+                "ready": self.ready,
+                "documents": len(self._docs) - self._dead,
+                "deleted_pending_compaction": self._dead,
+                "terms": len(self._postings),
+                "queries": queries,
+                "removed": self.counters["removed"],
+                "compactions": self.counters["compactions"],
+                "avg_query_ms": self.counters["query_seconds"] * 1000 / queries if queries else 0.0
+            }
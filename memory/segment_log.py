@@ -0,0 +1,274 @@
+"""
+CODI Memory - Segment Log Module
+Log de solo-añadido en segmentos JSONL para la memoria persistente.
+
+Cada mutación se añade como una línea JSON al segmento activo (coste constante,
+independiente del tamaño del historial). Al superar `segment_bytes` el segmento
+se sella y se abre otro. Una compactación en segundo plano pliega los segmentos
+sellados en un snapshot (escritura atómica) y los borra. Al arrancar se carga el
+snapshot y se reproducen los segmentos posteriores.
+
+Tolerancia a caídas: una línea final incompleta (escritura interrumpida) se
+descarta y se recorta del segmento activo; un snapshot solo sustituye al anterior
+mediante os.replace y los segmentos plegados se ignoran en la reproducción aunque
+no llegaran a borrarse.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{8})\.jsonl$")
+SNAPSHOT_FILE = "snapshot.json"
+
+
+class SegmentLog:
+    """
+    Log de registros en segmentos JSONL con snapshot, seguro entre hilos.
+
+    Los registros son dicts serializables; `fold(state, record)` aplica un registro
+    al estado y se usa tanto en la reproducción como en la compactación.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fold: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        initial_state: Callable[[], Dict[str, Any]],
+        segment_bytes: int = 4 * 1024 * 1024,
+        compact_segments: int = 4
+    ):
+        self.directory = directory
+        self.fold = fold
+        self.initial_state = initial_state
+        self.segment_bytes = segment_bytes
+        self.compact_segments = compact_segments
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._compacting = False
+        # Serializa las escrituras del snapshot (compactación de fondo, compact() y write_snapshot())
+        self._snapshot_lock = threading.Lock()
+        self._file = None
+        self._active_id = 0
+        self._active_size = 0
+        self.counters = {"appends": 0, "rollovers": 0, "compactions": 0, "torn_records": 0}
+        os.makedirs(self.directory, exist_ok=True)
+
+    # --- Arranque ------------------------------------------------------
+
+    def replay(self) -> Dict[str, Any]:
+        """
+        Reconstruye el estado: snapshot + segmentos posteriores, y abre el segmento
+        activo para seguir añadiendo. Se llama una vez, antes de append().
+        """
+        snapshot_segment, state = self._read_snapshot()
+        segments = [(seg_id, path) for seg_id, path in self._segments() if seg_id > snapshot_segment]
+        for index, (seg_id, path) in enumerate(segments):
+            active = index == len(segments) - 1
+            for record in self._read_segment(path, truncate_torn=active):
+                self.fold(state, record)
+
+        with self._lock:
+            if segments:
+                self._active_id = segments[-1][0]
+            else:
+                self._active_id = snapshot_segment + 1
+            self._open_active()
+        return state
+
+    def is_empty(self) -> bool:
+        """True si no hay snapshot ni segmentos (directorio nuevo)."""
+        return not os.path.exists(self._snapshot_path()) and not self._segments()
+
+    def write_snapshot(self, state: Dict[str, Any]):
+        """
+        Escribe un snapshot que cubre todos los segmentos anteriores al activo
+        (p. ej. para importar una memoria existente en un directorio nuevo).
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                covered = self._active_id - 1
+            self._write_snapshot(covered, state)
+
+    # --- Escritura -----------------------------------------------------
+
+    def append(self, record: Dict[str, Any]):
+        """Añade un registro al segmento activo (una sola escritura por línea)."""
+        self.append_many([record])
+
+    def append_many(self, records: List[Dict[str, Any]]):
+        """Añade varios registros con una sola escritura (un lote no se parte entre segmentos)."""
+        data = b"".join(
+            (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8") for record in records
+        )
+        compact = False
+        with self._lock:
+            if self._active_size and self._active_size + len(data) > self.segment_bytes:
+                self._rollover()
+                compact = self._sealed_count() >= self.compact_segments
+            self._file.write(data)
+            self._file.flush()
+            self._active_size += len(data)
+            self.counters["appends"] += len(records)
+        if compact:
+            self.compact_async()
+
+    def sync(self):
+        """fsync del segmento activo."""
+        with self._lock:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # --- Compactación --------------------------------------------------
+
+    def compact_async(self):
+        """Lanza la compactación en un hilo de fondo (si no hay otra en curso)."""
+        with self._compact_lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self._compact_background, name="codi-memory-compact", daemon=True).start()
+
+    def _compact_background(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"[SegmentLog] Error en la compactación: {e}")
+        finally:
+            with self._compact_lock:
+                self._compacting = False
+
+    def compact(self) -> int:
+        """
+        Pliega los segmentos sellados en un nuevo snapshot y los borra. Trabaja
+        solo con archivos en disco: las escrituras siguen en el segmento activo.
+        Las compactaciones concurrentes se serializan (la segunda no encuentra nada que plegar).
+
+        Returns:
+            int: Número de segmentos plegados
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                active_id = self._active_id
+            snapshot_segment, state = self._read_snapshot()
+            sealed = [(seg_id, path) for seg_id, path in self._segments() if snapshot_segment < seg_id < active_id]
+            if not sealed:
+                return 0
+
+            for _, path in sealed:
+                for record in self._read_segment(path, truncate_torn=False):
+                    self.fold(state, record)
+            self._write_snapshot(sealed[-1][0], state)
+            for _, path in sealed:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"[SegmentLog] No se pudo borrar el segmento plegado {path}: {e}")
+
+        with self._lock:
+            self.counters["compactions"] += 1
+        logger.info(f"[SegmentLog] {len(sealed)} segmentos plegados en el snapshot")
+        return len(sealed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "active_segment": self._active_id,
+                "active_segment_bytes": self._active_size,
+                "sealed_segments": self._sealed_count(),
+                **self.counters
+            }
+
+    # --- Internos ------------------------------------------------------
+
+    def _segment_path(self, seg_id: int) -> str:
+        return os.path.join(self.directory, f"segment-{seg_id:08d}.jsonl")
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        """Segmentos en disco ordenados por id."""
+        segments = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def _sealed_count(self) -> int:
+        """Requiere self._lock."""
+        return sum(1 for seg_id, _ in self._segments() if seg_id < self._active_id)
+
+    def _open_active(self):
+        """Abre el segmento activo en modo añadido. Requiere self._lock."""
+        path = self._segment_path(self._active_id)
+        self._file = open(path, "ab")
+        self._active_size = self._file.tell()
+
+    def _rollover(self):
+        """Sella el segmento activo y abre el siguiente. Requiere self._lock."""
+        self._file.close()
+        self._active_id += 1
+        self._open_active()
+        self.counters["rollovers"] += 1
+
+    def _read_snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        """(último segmento plegado, estado) del snapshot; (0, estado inicial) si no hay."""
+        path = self._snapshot_path()
+        if not os.path.exists(path):
+            return 0, self.initial_state()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            return int(snapshot["segment"]), snapshot["state"]
+        except (ValueError, KeyError, OSError) as e:
+            logger.error(f"[SegmentLog] Snapshot ilegible {path}: {e}. Se reproducen solo los segmentos.")
+            return 0, self.initial_state()
+
+    def _write_snapshot(self, covered_segment: int, state: Dict[str, Any]):
+        """Escritura atómica: archivo temporal + fsync + os.replace."""
+        path = self._snapshot_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segment": covered_segment, "state": state}, f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_segment(self, path: str, truncate_torn: bool) -> Iterator[Dict[str, Any]]:
+        """
+        Registros de un segmento. Una línea incompleta o corrupta al final del
+        segmento activo se recorta para que las siguientes escrituras no se mezclen.
+        """
+        good_offset = 0
+        with open(path, "rb") as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("línea incompleta")
+                    record = json.loads(raw)
+                except ValueError as e:
+                    with self._lock:
+                        self.counters["torn_records"] += 1
+                    logger.warning(f"[SegmentLog] Registro descartado en {os.path.basename(path)}: {e}")
+                    if truncate_torn:
+                        break
+                    continue
+                good_offset += len(raw)
+                yield record
+        if truncate_torn and good_offset < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+            logger.warning(f"[SegmentLog] Segmento {os.path.basename(path)} recortado a {good_offset} bytes")
@@ -0,0 +1,290 @@
+"""
+CODI Memory - Tiers Module
+Niveles de almacenamiento del historial de la memoria:
+
+- hot:  los registros más recientes, sin comprimir en el backend principal
+        (SQLite o log) e indexados (índices del backend + índice BM25).
+- warm: segmentos comprimidos (gzip JSONL) inmutables más recientes; el manifiesto
+        guarda sus plan_id, así que get_plan_by_id abre solo el segmento que lo tiene.
+- cold: segmentos comprimidos más antiguos; el manifiesto solo guarda recuento,
+        bytes y rango temporal y las búsquedas los leen bajo demanda.
+
+Los segmentos nunca se reescriben: la retención (edad, número de registros y
+bytes) borra segmentos completos, de los más antiguos a los más recientes.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .backends import SECTIONS
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def record_time(entry: Dict[str, Any], created_at: Optional[float] = None) -> Optional[float]:
+    """
+    Instante de un registro para la retención por edad: su propio timestamp ISO
+    (objetivos) o el de sus datos (completed_at / created_at / timestamp); si no
+    tiene, el instante de creación que conoce el backend (None si tampoco).
+    """
+    candidates = [entry.get("timestamp")]
+    data = entry.get("data")
+    if isinstance(data, dict):
+        candidates += [data.get("completed_at"), data.get("created_at"), data.get("timestamp")]
+    for value in candidates:
+        if isinstance(value, str) and value:
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                continue
+    return created_at
+
+
+@dataclass
+class TierPolicy:
+    """Límites de cada nivel y retención del historial archivado."""
+    hot_max: int = 10000          # registros por sección en el nivel hot
+    segment_records: int = 1000   # registros por segmento comprimido
+    warm_segments: int = 8        # segmentos más recientes (por sección) con plan_id en el manifiesto
+    max_age_days: float = 0       # 0 = sin límite
+    max_records: int = 0          # registros archivados en total (0 = sin límite)
+    max_bytes: int = 0            # bytes comprimidos en total (0 = sin límite)
+
+    @classmethod
+    def from_env(cls) -> "TierPolicy":
+        """
+        Configuración:
+            CODI_MEMORY_HOT_MAX registros por sección sin comprimir
+            CODI_MEMORY_SEGMENT_RECORDS registros por segmento comprimido
+            CODI_MEMORY_WARM_SEGMENTS segmentos por sección con búsqueda por plan_id
+            CODI_MEMORY_RETENTION_DAYS / CODI_MEMORY_RETENTION_RECORDS / CODI_MEMORY_RETENTION_BYTES
+        """
+        return cls(
+            hot_max=int(os.getenv("CODI_MEMORY_HOT_MAX", 10000)),
+            segment_records=int(os.getenv("CODI_MEMORY_SEGMENT_RECORDS", 1000)),
+            warm_segments=int(os.getenv("CODI_MEMORY_WARM_SEGMENTS", 8)),
+            max_age_days=float(os.getenv("CODI_MEMORY_RETENTION_DAYS", 0)),
+            max_records=int(os.getenv("CODI_MEMORY_RETENTION_RECORDS", 0)),
+            max_bytes=int(os.getenv("CODI_MEMORY_RETENTION_BYTES", 0))
+        )
+
+
+class ArchiveStore:
+    """Segmentos comprimidos (warm y cold) con su manifiesto, seguro entre hilos."""
+
+    def __init__(self, directory: str, policy: TierPolicy = None):
+        self.directory = directory
+        self.policy = policy or TierPolicy()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._manifest = self._load_manifest()
+        self._plan_segments: Dict[str, str] = {}
+        for segment in self._manifest["segments"]:
+            for plan_id in segment.get("plan_ids", []):
+                self._plan_segments.setdefault(plan_id, segment["name"])
+        self.counters = {"archived_records": 0, "deleted_segments": 0, "deleted_records": 0, "segment_reads": 0}
+
+    # --- Escritura -----------------------------------------------------
+
+    def archive(self, section: str, records: List[Tuple[Dict[str, Any], Optional[float]]]) -> Dict[str, Any]:
+        """
+        Escribe un segmento comprimido inmutable con las entradas (más antigua
+        primero) y su instante de creación (None si el backend no lo conoce). El
+        rango temporal del segmento sale de record_time().
+        """
+        times = [record_time(entry, created_at) for entry, created_at in records]
+        # Sin instante conocido: el más reciente del segmento (los registros son contiguos) o ahora
+        known = [value for value in times if value is not None]
+        fallback = max(known) if known else time.time()
+        times = [value if value is not None else fallback for value in times]
+        with self._lock:
+            seq = self._manifest["next_seq"]
+            self._manifest["next_seq"] = seq + 1
+        name = f"{section}-{seq:08d}.jsonl.gz"
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for entry, _ in records:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, path)
+
+        segment = {
+            "name": name,
+            "section": section,
+            "seq": seq,
+            "count": len(records),
+            "bytes": os.path.getsize(path),
+            "oldest_at": min(times),
+            "newest_at": max(times)
+        }
+        if section == "plans":
+            segment["plan_ids"] = sorted({entry["plan_id"] for entry, _ in records})
+        with self._lock:
+            self._manifest["segments"].append(segment)
+            for plan_id in segment.get("plan_ids", []):
+                self._plan_segments.setdefault(plan_id, name)
+            self._demote_to_cold(section)
+            self._write_manifest()
+            self.counters["archived_records"] += len(records)
+        return segment
+
+    def enforce_retention(self) -> Dict[str, int]:
+        """
+        Borra los segmentos más antiguos que excedan la edad, los registros o los
+        bytes permitidos.
+
+        Returns:
+            Dict[str, int]: Registros borrados por sección
+        """
+        policy = self.policy
+        deleted = {section: 0 for section in SECTIONS}
+        with self._lock:
+            segments = sorted(self._manifest["segments"], key=lambda s: s["seq"])
+            total_records = sum(s["count"] for s in segments)
+            total_bytes = sum(s["bytes"] for s in segments)
+            cutoff = time.time() - policy.max_age_days * 86400 if policy.max_age_days else None
+            doomed = []
+            for segment in segments:
+                expired = cutoff is not None and segment["newest_at"] < cutoff
+                too_many = policy.max_records and total_records > policy.max_records
+                too_big = policy.max_bytes and total_bytes > policy.max_bytes
+                if not (expired or too_many or too_big):
+                    break
+                doomed.append(segment)
+                total_records -= segment["count"]
+                total_bytes -= segment["bytes"]
+            if not doomed:
+                return deleted
+            names = {segment["name"] for segment in doomed}
+            self._manifest["segments"] = [s for s in self._manifest["segments"] if s["name"] not in names]
+            self._plan_segments = {
+                plan_id: name for plan_id, name in self._plan_segments.items() if name not in names
+            }
+            self._write_manifest()
+            for segment in doomed:
+                deleted[segment["section"]] += segment["count"]
+            self.counters["deleted_segments"] += len(doomed)
+            self.counters["deleted_records"] += sum(deleted.values())
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError as e:
+                logger.warning(f"[ArchiveStore] No se pudo borrar el segmento {name}: {e}")
+        logger.info(f"[ArchiveStore] Retención: {len(doomed)} segmentos borrados ({deleted})")
+        return deleted
+
+    # --- Lectura (bajo demanda) ----------------------------------------
+
+    def get_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        """Plan archivado: primero el segmento warm indexado; si no, los cold del más reciente al más antiguo."""
+        with self._lock:
+            name = self._plan_segments.get(plan_id)
+            cold = [
+                s["name"] for s in sorted(self._manifest["segments"], key=lambda s: s["seq"], reverse=True)
+                if s["section"] == "plans" and "plan_ids" not in s
+            ]
+        candidates = [name] if name else cold
+        for candidate in candidates:
+            for entry in self._read_segment(candidate):
+                if entry.get("plan_id") == plan_id:
+                    return entry["data"]
+        return None
+
+    def recent(self, section: str, count: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Entradas archivadas de la más reciente a la más antigua. Los recuentos del
+        manifiesto permiten saltar segmentos completos sin descomprimirlos.
+        """
+        with self._lock:
+            segments = sorted(
+                (s for s in self._manifest["segments"] if s["section"] == section),
+                key=lambda s: s["seq"], reverse=True
+            )
+        results: List[Dict[str, Any]] = []
+        for segment in segments:
+            if len(results) >= count:
+                break
+            if offset >= segment["count"]:
+                offset -= segment["count"]
+                continue
+            entries = list(self._read_segment(segment["name"]))[::-1]
+            taken = entries[offset:offset + count - len(results)]
+            results.extend(taken)
+            offset = 0
+        return results
+
+    def counts(self) -> Dict[str, int]:
+        """Registros archivados por sección (del manifiesto, sin leer segmentos)."""
+        with self._lock:
+            counts = {section: 0 for section in SECTIONS}
+            for segment in self._manifest["segments"]:
+                counts[segment["section"]] += segment["count"]
+            return counts
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = self._manifest["segments"]
+            return {
+                "directory": self.directory,
+                "segments": len(segments),
+                "warm_segments": sum(1 for s in segments if s.get("warm")),
+                "cold_segments": sum(1 for s in segments if not s.get("warm")),
+                "archived_records": sum(s["count"] for s in segments),
+                "compressed_bytes": sum(s["bytes"] for s in segments),
+                **self.counters
+            }
+
+    # --- Internos ------------------------------------------------------
+
+    def _read_segment(self, name: str) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            self.counters["segment_reads"] += 1
+        try:
+            with gzip.open(os.path.join(self.directory, name), "rt", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        except (OSError, ValueError) as e:
+            logger.error(f"[ArchiveStore] Segmento ilegible {name}: {e}")
+
+    def _demote_to_cold(self, section: str):
+        """Los segmentos de la sección más allá de los warm_segments recientes pasan a cold. Requiere self._lock."""
+        segments = sorted(
+            (s for s in self._manifest["segments"] if s["section"] == section),
+            key=lambda s: s["seq"], reverse=True
+        )
+        for position, segment in enumerate(segments):
+            warm = position < self.policy.warm_segments
+            segment["warm"] = warm
+            if not warm and "plan_ids" in segment:
+                for plan_id in segment.pop("plan_ids"):
+                    if self._plan_segments.get(plan_id) == segment["name"]:
+                        del self._plan_segments[plan_id]
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"[ArchiveStore] Manifiesto ilegible {path}: {e}")
+        return {"next_seq": 1, "segments": []}
+
+    def _write_manifest(self):
+        """Escritura atómica del manifiesto. Requiere self._lock."""
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -0,0 +1,193 @@
+"""
+CODI Memory - Writer Module
+Escritor en segundo plano (group commit) de MemoryStore.
+
+Las mutaciones se encolan desde el hilo de la petición y un único hilo escritor
+las confirma en lotes: en cuanto llega una, espera hasta `batch_window` segundos
+o `batch_size` registros y las escribe juntas. Al haber un solo escritor, las
+peticiones concurrentes no intercalan escrituras.
+
+Durabilidad (CODI_MEMORY_DURABILITY):
+    none   sin fsync (el sistema operativo decide cuándo llega a disco)
+    batch  un fsync por lote
+    write  un fsync por registro (cada registro se confirma por separado)
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .backends import MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("none", "batch", "write")
+
+
+class MemoryWriter:
+    """Cola de mutaciones de memoria con un hilo escritor por lotes."""
+
+    def __init__(
+        self,
+        backend: MemoryBackend,
+        durability: str = "batch",
+        batch_size: int = 256,
+        batch_window: float = 0.05,
+        max_queue: int = 10000
+    ):
+        if durability not in DURABILITY_MODES:
+            logger.error(f"Durabilidad de memoria desconocida: {durability}. Se usa batch.")
+            durability = "batch"
+        self.backend = backend
+        self.durability = durability
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.counters = {"records": 0, "batches": 0, "errors": 0, "fsyncs": 0}
+        self.last_batch_seconds = 0.0
+        # Se llaman (en el hilo escritor) con cada lote confirmado, p. ej. para indexarlo
+        self.listeners: List[Callable[[List[Tuple[str, Dict[str, Any]]]], None]] = []
+        self.backend.set_durability(durability)
+        self._thread = threading.Thread(target=self._loop, name="codi-memory-writer", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls, backend: MemoryBackend) -> "MemoryWriter":
+        """
+        Configuración:
+            CODI_MEMORY_DURABILITY (none | batch | write)
+            CODI_MEMORY_BATCH_SIZE registros máximos por lote
+            CODI_MEMORY_BATCH_WINDOW segundos que se espera a completar un lote
+            CODI_MEMORY_QUEUE_MAX mutaciones pendientes antes de bloquear al productor
+        """
+        return cls(
+            backend,
+            durability=os.getenv("CODI_MEMORY_DURABILITY", "batch").lower(),
+            batch_size=int(os.getenv("CODI_MEMORY_BATCH_SIZE", 256)),
+            batch_window=float(os.getenv("CODI_MEMORY_BATCH_WINDOW", 0.05)),
+            max_queue=int(os.getenv("CODI_MEMORY_QUEUE_MAX", 10000))
+        )
+
+    def submit(self, section: str, entry: Dict[str, Any]):
+        """Encola una mutación (bloquea solo si la cola está llena)."""
+        if self._closed:
+            raise RuntimeError("MemoryWriter cerrado")
+        self._queue.put((section, entry))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que se confirmen todas las mutaciones encoladas hasta ahora.
+
+        Returns:
+            bool: False si venció el timeout antes de confirmarlas
+        """
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Confirma lo pendiente y detiene el hilo escritor."""
+        if self._closed:
+            return
+        self._closed = True
+        if not self.flush(timeout):
+            logger.warning(f"[MemoryWriter] Cierre con {self.pending} mutaciones sin confirmar")
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "durability": self.durability,
+            "pending": self.pending,
+            "batch_size": self.batch_size,
+            "batch_window_seconds": self.batch_window,
+            "avg_batch_records": counters["records"] / counters["batches"] if counters["batches"] else 0.0,
+            "last_batch_seconds": self.last_batch_seconds,
+            **counters
+        }
+
+    # --- Hilo escritor -------------------------------------------------
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch: List[Tuple[str, Dict[str, Any]]] = []
+            waiters: List[threading.Event] = []
+            stop = self._collect(item, batch, waiters)
+            if batch:
+                self._commit(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _collect(self, item: Any, batch: List[Tuple[str, Dict[str, Any]]], waiters: List[threading.Event]) -> bool:
+        """
+        Reúne un lote a partir de `item` hasta llenar batch_size o agotar la
+        ventana. Un flush cierra el lote en cuanto se vacía la cola.
+
+        Returns:
+            bool: True si se pidió detener el hilo
+        """
+        deadline = time.monotonic() + self.batch_window
+        while True:
+            if item is None:
+                return True
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            else:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                return False
+            try:
+                if waiters:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return False
+
+    def _commit(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        started = time.perf_counter()
+        try:
+            if self.durability == "write":
+                for record in batch:
+                    self.backend.add_batch([record])
+                    self.backend.sync()
+                fsyncs = len(batch)
+            else:
+                self.backend.add_batch(batch)
+                fsyncs = 0
+                if self.durability == "batch":
+                    self.backend.sync()
+                    fsyncs = 1
+        except Exception as e:
+            with self._lock:
+                self.counters["errors"] += 1
+            logger.error(f"[MemoryWriter] Error al confirmar un lote de {len(batch)} registros: {e}")
+            return
+        with self._lock:
+            self.counters["records"] += len(batch)
+            self.counters["batches"] += 1
+            self.counters["fsyncs"] += fsyncs
+        self.last_batch_seconds = time.perf_counter() - started
+        for listener in self.listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                logger.error(f"[MemoryWriter] Error en un listener de lotes: {e}")
@@ -0,0 +1,6 @@
+"""Configuración común de los tests: la raíz del repositorio en sys.path."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,43 @@
+"""Tests del journal de ejecuciones de DeepAgent (checkpoints y reanudación)."""
+
+import tempfile
+
+import pytest
+
+from core.engines.deepagent.checkpoint import ExecutionJournal, ExecutionNotFound
+from core.engines.deepagent.deepagent_engine import DeepAgentEngine
+from core.engines.deepagent.pipeline_engine import PipelineEngine
+from core.engines.deepagent.plan_cache import SemanticPlanCache
+
+
+def test_load_returns_plan_and_completed_intents(tmp_path):
+    journal = ExecutionJournal(str(tmp_path / "journal.sqlite"))
+    intents = [{"intent": "read_file", "params": {"file_path": "a"}},
+               {"intent": "read_file", "params": {"file_path": "b"}}]
+    journal.start("e1", "leer", {"user": "u"})
+    journal.save_plan("e1", intents)
+    journal.save_result("e1", 0, intents[0], "leído a", None)
+    journal.save_result("e1", 1, intents[1], None, "no existe")
+
+    saved = journal.load("e1")
+
+    assert saved["goal"] == "leer" and saved["context"] == {"user": "u"}
+    assert saved["intents"] == intents
+    assert saved["completed"] == {0: "leído a"}
+    assert journal.load("otra") is None
+
+
+def test_default_path_is_in_the_temp_dir(monkeypatch):
+    monkeypatch.delenv("DEEPAGENT_JOURNAL_PATH", raising=False)
+    journal = ExecutionJournal.from_env()
+    assert journal.path.startswith(tempfile.gettempdir())
+
+
+def test_resume_unknown_execution_raises_execution_not_found(tmp_path):
+    journal = ExecutionJournal(str(tmp_path / "journal.sqlite"))
+    engine = PipelineEngine(object(), {}, plan_cache=SemanticPlanCache(enabled=False), journal=journal)
+
+    with pytest.raises(ExecutionNotFound):
+        engine.resume("desconocida")
+    with pytest.raises(ExecutionNotFound):
+        DeepAgentEngine(engine).resume("desconocida")
@@ -0,0 +1,36 @@
+"""Tests de core.executor.Executor (oleadas del plan y resultados por tarea)."""
+
+from datetime import datetime
+
+from core.bulkhead import ToolBulkheads
+from core.executor import Executor
+from core.planner import Plan, Task
+
+
+def _task(task_id, dependencies=()):
+    return Task(id=task_id, title=f"Tarea {task_id}", description="", dependencies=list(dependencies), priority=1)
+
+
+def test_finished_tasks_have_a_timestamp():
+    executor = Executor(tool_manager=None, bulkheads=ToolBulkheads())
+    tasks = [_task(1), _task(2), _task(3, [1, 2])]
+    plan = Plan(objective="objetivo", created_at=datetime.now().isoformat(), tasks=tasks, total_tasks=len(tasks))
+
+    results = executor.execute_plan(plan)
+
+    assert [r.status for r in results] == ["success"] * 3
+    for result in results:
+        datetime.fromisoformat(result.timestamp)
+
+
+def test_failed_dependencies_skip_only_their_descendants():
+    executor = Executor(tool_manager=None, bulkheads=ToolBulkheads())
+    tasks = [_task(1), _task(2, [99]), _task(3, [2]), _task(4, [5]), _task(5, [4]), _task(6, [1])]
+    plan = Plan(objective="objetivo", created_at=datetime.now().isoformat(), tasks=tasks, total_tasks=len(tasks))
+
+    results = {r.task_id: r for r in executor.execute_plan(plan)}
+
+    assert {task_id: r.status for task_id, r in results.items()} == {
+        1: "success", 2: "failed", 3: "skipped", 4: "failed", 5: "failed", 6: "success"
+    }
+    assert "tarea 2" in results[3].error
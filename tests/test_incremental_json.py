@@ -0,0 +1,58 @@
+"""Tests de core.incremental_json: elementos entregados en cuanto se cierran y fallbacks."""
+
+from core.incremental_json import IncrementalArrayParser
+
+
+def _feed_chars(parser, text):
+    """Alimenta el parser carácter a carácter y retorna los lotes entregados."""
+    return [(position, element) for position, char in enumerate(text) for element in parser.feed(char)]
+
+
+def test_elements_are_delivered_as_soon_as_they_close():
+    text = '[{"intent": "a", "params": {"x": [1, 2]}}, {"intent": "b"}]'
+    parser = IncrementalArrayParser()
+    delivered = _feed_chars(parser, text)
+    assert [element for _, element in delivered] == [{"intent": "a", "params": {"x": [1, 2]}}, {"intent": "b"}]
+    # El primero se entrega al cerrar su llave, antes de leer el segundo
+    assert delivered[0][0] == text.index("}, {")
+    assert parser.text == text
+
+
+def test_brackets_and_escapes_inside_strings_are_ignored():
+    text = r'[{"content": "a ] b } c \" [ d"}, {"content": "\\"}]'
+    parser = IncrementalArrayParser()
+    elements = parser.feed(text[:20]) + parser.feed(text[20:])
+    assert elements == [{"content": 'a ] b } c " [ d'}, {"content": "\\"}]
+
+
+def test_markdown_fence_is_skipped():
+    parser = IncrementalArrayParser()
+    elements = []
+    for chunk in ("```js", "on\n", '[{"intent": "a"}', ", ", '{"intent": "b"}]\n```'):
+        elements += parser.feed(chunk)
+    assert elements == [{"intent": "a"}, {"intent": "b"}]
+
+
+def test_prose_prefix_delivers_nothing_and_keeps_the_text():
+    text = 'Este es el plan: [{"intent": "a"}]'
+    parser = IncrementalArrayParser()
+    assert parser.feed(text) == []
+    assert parser.elements == []
+    assert parser.text == text
+
+
+def test_single_object_delivers_nothing():
+    parser = IncrementalArrayParser()
+    assert parser.feed('{"intents": [{"name": "a"}]}') == []
+    assert parser.text == '{"intents": [{"name": "a"}]}'
+
+
+def test_scalars_and_invalid_elements_are_skipped():
+    parser = IncrementalArrayParser()
+    assert parser.feed('[1, "x", {"a": 1,}, {"b": 2}]') == [{"b": 2}]
+
+
+def test_text_after_the_array_is_ignored():
+    parser = IncrementalArrayParser()
+    assert parser.feed('[{"a": 1}] y además [{"b": 2}]') == [{"a": 1}]
+    assert parser.feed('{"c": 3}') == []
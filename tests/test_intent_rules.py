@@ -0,0 +1,67 @@
+"""Tests de core.intent_rules: objetivos formulaicos resueltos sin LLM."""
+
+import pytest
+
+from core.intent_rules import IntentRules
+
+
+@pytest.fixture
+def rules():
+    return IntentRules()
+
+
+@pytest.mark.parametrize("objective, expected", [
+    ("crea un archivo notas.txt con el texto hola mundo",
+     {"name": "create_file", "params": {"filename": "notas.txt", "content": "hola mundo"}}),
+    ('Por favor, crea el archivo "datos/a.md" con el contenido: «# Título»',
+     {"name": "create_file", "params": {"filename": "datos/a.md", "content": "# Título"}}),
+    ("genera un fichero vacio.txt",
+     {"name": "create_file", "params": {"filename": "vacio.txt", "content": ""}}),
+    ("escribe un archivo a.txt que contenga el texto 'fin.'",
+     {"name": "create_file", "params": {"filename": "a.txt", "content": "fin."}}),
+    ("analiza informe.txt.",
+     {"name": "analyze_text", "params": {"path": "informe.txt"}}),
+    ("Lee el contenido del archivo ./docs/README.md",
+     {"name": "analyze_text", "params": {"path": "./docs/README.md"}}),
+    ("inspecciona proyecto.zip",
+     {"name": "inspect_zip", "params": {"zip_path": "proyecto.zip"}}),
+    ("analiza el archivo `backup.ZIP`",
+     {"name": "inspect_zip", "params": {"zip_path": "backup.ZIP"}}),
+])
+def test_formulaic_objectives_match(rules, objective, expected):
+    assert rules.match(objective) == [expected]
+
+
+@pytest.mark.parametrize("objective", [
+    "",
+    "¿Qué es un archivo zip?",
+    "analiza informe.txt y resume sus conclusiones",
+    "crea un archivo notas.txt y luego comprímelo",
+    "analiza el rendimiento del servidor",
+    "crea un archivo sin extensión",
+])
+def test_other_objectives_do_not_match(rules, objective):
+    assert rules.match(objective) is None
+
+
+def test_disabled_rules_never_match():
+    assert IntentRules(enabled=False).match("inspecciona proyecto.zip") is None
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("CODI_INTENT_RULES", "false")
+    assert IntentRules.from_env().enabled is False
+    monkeypatch.delenv("CODI_INTENT_RULES")
+    assert IntentRules.from_env().enabled is True
+
+
+def test_stats_count_hits_per_rule(rules):
+    rules.match("inspecciona a.zip")
+    rules.match("lee b.txt")
+    rules.match("lee c.txt")
+    rules.match("explícame la teoría de la relatividad")
+    stats = rules.stats()
+    assert stats["objectives"] == 4
+    assert stats["hits"] == 3
+    assert stats["hit_rate"] == 0.75
+    assert stats["by_rule"] == {"inspect_zip": 1, "analyze_text": 2, "create_file": 0}
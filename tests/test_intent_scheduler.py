@@ -0,0 +1,129 @@
+"""Tests de IntentScheduler: serialización por conflictos de rutas y paralelismo acotado."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.engines.deepagent.intent_conflicts import conflicts, intent_access
+from core.engines.deepagent.intent_scheduler import IntentScheduler
+
+
+def _intent(name, **params):
+    return {"intent": name, "params": params}
+
+
+class Recorder:
+    """run_intent de prueba: registra inicio y fin de cada intent."""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, index, intent):
+        with self.lock:
+            self.events.append(("start", index))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.seconds)
+        with self.lock:
+            self.events.append(("end", index))
+            self.running -= 1
+        if intent.get("params", {}).get("fail"):
+            raise RuntimeError(f"fallo {index}")
+        return f"ok {index}", None
+
+    def position(self, kind, index):
+        return self.events.index((kind, index))
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        yield executor
+
+
+def test_intent_access_classifies_reads_and_writes():
+    assert intent_access(_intent("read_file", file_path="a.txt")) == ({"a.txt"}, set())
+    assert intent_access(_intent("create_file", filename="a.txt")) == (set(), {"a.txt"})
+    assert intent_access(_intent("answer_question", question="hola")) == (set(), set())
+    assert intent_access(_intent("inspect_zip", zip_path="d/x.zip")) == ({"d/x.zip"}, {"d/x_extracted"})
+    # Intent desconocido con ruta: se trata como escritura
+    assert intent_access(_intent("otra_cosa", path="b.txt")) == (set(), {"b.txt"})
+    assert intent_access(_intent("read_file", file_path="./d/../a.txt")) == ({"a.txt"}, set())
+
+
+def test_conflicts():
+    read_a = ({"a"}, set())
+    write_a = (set(), {"a"})
+    write_b = (set(), {"b"})
+    assert not conflicts(read_a, read_a)
+    assert conflicts(read_a, write_a)
+    assert conflicts(write_a, read_a)
+    assert conflicts(write_a, write_a)
+    assert not conflicts(write_a, write_b)
+
+
+def test_conflicting_intents_run_in_plan_order(pool):
+    recorder = Recorder()
+    scheduler = IntentScheduler(pool, recorder, max_parallel=4)
+    scheduler.add(_intent("create_file", filename="a.txt", content="x"))
+    scheduler.add(_intent("read_file", file_path="a.txt"))
+    scheduler.add(_intent("create_file", filename="a.txt", content="y"))
+    outcomes = scheduler.join()
+    assert outcomes == [("ok 0", None), ("ok 1", None), ("ok 2", None)]
+    assert recorder.position("end", 0) < recorder.position("start", 1)
+    assert recorder.position("end", 1) < recorder.position("start", 2)
+    assert recorder.max_running == 1
+
+
+def test_independent_intents_run_in_parallel(pool):
+    recorder = Recorder()
+    scheduler = IntentScheduler(pool, recorder, max_parallel=4)
+    scheduler.add(_intent("create_file", filename="a.txt"))
+    scheduler.add(_intent("create_file", filename="b.txt"))
+    scheduler.add(_intent("read_file", file_path="c.txt"))
+    scheduler.add(_intent("read_file", file_path="c.txt"))
+    scheduler.join()
+    assert recorder.max_running == 4
+
+
+def test_reader_waits_only_for_its_writer(pool):
+    recorder = Recorder()
+    scheduler = IntentScheduler(pool, recorder, max_parallel=4)
+    scheduler.add(_intent("create_file", filename="a.txt"))
+    scheduler.add(_intent("create_file", filename="b.txt"))
+    scheduler.add(_intent("read_file", file_path="b.txt"))
+    scheduler.join()
+    assert recorder.position("start", 2) > recorder.position("end", 1)
+    assert recorder.position("start", 1) < recorder.position("end", 0)
+
+
+def test_max_parallel_is_respected(pool):
+    recorder = Recorder()
+    scheduler = IntentScheduler(pool, recorder, max_parallel=2)
+    for index in range(6):
+        scheduler.add(_intent("create_file", filename=f"{index}.txt"))
+    assert len(scheduler.join()) == 6
+    assert recorder.max_running == 2
+
+
+def test_intent_added_after_its_conflict_finished_runs_immediately(pool):
+    recorder = Recorder(seconds=0)
+    scheduler = IntentScheduler(pool, recorder, max_parallel=2)
+    scheduler.add(_intent("create_file", filename="a.txt"))
+    assert scheduler.join() == [("ok 0", None)]
+    scheduler.add(_intent("read_file", file_path="a.txt"))
+    assert scheduler.join() == [("ok 0", None), ("ok 1", None)]
+
+
+def test_errors_become_outcomes_and_release_dependents(pool):
+    recorder = Recorder(seconds=0.01)
+    scheduler = IntentScheduler(pool, recorder, max_parallel=2)
+    scheduler.add(_intent("create_file", filename="a.txt", fail=True))
+    scheduler.add(_intent("read_file", file_path="a.txt"))
+    assert scheduler.join() == [(None, "fallo 0"), ("ok 1", None)]
@@ -0,0 +1,131 @@
+"""Tests de LLMGateway con un cliente de proveedor falso (sin red)."""
+
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.llm_gateway import LLMGateway
+from core.llm_resilience import CircuitBreaker, ResiliencePolicy, RetryPolicy
+from core.rate_governor import ModelLimits, RateGovernor
+
+
+def _chunk(text):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    """Stream infinito de fragmentos que registra si se cerró la respuesta."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.produced = 0
+        self.closed = False
+
+    async def _chunks(self):
+        for index in itertools.count():
+            await asyncio.sleep(self.delay)
+            self.produced += 1
+            yield _chunk(f"t{index}")
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """Cliente AsyncOpenAI falso: cuenta las peticiones enviadas al proveedor."""
+
+    def __init__(self, latency=0.005):
+        self.latency = latency
+        self.requests = 0
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.requests += 1
+        if kwargs.get("stream"):
+            stream = FakeStream()
+            self.streams.append(stream)
+            return stream
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(
+            model=kwargs["model"], usage=None,
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok", tool_calls=None))]
+        )
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    for name in ("LLM_RATE_LIMITS", "LLM_DEFAULT_RPM", "LLM_DEFAULT_TPM", "LLM_RATE_SHARED_FILE"):
+        monkeypatch.delenv(name, raising=False)
+    gateway = LLMGateway(api_key="test")
+    gateway._client = FakeClient()
+    yield gateway
+    gateway.close()
+
+
+def _wait_for(condition, timeout=2.0):
+    limit = time.monotonic() + timeout
+    while not condition() and time.monotonic() < limit:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_stream_abandoned_by_consumer_cancels_upstream(gateway):
+    chunks = gateway.stream("fake-model", [{"role": "user", "content": "hola"}])
+    assert next(chunks) == "t0"
+    chunks.close()
+
+    stream = gateway._client.streams[0]
+    assert _wait_for(lambda: stream.closed)
+    produced = stream.produced
+    time.sleep(0.1)
+    assert stream.produced == produced
+
+
+def test_stream_error_in_consumer_cancels_upstream(gateway):
+    with pytest.raises(RuntimeError):
+        for delta in gateway.stream("fake-model", [{"role": "user", "content": "hola"}]):
+            raise RuntimeError(f"scheduler: {delta}")
+    assert _wait_for(lambda: gateway._client.streams[0].closed)
+
+
+def test_throttled_burst_sends_one_request_per_call(gateway):
+    """Con el presupuesto agotado, la cola del gobernador no dispara hedges."""
+    gateway.governor = RateGovernor({"fake-model": ModelLimits(rpm=6000)}, ModelLimits())
+    gateway.governor.backend._state["fake-model"] = {"req": 0.0, "tok": 0.0, "ts": time.time()}
+    gateway.resilience = ResiliencePolicy(RetryPolicy(max_attempts=1), CircuitBreaker("test"), hedge_min_samples=5)
+    for _ in range(5):
+        gateway.resilience.latency.record(0.001)
+
+    async def burst():
+        return await asyncio.gather(*(
+            gateway.acomplete("fake-model", [{"role": "user", "content": f"pregunta {index}"}])
+            for index in range(40)
+        ))
+
+    responses = asyncio.run(burst())
+    assert [response.content for response in responses] == ["ok"] * 40
+    assert gateway._client.requests == 40
+    assert gateway.resilience.counters["hedged"] == 0
+    assert gateway.governor.stats()["models"]["fake-model"]["throttled"] > 0
+
+
+def test_hedge_is_sent_when_budget_is_available(gateway):
+    gateway.governor = RateGovernor({"fake-model": ModelLimits(rpm=6000)}, ModelLimits())
+    gateway.resilience = ResiliencePolicy(RetryPolicy(max_attempts=1), CircuitBreaker("test"), hedge_min_samples=1)
+    gateway.resilience.latency.record(0.001)
+    gateway._client.latency = 0.05
+
+    response = asyncio.run(gateway.acomplete("fake-model", [{"role": "user", "content": "hola"}]))
+    assert response.content == "ok"
+    assert gateway._client.requests == 2
+    assert gateway.governor.stats()["models"]["fake-model"]["requests"] == 2
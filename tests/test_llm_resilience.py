@@ -0,0 +1,219 @@
+"""Tests de core.llm_resilience: transiciones del circuit breaker y ResiliencePolicy."""
+
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from core.llm_resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy, RetryPolicy
+
+
+def _bad_request() -> openai.BadRequestError:
+    request = httpx.Request("POST", "https://llm.test/v1/chat/completions")
+    return openai.BadRequestError("bad request", response=httpx.Response(400, request=request), body=None)
+
+
+def _half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+    return breaker
+
+
+def _policy(breaker: CircuitBreaker, max_attempts: int = 1) -> ResiliencePolicy:
+    return ResiliencePolicy(RetryPolicy(max_attempts=max_attempts, base_delay=0.0), breaker, hedge_percentile=0)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.stats()["rejected"] == 1
+
+    def test_half_open_allows_single_probe(self):
+        breaker = _half_open_breaker()
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_half_open_success_closes(self):
+        breaker = _half_open_breaker()
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow() and breaker.allow()
+
+    def test_half_open_failure_reopens(self):
+        breaker = _half_open_breaker()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert breaker.times_opened == 2
+
+    def test_release_frees_probe(self):
+        breaker = _half_open_breaker()
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+
+
+class TestResiliencePolicy:
+    def test_non_retryable_error_in_half_open_releases_probe(self):
+        breaker = _half_open_breaker()
+        policy = _policy(breaker)
+
+        async def call():
+            raise _bad_request()
+
+        with pytest.raises(openai.BadRequestError):
+            asyncio.run(policy.execute(call))
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+
+    def test_cancelled_probe_releases(self):
+        breaker = _half_open_breaker()
+        policy = _policy(breaker)
+
+        async def main():
+            task = asyncio.ensure_future(policy.execute(lambda: asyncio.sleep(10)))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert breaker.allow()
+
+    def test_caller_deadline_is_not_a_provider_failure(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+        policy = _policy(breaker, max_attempts=3)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(policy.execute(lambda: asyncio.sleep(10), deadline_seconds=0.05))
+        assert breaker.state == "closed"
+        assert policy.counters["deadline_exceeded"] == 1
+
+    def test_retryable_errors_open_the_circuit(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        policy = _policy(breaker, max_attempts=5)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            raise asyncio.TimeoutError()
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(policy.execute(call))
+        assert breaker.state == "open"
+        assert len(calls) == 2
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(policy.execute(call))
+
+    def test_final_error_reports_attempts(self):
+        policy = _policy(CircuitBreaker("test", failure_threshold=10), max_attempts=3)
+
+        async def call():
+            raise asyncio.TimeoutError()
+
+        with pytest.raises(asyncio.TimeoutError) as error:
+            asyncio.run(policy.execute(call))
+        assert error.value.attempts == 3
+        assert policy.counters["retries"] == 2
+
+    def test_success_in_half_open_closes(self):
+        breaker = _half_open_breaker()
+        policy = _policy(breaker)
+
+        async def call():
+            return "ok"
+
+        assert asyncio.run(policy.execute(call)) == "ok"
+        assert breaker.state == "closed"
+
+    def test_hedge_cancels_primary_when_cancelled(self):
+        breaker = CircuitBreaker("test")
+        policy = ResiliencePolicy(RetryPolicy(max_attempts=1), breaker, hedge_min_samples=1)
+        policy.latency.record(5.0)
+        started = []
+
+        async def call():
+            task = asyncio.current_task()
+            started.append(task)
+            await asyncio.sleep(10)
+
+        async def main():
+            outer = asyncio.ensure_future(policy._hedged(call))
+            await asyncio.sleep(0.01)
+            outer.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await outer
+            await asyncio.sleep(0)
+            return started
+
+        tasks = asyncio.run(main())
+        assert tasks and all(task.cancelled() for task in tasks)
+
+    def test_admission_wait_is_not_latency_and_does_not_hedge(self):
+        policy = ResiliencePolicy(RetryPolicy(max_attempts=1), CircuitBreaker("test"), hedge_min_samples=1)
+        policy.latency.record(0.02)
+        sent = []
+
+        async def admit():
+            await asyncio.sleep(0.1)
+
+        async def call():
+            sent.append(1)
+            await asyncio.sleep(0.005)
+            return "ok"
+
+        assert asyncio.run(policy.execute(call, admit=admit)) == "ok"
+        assert len(sent) == 1
+        assert policy.counters["hedged"] == 0
+        assert policy.latency.percentile(100) < 0.1
+
+    def test_admission_consumes_the_deadline(self):
+        policy = _policy(CircuitBreaker("test"))
+
+        async def admit():
+            await asyncio.sleep(1)
+
+        async def call():
+            return "ok"
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(policy.execute(call, deadline_seconds=0.05, admit=admit))
+        assert policy.counters["deadline_exceeded"] == 1
+        assert policy.breaker.stats()["consecutive_failures"] == 0
+
+    def test_hedge_needs_immediate_budget(self):
+        sent = []
+
+        async def call():
+            sent.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        def run(has_budget):
+            policy = ResiliencePolicy(RetryPolicy(max_attempts=1), CircuitBreaker("test"), hedge_min_samples=1)
+            policy.latency.record(0.01)
+
+            async def admit_hedge():
+                return has_budget
+
+            sent.clear()
+            assert asyncio.run(policy.execute(call, admit_hedge=admit_hedge)) == "ok"
+            return policy.counters
+
+        counters = run(False)
+        assert len(sent) == 1
+        assert counters["hedge_skipped"] == 1 and counters["hedged"] == 0
+        counters = run(True)
+        assert len(sent) == 2
+        assert counters["hedged"] == 1
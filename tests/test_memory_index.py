@@ -0,0 +1,93 @@
+"""Tests de memory.retrieval.MemoryIndex y de su relación con el nivel hot de MemoryStore."""
+
+import time
+
+from memory.backends import SQLiteBackend
+from memory.memory_store import MemoryStore
+from memory.retrieval import MemoryIndex, tokenize
+from memory.tiers import ArchiveStore, TierPolicy
+from memory.writer import MemoryWriter
+
+
+def test_tokenize_strips_accents_and_stopwords():
+    assert tokenize("Análisis de la API del código") == ["analisis", "api", "codigo"]
+
+
+def test_search_ranks_matching_documents():
+    index = MemoryIndex(max_df=1.0)
+    index.add("objectives", {"objective": "crear informe de ventas"})
+    index.add("objectives", {"objective": "leer archivo de configuración"})
+    index.add("plans", {"plan_id": "p1", "data": {"steps": ["generar informe trimestral"]}})
+
+    hits = index.search("informe ventas", k=2)
+
+    assert [hit["text"] for hit in hits][0] == "crear informe de ventas"
+    assert {hit["section"] for hit in hits} == {"objectives", "plans"}
+
+
+def test_drop_oldest_removes_documents_from_results():
+    index = MemoryIndex(max_df=1.0, compact_min=1000)
+    for n in range(3):
+        index.add("objectives", {"objective": f"informe numero{n}"})
+    index.add("plans", {"plan_id": "p1", "data": {"text": "informe plan"}})
+
+    index.drop_oldest("objectives", 2)
+
+    texts = [hit["text"] for hit in index.search("informe", k=10)]
+    assert sorted(texts) == ["informe numero2", "informe plan"]
+    assert len(index) == 2
+    assert index.stats()["deleted_pending_compaction"] == 2
+
+
+def test_compaction_renumbers_and_keeps_order():
+    index = MemoryIndex(max_df=1.0, compact_min=2)
+    for n in range(6):
+        index.add("objectives", {"objective": f"tarea t{n}"})
+
+    index.drop_oldest("objectives", 3)
+    assert index.stats()["compactions"] == 1
+    assert index.stats()["deleted_pending_compaction"] == 0
+    assert sorted(hit["text"] for hit in index.search("tarea", k=10)) == ["tarea t3", "tarea t4", "tarea t5"]
+
+    index.drop_oldest("objectives", 1)
+    assert sorted(hit["text"] for hit in index.search("tarea", k=10)) == ["tarea t4", "tarea t5"]
+
+
+def test_build_puts_history_before_live_documents():
+    backend_entries = [{"objective": "historia antigua"}, {"objective": "historia reciente"}]
+
+    class Backend:
+        def entries(self, section):
+            return iter(backend_entries if section == "objectives" else [])
+
+    index = MemoryIndex(max_df=1.0)
+    index.add("objectives", {"objective": "nueva ejecucion"})
+    index.build(Backend(), {"objectives": 2})
+    index.drop_oldest("objectives", 2)
+
+    assert [hit["text"] for hit in index.search("historia nueva ejecucion", k=10)] == ["nueva ejecucion"]
+
+
+def test_index_tracks_the_hot_tier(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "memory.sqlite"))
+    archive = ArchiveStore(str(tmp_path / "archive"), TierPolicy(hot_max=4, segment_records=2))
+    index = MemoryIndex(max_df=1.0)
+    store = MemoryStore(backend, MemoryWriter(backend, batch_window=0.0, batch_size=1), index=index, archive=archive)
+    while not index.ready:
+        time.sleep(0.01)
+    try:
+        for n in range(10):
+            store.add_objective(f"objetivo numero{n}", f"2026-01-01T00:00:0{n}")
+        store.flush()
+        hot = store.stats()["tiers"]["hot"]["objectives"]
+        assert len(index) == hot < 10
+        texts = {hit["text"] for hit in index.search("objetivo", k=20)}
+        assert "objetivo numero0" not in texts
+        assert "objetivo numero9" in texts
+
+        # Tras reiniciar, el índice vuelve a cubrir exactamente el nivel hot
+        restarted = MemoryIndex(max_df=1.0)
+        restarted.build(backend, backend.counts())
+        assert {hit["text"] for hit in restarted.search("objetivo", k=20)} == texts
+    finally:
+        store.close()
@@ -0,0 +1,96 @@
+"""Tests de memory.tiers y de los niveles de MemoryStore."""
+
+import time
+from datetime import datetime, timedelta
+
+from memory.backends import LogBackend, SQLiteBackend
+from memory.memory_store import MemoryStore
+from memory.tiers import ArchiveStore, TierPolicy, record_time
+from memory.writer import MemoryWriter
+
+
+def _store(backend, tmp_path, **policy):
+    archive = ArchiveStore(str(tmp_path / "archive"), TierPolicy(**policy))
+    writer = MemoryWriter(backend, batch_window=0.0, batch_size=1)
+    return MemoryStore(backend, writer, use_index=False, archive=archive)
+
+
+def test_record_time_prefers_the_record_timestamp():
+    stamp = datetime(2025, 1, 1, 12, 0, 0)
+    assert record_time({"objective": "x", "timestamp": stamp.isoformat()}, 123.0) == stamp.timestamp()
+    assert record_time({"plan_id": "p", "data": {"completed_at": stamp.isoformat()}}) == stamp.timestamp()
+    assert record_time({"plan_id": "p", "data": {}}, 123.0) == 123.0
+    assert record_time({"plan_id": "p", "data": {}}) is None
+
+
+def test_age_retention_uses_the_record_timestamp(tmp_path):
+    archive = ArchiveStore(str(tmp_path), TierPolicy(max_age_days=30))
+    old = (datetime.now() - timedelta(days=90)).isoformat()
+    recent = datetime.now().isoformat()
+    archive.archive("objectives", [({"objective": "antiguo", "timestamp": old}, None)])
+    # Sin instante propio: hereda el del registro conocido más reciente del segmento
+    archive.archive("plans", [({"plan_id": "p1", "data": {}}, None),
+                              ({"plan_id": "p2", "data": {"completed_at": old}}, None)])
+    archive.archive("objectives", [({"objective": "reciente", "timestamp": recent}, None)])
+
+    deleted = archive.enforce_retention()
+
+    assert deleted == {"objectives": 1, "plans": 2, "results": 0}
+    assert [entry["objective"] for entry in archive.recent("objectives", 10)] == ["reciente"]
+
+
+def test_sqlite_recent_objectives_follow_insertion_order(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "memory.sqlite"))
+    try:
+        backend.add("objectives", {"objective": "primero", "timestamp": "2026-05-01T00:00:00"})
+        backend.add("objectives", {"objective": "segundo", "timestamp": "2020-01-01T00:00:00"})
+        assert [o["objective"] for o in backend.recent_objectives(2)] == ["segundo", "primero"]
+    finally:
+        backend.close()
+
+
+def test_pagination_is_consistent_across_hot_and_archive(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "memory.sqlite"))
+    store = _store(backend, tmp_path, hot_max=2, segment_records=2)
+    try:
+        for n in range(9):
+            # Timestamps desordenados: el orden es el de inserción en ambos niveles
+            store.add_objective(f"o{n}", f"2026-01-0{9 - n}T00:00:00")
+        store.flush()
+        assert store.archive.counts()["objectives"] > 0
+        pages = [store.get_recent_objectives(2, offset) for offset in range(0, 9, 2)]
+        assert [o["objective"] for page in pages for o in page] == [f"o{n}" for n in range(8, -1, -1)]
+        assert store.get_memory_summary()["total_objectives"] == 9
+    finally:
+        store.close()
+
+
+def test_stored_counts_only_committed_records(tmp_path):
+    class FailingBackend(SQLiteBackend):
+        def add_batch(self, records):
+            raise OSError("disco lleno")
+
+    backend = FailingBackend(str(tmp_path / "memory.sqlite"))
+    store = _store(backend, tmp_path)
+    try:
+        store.add_objective("perdido", datetime.now().isoformat())
+        store.flush()
+        assert store.get_memory_summary()["total_objectives"] == 0
+        assert store.writer.stats()["errors"] == 1
+    finally:
+        store.close()
+
+
+def test_log_backend_archives_with_record_time(tmp_path):
+    backend = LogBackend(str(tmp_path / "log"))
+    store = _store(backend, tmp_path, hot_max=1, segment_records=1)
+    stamp = datetime(2025, 6, 1)
+    try:
+        for n in range(3):
+            store.add_objective(f"o{n}", (stamp + timedelta(days=n)).isoformat())
+        store.flush()
+        segments = store.archive._manifest["segments"]
+        assert segments and segments[0]["oldest_at"] == stamp.timestamp()
+        assert segments[0]["newest_at"] < time.time() - 86400
+    finally:
+        store.close()
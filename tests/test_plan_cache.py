@@ -0,0 +1,157 @@
+"""Tests de la caché semántica de planes: re-enlace de slots, rechazos y reutilización incorrecta."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from core.engines.deepagent import plan_execute
+from core.engines.deepagent.pipeline_engine import PipelineEngine
+from core.engines.deepagent.plan_cache import SemanticPlanCache, extract_slots, is_grounded
+from core.llm_cache import LLMCache, MemoryTier
+
+
+def _read(path):
+    return [{"intent": "read_file", "params": {"file_path": path}}]
+
+
+@pytest.fixture
+def cache():
+    # Una fila por banda: cualquier par con similitud razonable es candidato LSH
+    return SemanticPlanCache(num_perm=64, bands=64)
+
+
+def test_extract_slots():
+    template, slots = extract_slots('crea docs/a.md con el texto "hola mundo"')
+    assert slots == ["docs/a.md", "hola mundo"]
+    assert "docs/a.md" not in template and "hola" not in template
+
+
+def test_hit_rebinds_slots(cache):
+    cache.store("lee notas.txt", {}, _read("notas.txt"))
+    assert cache.lookup("lee informe.txt") == _read("informe.txt")
+    # Verbo equivalente y palabras vacías: misma plantilla
+    assert cache.lookup("analiza el archivo datos.csv") == _read("datos.csv")
+    assert cache.stats()["hits"] == 2
+
+
+def test_rebinding_does_not_chain_substitutions(cache):
+    intents = [{"intent": "copy", "params": {"src": "a.txt", "dst": "b.txt"}}]
+    cache.store("copia a.txt en b.txt", {}, intents)
+    assert cache.lookup("copia b.txt en c.txt") == [{"intent": "copy", "params": {"src": "b.txt", "dst": "c.txt"}}]
+
+
+def test_stored_plan_is_not_mutated_by_callers(cache):
+    cache.store("lee notas.txt", {}, _read("notas.txt"))
+    cache.lookup("lee notas.txt")[0]["params"]["file_path"] = "otro.txt"
+    assert cache.lookup("lee notas.txt") == _read("notas.txt")
+
+
+def test_different_verb_class_misses(cache):
+    cache.store("lee notas.txt", {}, _read("notas.txt"))
+    assert cache.lookup("borra notas.txt") is None
+    assert cache.lookup("crea notas.txt") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_ungrounded_rebinding_misses():
+    cache = SemanticPlanCache(threshold=0.4, num_perm=64, bands=64)
+    intents = [{"intent": "create_file", "params": {"filename": "a.txt", "content": "hola mundo"}}]
+    cache.store("crea a.txt con hola mundo", {}, intents)
+    # Similar, pero el contenido no es un slot: reutilizarlo escribiría "hola mundo"
+    assert cache.lookup("crea b.txt con adios mundo") is None
+    stats = cache.stats()
+    assert stats["ungrounded"] == 1 and stats["hits"] == 0
+
+
+def test_quoted_content_is_a_slot_and_rebinds(cache):
+    intents = [{"intent": "create_file", "params": {"filename": "a.txt", "content": "hola"}}]
+    cache.store("crea a.txt con el texto 'hola'", {}, intents)
+    assert cache.lookup("crea b.txt con el texto 'adiós'") == [
+        {"intent": "create_file", "params": {"filename": "b.txt", "content": "adiós"}}
+    ]
+
+
+def test_context_and_slot_count_must_match(cache):
+    cache.store("lee notas.txt", {"cwd": "/a"}, _read("notas.txt"))
+    assert cache.lookup("lee notas.txt", {"cwd": "/b"}) is None
+    assert cache.lookup("lee notas.txt") is None
+    assert cache.lookup("lee notas.txt otro.txt", {"cwd": "/a"}) is None
+    assert cache.lookup("lee notas.txt", {"cwd": "/a"}) == _read("notas.txt")
+
+
+def test_non_reusable_or_ungrounded_plans_are_not_stored(cache):
+    cache.store("¿qué es python?", {}, [{"intent": "answer_question", "params": {"question": "x"}}])
+    cache.store("lee notas.txt", {}, _read("otro.txt"))
+    cache.store("lee notas.txt", {}, [])
+    assert cache.stats()["stores"] == 0
+    assert not is_grounded(_read("otro.txt"), "lee notas.txt")
+
+
+def test_lru_eviction_cleans_lsh_buckets():
+    cache = SemanticPlanCache(max_entries=2, num_perm=64, bands=64)
+    cache.store("lee a.txt", {}, _read("a.txt"))
+    cache.store("crea b.txt", {}, [{"intent": "create_file", "params": {"filename": "b.txt"}}])
+    # El acierto renueva la entrada de "lee": se expulsa la de "crea"
+    assert cache.lookup("lee x.txt") == _read("x.txt")
+    cache.store("inspecciona c.zip", {}, [{"intent": "inspect_zip", "params": {"zip_path": "c.zip"}}])
+
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup("crea z.txt") is None
+    assert cache.lookup("lee y.txt") == _read("y.txt")
+    live = set(cache._entries)
+    for buckets in cache._buckets:
+        for members in buckets.values():
+            assert members and members <= live
+
+
+def test_disabled_cache_never_hits():
+    cache = SemanticPlanCache(enabled=False)
+    cache.store("lee notas.txt", {}, _read("notas.txt"))
+    assert cache.lookup("lee notas.txt") is None
+
+
+def test_record_verification_counts_false_reuse(cache):
+    cache.record_verification(_read("a.txt"), _read("a.txt"))
+    cache.record_verification(_read("a.txt"), _read("b.txt"))
+    stats = cache.stats()
+    assert stats["verified"] == 2
+    assert stats["false_reuse"] == 1
+    assert stats["false_reuse_rate"] == 0.5
+
+
+class PlannerLLM:
+    """Planner de prueba: responde con los intents que se le indiquen por objetivo."""
+    model_name = "fake-planner"
+    temperature = 0
+
+    def __init__(self, plans):
+        self.plans = plans
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        goal = messages[-1]["content"].split("\n")[0].removeprefix("Objetivo: ")
+        return SimpleNamespace(content=json.dumps(self.plans[goal]))
+
+
+def test_engine_verifies_sampled_hits_and_counts_false_reuse(monkeypatch):
+    monkeypatch.setenv("DEEPAGENT_JOURNAL_PATH", "")
+    llm_cache = LLMCache([MemoryTier(max_entries=16, max_bytes=1 << 20, ttl_seconds=60)])
+    monkeypatch.setattr(plan_execute, "get_llm_cache", lambda: llm_cache)
+    plan_cache = SemanticPlanCache(num_perm=64, bands=64, verify_rate=1.0)
+    llm = PlannerLLM({
+        "lee notas.txt": _read("notas.txt"),
+        # El LLM planifica otra cosa para el objetivo similar: la reutilización era incorrecta
+        "lee informe.txt": [{"intent": "analyze_text", "params": {"path": "informe.txt"}}],
+    })
+    engine = PipelineEngine(llm, {}, plan_cache=plan_cache, stream_plans=False, planner_mode="json")
+
+    engine._plan_intents({"goal": "lee notas.txt", "context": {}})
+    planned = engine._plan_intents({"goal": "lee informe.txt", "context": {}})
+
+    assert llm.calls == 2
+    # Con verificación prevalece el plan del LLM
+    assert planned["intents"] == [{"intent": "analyze_text", "params": {"path": "informe.txt"}}]
+    stats = plan_cache.stats()
+    assert stats["hits"] == 1 and stats["verified"] == 1 and stats["false_reuse"] == 1
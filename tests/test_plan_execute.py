@@ -0,0 +1,101 @@
+"""Tests del planner de PlanExecuteEngine (caché de planes, experiencia previa y vía rápida)."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from core.engines.deepagent import plan_execute
+from core.engines.deepagent.pipeline_engine import PipelineEngine
+from core.engines.deepagent.plan_cache import SemanticPlanCache
+from core.llm_cache import LLMCache, MemoryTier
+
+
+class FakeLLM:
+    model_name = "fake-planner"
+    temperature = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(messages)
+        return SimpleNamespace(content=json.dumps([{"intent": "analyze", "params": {"content": "x"}}]))
+
+
+@pytest.fixture
+def llm_cache(monkeypatch):
+    monkeypatch.setenv("DEEPAGENT_JOURNAL_PATH", "")
+    cache = LLMCache([MemoryTier(max_entries=16, max_bytes=1 << 20, ttl_seconds=60)])
+    monkeypatch.setattr(plan_execute, "get_llm_cache", lambda: cache)
+    return cache
+
+
+def _engine(llm, memory_context):
+    return PipelineEngine(
+        llm, {}, plan_cache=SemanticPlanCache(enabled=False), stream_plans=False,
+        planner_mode="json", memory_context=memory_context
+    )
+
+
+def test_memory_block_does_not_break_the_plan_cache(llm_cache):
+    llm = FakeLLM()
+    blocks = iter(["Experiencia previa relevante:\n- a", "Experiencia previa relevante:\n- b"])
+    engine = _engine(llm, lambda goal: next(blocks))
+    state = {"goal": "analiza el informe", "context": {}}
+
+    first = engine._plan_intents(state)
+    second = engine._plan_intents(state)
+
+    assert first == second
+    assert len(llm.calls) == 1
+    assert llm.calls[0][1] == {"role": "system", "content": "Experiencia previa relevante:\n- a"}
+
+
+def test_memory_block_is_retrieved_only_on_cache_miss(llm_cache):
+    llm = FakeLLM()
+    goals = []
+    engine = _engine(llm, lambda goal: goals.append(goal) or "")
+    state = {"goal": "analiza el informe", "context": {}}
+
+    engine._plan_intents(state)
+    engine._plan_intents(state)
+
+    assert goals == ["analiza el informe"]
+    assert len(llm.calls[0]) == 2
+
+
+def test_engine_base_is_abstract():
+    with pytest.raises(TypeError):
+        plan_execute.PlanExecuteEngine(FakeLLM(), {})
+
+
+def test_question_prompt_is_shared_with_question_tool():
+    from tools.question_tool import SYSTEM_PROMPT
+    assert PipelineEngine.QUESTION_PROMPT is SYSTEM_PROMPT
+
+
+class AnswerTools:
+    """Herramientas de prueba: answer_question responde con el texto indicado."""
+
+    def __init__(self, answer):
+        self.answer = answer
+
+    def execute(self, intent):
+        return self.answer
+
+
+@pytest.mark.parametrize("answer, saved", [
+    ("París es la capital de Francia.", 1),
+    ("Error al generar respuesta: Proveedor LLM degradado: circuito abierto", 0),
+])
+def test_question_fastpath_counts_savings_only_for_real_answers(llm_cache, answer, saved):
+    engine = PipelineEngine(FakeLLM(), AnswerTools(answer), plan_cache=SemanticPlanCache(enabled=False),
+                            stream_plans=False, planner_mode="json")
+    state = engine._answer_directly("¿Cuál es la capital de Francia?", {}, {})
+
+    assert state["errors"] == []
+    metrics = engine.get_metrics()["question_fastpath"]
+    assert metrics["question_fastpath"] == saved
+    assert metrics["llm_calls_saved"] == saved
+    assert (metrics["tokens_saved_estimate"] > 0) == bool(saved)
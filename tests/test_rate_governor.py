@@ -0,0 +1,95 @@
+"""Tests del gobernador de tasa: buckets locales y compartidos entre procesos por archivo."""
+
+import asyncio
+import fcntl
+import json
+import threading
+import time
+
+import pytest
+
+from core.rate_governor import FileBuckets, LocalBuckets, ModelLimits, RateGovernor
+
+
+@pytest.fixture
+def shared_file(tmp_path):
+    return str(tmp_path / "rate" / "codi_rate.json")
+
+
+def _governor(shared_file=None, rpm=2, tpm=0):
+    return RateGovernor({"m": ModelLimits(rpm=rpm, tpm=tpm)}, ModelLimits(), shared_file=shared_file)
+
+
+def test_backend_follows_configuration(shared_file):
+    assert isinstance(_governor().backend, LocalBuckets)
+    governor = _governor(shared_file)
+    assert isinstance(governor.backend, FileBuckets)
+    assert governor.stats()["mode"] == "shared_file"
+
+
+def test_unlimited_model_never_waits():
+    governor = RateGovernor({}, ModelLimits())
+    assert asyncio.run(governor.acquire("otro", 10)) == 0.0
+    assert asyncio.run(governor.try_acquire("otro", 10)) is True
+
+
+def test_shared_file_budget_is_shared_between_workers(shared_file):
+    """Dos gobernadores (como dos workers de uvicorn) consumen el mismo bucket."""
+    first, second = _governor(shared_file), _governor(shared_file)
+
+    async def scenario():
+        await first.acquire("m", 10)
+        await second.acquire("m", 10)
+        return await first.try_acquire("m", 10), await second.try_acquire("m", 10)
+
+    assert asyncio.run(scenario()) == (False, False)
+    with open(shared_file) as f:
+        assert json.load(f)["m"]["req"] < 1
+
+
+def test_shared_file_reconcile_adjusts_tokens(shared_file):
+    governor = _governor(shared_file, rpm=0, tpm=1000)
+    asyncio.run(governor.acquire("m", 100))
+    asyncio.run(governor.reconcile("m", 100, 400))
+    with open(shared_file) as f:
+        assert json.load(f)["m"]["tok"] == pytest.approx(600, abs=5)
+
+
+def test_shared_file_lock_does_not_block_the_event_loop(shared_file):
+    """Mientras otro proceso tiene el flock, el loop del gateway sigue atendiendo otras llamadas."""
+    governor = _governor(shared_file)
+    holder = open(shared_file, "a+")
+    fcntl.flock(holder, fcntl.LOCK_EX)
+    release = threading.Timer(0.5, lambda: (fcntl.flock(holder, fcntl.LOCK_UN), holder.close()))
+
+    async def scenario():
+        acquire = asyncio.ensure_future(governor.acquire("m", 10))
+        started = time.monotonic()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        ticking = time.monotonic() - started
+        blocked = not acquire.done()
+        await acquire
+        return ticking, blocked
+
+    release.start()
+    try:
+        ticking, blocked = asyncio.run(scenario())
+    finally:
+        release.join()
+    assert blocked
+    assert ticking < 0.4
+
+
+def test_try_acquire_does_not_jump_the_queue():
+    governor = _governor(rpm=60)
+    governor.backend._state["m"] = {"req": 0.0, "tok": 0.0, "ts": time.time()}
+
+    async def scenario():
+        queued = asyncio.ensure_future(governor.acquire("m", 10))
+        await asyncio.sleep(0.01)
+        jumped = await governor.try_acquire("m", 10)
+        queued.cancel()
+        return jumped
+
+    assert asyncio.run(scenario()) is False
@@ -0,0 +1,74 @@
+"""Tests de core.report_store.ReportStore (LRU + TTL + volcado a disco)."""
+
+import os
+
+from core.report_store import ReportStore
+
+
+class Report:
+    def __init__(self, name):
+        self.name = name
+
+    def to_dict(self):
+        return {"name": self.name}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"])
+
+
+def _store(tmp_path, **kwargs):
+    return ReportStore(factory=Report.from_dict, spill_dir=str(tmp_path), **kwargs)
+
+
+def test_evicted_reports_are_reloaded_from_disk(tmp_path):
+    store = _store(tmp_path, max_entries=2)
+    for n in range(4):
+        store[f"r{n}"] = Report(f"r{n}")
+
+    assert store.stats()["in_memory"] == 2
+    assert store.stats()["on_disk"] == 2
+    assert store["r0"].name == "r0"
+    assert len(store) == 4
+    assert "r1" in store and "missing" not in store
+    assert store.get("missing") is None
+
+
+def test_keys_come_from_the_spill_index_not_the_directory(tmp_path, monkeypatch):
+    store = _store(tmp_path, max_entries=1)
+    store["a"] = Report("a")
+    store["b"] = Report("b")
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("no se debe listar el directorio")
+
+    monkeypatch.setattr(os, "listdir", forbidden)
+    monkeypatch.setattr(os, "scandir", forbidden)
+    assert store.keys() == ["a", "b"]
+    assert len(store) == 2 and bool(store)
+    assert store.stats()["on_disk"] == 1
+    monkeypatch.undo()
+    store.close()
+
+
+def test_spill_dir_is_trimmed_to_max_spill_files(tmp_path):
+    store = _store(tmp_path, max_entries=1, max_spill_files=2)
+    for n in range(5):
+        store[f"r{n}"] = Report(f"r{n}")
+
+    assert store.keys() == ["r2", "r3", "r4"]
+    assert sorted(os.listdir(store.spill_dir)) == ["r2.json", "r3.json"]
+    assert store.get("r0") is None
+
+
+def test_each_store_uses_its_own_spill_dir(tmp_path):
+    first = _store(tmp_path, max_entries=1)
+    first["a"] = Report("viejo")
+    first["b"] = Report("b")
+
+    second = _store(tmp_path, max_entries=1)
+
+    assert first.spill_dir != second.spill_dir
+    assert "a" not in second and second.get("a") is None
+    first.close()
+    assert not os.path.exists(first.spill_dir)
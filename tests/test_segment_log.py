@@ -0,0 +1,144 @@
+"""Tests de memory.segment_log: añadido, reproducción, rotación, compactación y caídas."""
+
+import os
+
+import pytest
+
+from memory import segment_log as segment_log_module
+from memory.segment_log import SegmentLog
+
+
+def _fold(state, record):
+    state["items"].append(record["n"])
+
+
+def _initial():
+    return {"items": []}
+
+
+def _open(directory, **kwargs):
+    kwargs.setdefault("compact_segments", 100)
+    log = SegmentLog(str(directory), _fold, _initial, **kwargs)
+    state = log.replay()
+    return log, state
+
+
+def _segment_ids(directory):
+    return sorted(int(m.group(1)) for m in map(segment_log_module.SEGMENT_PATTERN.match, os.listdir(directory)) if m)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return tmp_path / "log"
+
+
+def test_append_and_replay(directory):
+    log, state = _open(directory)
+    assert state == {"items": []}
+    assert log.is_empty() is False  # replay abre el segmento activo
+    log.append({"n": 1})
+    log.append_many([{"n": 2}, {"n": 3}])
+    log.sync()
+    log.close()
+
+    log, state = _open(directory)
+    assert state["items"] == [1, 2, 3]
+    log.append({"n": 4})
+    log.close()
+    assert _open(directory)[1]["items"] == [1, 2, 3, 4]
+
+
+def test_new_directory_is_empty(tmp_path):
+    assert SegmentLog(str(tmp_path / "nuevo"), _fold, _initial).is_empty()
+
+
+def test_rollover_seals_segments_without_splitting_batches(directory):
+    log, _ = _open(directory, segment_bytes=40)
+    for n in range(10):
+        log.append({"n": n})
+    log.append_many([{"n": 10}, {"n": 11}, {"n": 12}])
+    stats = log.stats()
+    log.close()
+
+    assert stats["rollovers"] > 0
+    assert stats["sealed_segments"] == len(_segment_ids(directory)) - 1
+    last = os.path.join(directory, f"segment-{_segment_ids(directory)[-1]:08d}.jsonl")
+    with open(last, "rb") as f:
+        assert f.read().count(b"\n") == 3
+    assert _open(directory, segment_bytes=40)[1]["items"] == list(range(13))
+
+
+def test_compaction_folds_sealed_segments_into_the_snapshot(directory):
+    log, _ = _open(directory, segment_bytes=40)
+    for n in range(8):
+        log.append({"n": n})
+    sealed = log.stats()["sealed_segments"]
+    assert sealed > 0
+    assert log.compact() == sealed
+    assert log.compact() == 0
+    assert _segment_ids(directory) == [log.stats()["active_segment"]]
+    assert os.path.exists(os.path.join(directory, segment_log_module.SNAPSHOT_FILE))
+    log.append({"n": 8})
+    log.close()
+
+    assert _open(directory, segment_bytes=40)[1]["items"] == list(range(9))
+
+
+def test_rollover_triggers_background_compaction(directory):
+    log, _ = _open(directory, segment_bytes=40, compact_segments=2)
+    for n in range(12):
+        log.append({"n": n})
+    # compact() espera a la compactación de fondo en curso (o la hace si aún no empezó)
+    log.compact()
+    assert log.stats()["compactions"] >= 1
+    assert log.stats()["sealed_segments"] == 0
+    log.close()
+    assert _open(directory, segment_bytes=40)[1]["items"] == list(range(12))
+
+
+def test_folded_segments_left_behind_are_not_replayed_twice(directory, monkeypatch):
+    log, _ = _open(directory, segment_bytes=40)
+    for n in range(6):
+        log.append({"n": n})
+    monkeypatch.setattr(segment_log_module.os, "remove", lambda path: (_ for _ in ()).throw(OSError("ocupado")))
+    assert log.compact() > 0
+    monkeypatch.undo()
+    log.close()
+    assert len(_segment_ids(directory)) > 1
+
+    assert _open(directory, segment_bytes=40)[1]["items"] == list(range(6))
+
+
+def test_torn_tail_is_discarded_and_truncated(directory):
+    log, _ = _open(directory)
+    log.append_many([{"n": 1}, {"n": 2}])
+    path = os.path.join(directory, f"segment-{log.stats()['active_segment']:08d}.jsonl")
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b'{"n": 3')
+    good_size = os.path.getsize(path) - len(b'{"n": 3')
+
+    log, state = _open(directory)
+    assert state["items"] == [1, 2]
+    assert log.stats()["torn_records"] == 1
+    assert os.path.getsize(path) == good_size
+    log.append({"n": 4})
+    log.close()
+    assert _open(directory)[1]["items"] == [1, 2, 4]
+
+
+def test_unreadable_snapshot_falls_back_to_segments(directory):
+    log, _ = _open(directory)
+    log.append({"n": 1})
+    log.close()
+    with open(os.path.join(directory, segment_log_module.SNAPSHOT_FILE), "w") as f:
+        f.write("{roto")
+    assert _open(directory)[1]["items"] == [1]
+
+
+def test_write_snapshot_imports_existing_state(directory):
+    log, _ = _open(directory)
+    log.write_snapshot({"items": [10, 20]})
+    log.append({"n": 30})
+    log.close()
+    assert _open(directory)[1]["items"] == [10, 20, 30]
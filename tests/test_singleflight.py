@@ -0,0 +1,189 @@
+"""Tests de core.singleflight: coalescencia con deadlines distintos por petición."""
+
+import threading
+import time
+
+import pytest
+
+from core.deadline import Deadline, DeadlineExceeded, SharedDeadline, current_deadline, deadline_scope
+from core.events import emit, event_sink
+from core.singleflight import SingleFlight
+
+
+def _start(target, results, name):
+    def run():
+        try:
+            results[name] = target()
+        except BaseException as e:
+            results[name] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestSharedDeadline:
+    def test_lives_while_any_participant_lives(self):
+        shared = SharedDeadline()
+        first, second = Deadline(60), Deadline(60)
+        shared.join(first)
+        shared.join(second)
+        first.cancel("client_disconnected")
+        assert not shared.expired
+        second.cancel("job_cancelled")
+        assert shared.expired
+        assert shared.reason == "job_cancelled"
+
+    def test_remaining_is_the_longest(self):
+        shared = SharedDeadline()
+        shared.join(Deadline(1))
+        shared.join(Deadline(30))
+        assert 29 < shared.remaining() <= 30
+        shared.join(None)
+        assert shared.remaining() is None
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return "report"
+
+        results = {}
+        leader = _start(lambda: flight.do("k", fn), results, "leader")
+        time.sleep(0.05)
+        follower = _start(lambda: flight.do("k", fn), results, "follower")
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        assert calls == [1]
+        assert results["leader"] == ("report", True)
+        assert results["follower"] == ("report", True)
+
+    def test_follower_wait_is_bounded_by_its_own_deadline(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        results = {}
+
+        def fn():
+            release.wait(5)
+            return "report"
+
+        def call(timeout):
+            with deadline_scope(Deadline(timeout)):
+                return flight.do("k", fn)
+
+        leader = _start(lambda: call(60), results, "leader")
+        time.sleep(0.05)
+        started = time.monotonic()
+        follower = _start(lambda: call(0.2), results, "follower")
+        follower.join(5)
+        assert isinstance(results["follower"], DeadlineExceeded)
+        assert time.monotonic() - started < 1.0
+        release.set()
+        leader.join(5)
+        assert results["leader"] == ("report", True)
+        assert flight.stats()["abandoned"] == 1
+
+    def test_leader_cancellation_does_not_stop_followers(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        leader_deadline, follower_deadline = Deadline(60), Deadline(60)
+        observed = {}
+        results = {}
+
+        def fn():
+            release.wait(5)
+            observed["expired"] = current_deadline().expired
+            return "report"
+
+        def call(deadline):
+            with deadline_scope(deadline):
+                return flight.do("k", fn)
+
+        leader = _start(lambda: call(leader_deadline), results, "leader")
+        time.sleep(0.05)
+        follower = _start(lambda: call(follower_deadline), results, "follower")
+        time.sleep(0.05)
+        leader_deadline.cancel("client_disconnected")
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        assert observed["expired"] is False
+        assert results["follower"] == ("report", True)
+
+    def test_shared_run_cancelled_when_all_waiters_leave(self):
+        flight = SingleFlight()
+        leader_deadline, follower_deadline = Deadline(60), Deadline(60)
+        results = {}
+
+        def fn():
+            while not current_deadline().expired:
+                time.sleep(0.01)
+            return current_deadline().reason
+
+        def call(deadline):
+            with deadline_scope(deadline):
+                return flight.do("k", fn)
+
+        leader = _start(lambda: call(leader_deadline), results, "leader")
+        time.sleep(0.05)
+        follower = _start(lambda: call(follower_deadline), results, "follower")
+        time.sleep(0.05)
+        follower_deadline.cancel("job_cancelled")
+        follower.join(5)
+        assert isinstance(results["follower"], DeadlineExceeded)
+        assert leader.is_alive()
+        leader_deadline.cancel("client_disconnected")
+        leader.join(5)
+        assert results["leader"][0] in ("client_disconnected", "job_cancelled")
+
+    def test_events_fan_out_to_followers(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        received = {"leader": [], "follower": []}
+        results = {}
+
+        def fn():
+            release.wait(5)
+            emit("plan", plan_id="p1")
+            return "report"
+
+        def call(name):
+            with event_sink(lambda event, data: received[name].append(event)):
+                return flight.do("k", fn)
+
+        leader = _start(lambda: call("leader"), results, "leader")
+        time.sleep(0.05)
+        follower = _start(lambda: call("follower"), results, "follower")
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        assert received == {"leader": ["plan"], "follower": ["plan"]}
+
+    def test_leader_error_propagates_to_followers(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        results = {}
+
+        def fn():
+            release.wait(5)
+            raise ValueError("boom")
+
+        leader = _start(lambda: flight.do("k", fn), results, "leader")
+        time.sleep(0.05)
+        follower = _start(lambda: flight.do("k", fn), results, "follower")
+        time.sleep(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        assert isinstance(results["leader"], ValueError)
+        assert isinstance(results["follower"], ValueError)
+        with pytest.raises(KeyError):
+            flight._calls["k"]
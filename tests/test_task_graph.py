@@ -0,0 +1,51 @@
+"""Tests de core.task_graph: oleadas topológicas, ciclos y dependencias inexistentes."""
+
+from core.planner import Task
+from core.task_graph import build_task_graph
+
+
+def _task(task_id, dependencies=(), priority=1):
+    return Task(id=task_id, title=f"Tarea {task_id}", description="", dependencies=list(dependencies),
+                priority=priority)
+
+
+def _ids(waves):
+    return [[task.id for task in wave] for wave in waves]
+
+
+def test_waves_follow_dependencies():
+    tasks = [_task(1), _task(2), _task(3, [1]), _task(4, [1, 2]), _task(5, [3, 4])]
+    graph = build_task_graph(tasks)
+    assert _ids(graph.waves) == [[1, 2], [3, 4], [5]]
+    assert graph.invalid == {}
+
+
+def test_waves_are_sorted_by_priority_then_plan_order():
+    tasks = [_task(1, priority=3), _task(2, priority=1), _task(3, priority=3), _task(4, priority=2)]
+    assert _ids(build_task_graph(tasks).waves) == [[2, 4, 1, 3]]
+
+
+def test_duplicate_dependencies_count_once():
+    tasks = [_task(1), _task(2, [1, 1])]
+    assert _ids(build_task_graph(tasks).waves) == [[1], [2]]
+
+
+def test_dangling_dependency_is_invalid():
+    tasks = [_task(1), _task(2, [99]), _task(3, [2])]
+    graph = build_task_graph(tasks)
+    assert graph.invalid == {2: "Dependencia inexistente: 99"}
+    assert graph.descendants(2) == {3}
+
+
+def test_cycle_is_invalid_and_its_descendants_are_not_scheduled():
+    tasks = [_task(1), _task(2, [3]), _task(3, [2]), _task(4, [2]), _task(5, [1])]
+    graph = build_task_graph(tasks)
+    assert graph.invalid == {2: "Ciclo de dependencias", 3: "Ciclo de dependencias"}
+    assert _ids(graph.waves) == [[1], [5]]
+    assert 4 not in {task.id for wave in graph.waves for task in wave}
+
+
+def test_self_dependency_is_a_cycle():
+    graph = build_task_graph([_task(1, [1])])
+    assert graph.invalid == {1: "Ciclo de dependencias"}
+    assert graph.waves == []
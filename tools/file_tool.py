@@ -22,14 +22,14 @@ class FileTool(Tool):
             "type": "function",
             "function": {
                 "name": "file_operation",
-                "description": "Realiza operaciones de archivo como crear o leer contenido.",
+                "description": "Realiza operaciones de archivo como crear o leer contenido, o extraer un archivo ZIP.",
                 "parameters": {
                     "type": "object",
                     "properties": {
                         "operation": {
                             "type": "string",
-                            "enum": ["create", "read"],
-                            "description": "Tipo de operación a realizar: 'create' para crear/sobrescribir, 'read' para leer."
+                            "enum": ["create", "read", "unzip"],
+                            "description": "Tipo de operación a realizar: 'create' para crear/sobrescribir, 'read' para leer, 'unzip' para extraer un ZIP."
                         },
                         "path": {
                             "type": "string",
@@ -1,8 +1,18 @@
 """
-QuestionTool - Herramienta para responder preguntas usando OpenAI directamente
+QuestionTool - Herramienta para responder preguntas usando OpenAI (vía LLMGateway)
 """
 import os
-from openai import OpenAI
+
+# Prompt de sistema de las respuestas (también lo usa la vía rápida de DeepAgent)
+SYSTEM_PROMPT = "Eres CODI, un asistente inteligente. Responde de forma clara y concisa."
+
+# Prefijo de la respuesta de run() cuando falla el proveedor (incluido el circuito abierto)
+ERROR_PREFIX = "Error al generar respuesta:"
+
+
+def is_error_answer(answer) -> bool:
+    """True si el texto es el error que devuelve run() en lugar de una respuesta."""
+    return isinstance(answer, str) and answer.startswith(ERROR_PREFIX)
 
 
 class QuestionTool:
@@ -15,15 +25,19 @@ class QuestionTool:
         if not api_key:
             raise ValueError("OPENAI_API_KEY no configurada")
         
-        self.client = OpenAI(api_key=api_key)
+        # Import diferido: core importa tools al inicializarse
+        from core.llm_gateway import get_llm_gateway
+        # Cliente compartido (pool HTTP asíncrono del LLMGateway)
+        self.client = get_llm_gateway()
         self.model = "gpt-4o-mini"
     
-    def run(self, question: str = None, **kwargs) -> str:
+    def run(self, question: str = None, use_cache: bool = True, **kwargs) -> str:
         """
         Responde una pregunta usando ChatGPT.
         
         Args:
             question: La pregunta a responder
+            use_cache: Servir respuestas repetidas desde la caché LLM
             
         Returns:
             str: La respuesta generada por ChatGPT
@@ -34,22 +48,26 @@ class QuestionTool:
         if not question:
             return "Error: No se proporcionó ninguna pregunta"
         
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": question}
+        ]
+        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Eres CODI, un asistente inteligente. Responde de forma clara y concisa."},
-                    {"role": "user", "content": question}
-                ],
+            return self.client.chat(
+                self.model,
+                messages,
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=500,
+                use_cache=use_cache
             )
             
-            answer = response.choices[0].message.content
-            return answer
-            
         except Exception as e:
-            return f"Error al generar respuesta: {str(e)}"
+            # Import diferido (ver __init__): una petición interrumpida no es una respuesta
+            from core.deadline import DeadlineExceeded
+            if isinstance(e, DeadlineExceeded):
+                raise
+            return f"{ERROR_PREFIX} {str(e)}"
     
     def answer_question(self, question: str) -> dict:
         """